@@ -0,0 +1,59 @@
+# -*- coding: utf-8 -*-
+# This file is part of https://github.com/26fe/jsonstat.py
+# Copyright (C) 2016-2021 gf <gf@26fe.com>
+# See LICENSE file
+
+# compare the time to parse the bundled examples and the test fixtures
+# with each installed json backend
+# usage: python bin/benchmark_json_backend.py [jsonstat files]
+
+# stdlib
+import glob
+import os
+import sys
+import timeit
+
+# jsonstat
+JSONSTAT_HOME = os.path.join(os.path.dirname(__file__), '..')
+sys.path.insert(0, JSONSTAT_HOME)
+import jsonstat
+
+
+def read_files(filenames):
+    """contents of the files which are parsed without errors"""
+    contents = []
+    for filename in filenames:
+        with open(filename, 'rb') as f:
+            content = f.read()
+        try:
+            jsonstat.from_string(content)
+        except Exception:
+            continue
+        contents.append(content)
+    return contents
+
+
+def benchmark(filenames, repeat=5):
+    contents = read_files(filenames)
+    nr_bytes = sum(len(c) for c in contents)
+    print("{} files, {:.1f} MB".format(len(contents), nr_bytes / 1e6))
+
+    def parse():
+        for content in contents:
+            jsonstat.from_string(content)
+
+    for backend in jsonstat.available_json_backends():
+        jsonstat.set_json_backend(backend)
+        t = min(timeit.repeat(parse, number=1, repeat=repeat))
+        print("  {:<10} {:8.3f} s {:8.1f} MB/s".format(backend, t, nr_bytes / t / 1e6))
+    jsonstat.set_json_backend()
+
+
+if __name__ == "__main__":
+    if len(sys.argv) > 1:
+        benchmark(sys.argv[1:])
+    else:
+        pattern = os.path.join("**", "*.json")
+        filenames = glob.glob(os.path.join(jsonstat._examples_dir, pattern), recursive=True)
+        filenames += glob.glob(os.path.join(JSONSTAT_HOME, "jsonstat-tests", "fixtures", pattern), recursive=True)
+        benchmark(sorted(filenames))
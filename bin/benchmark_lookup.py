@@ -0,0 +1,74 @@
+# -*- coding: utf-8 -*-
+# This file is part of https://github.com/26fe/jsonstat.py
+# Copyright (C) 2016-2021 gf <gf@26fe.com>
+# See LICENSE file
+
+# compare the time to lookup a datapoint with
+#   dataset.data(), dataset.value(), dataset.selector() and dataset.data_many()
+# usage: python bin/benchmark_lookup.py [jsonstat file]
+
+# stdlib
+import os
+import sys
+import random
+import timeit
+
+# jsonstat
+JSONSTAT_HOME = os.path.join(os.path.dirname(__file__), '..')
+sys.path.insert(0, JSONSTAT_HOME)
+import jsonstat
+
+
+def benchmark(filename, nr_lookups=10000):
+    o = jsonstat.from_file(filename)
+    dataset = o.dataset(0) if isinstance(o, jsonstat.JsonStatCollection) else o
+    dims = dataset.dimensions()
+    dids = [dim.did for dim in dims]
+
+    random.seed(0)
+    llcat = [tuple(dim.category(random.randrange(len(dim))).index for dim in dims)
+             for _ in range(nr_lookups)]
+    ldcat = [dict(zip(dids, lcat)) for lcat in llcat]
+
+    selector = dataset.selector(*dids)
+
+    def with_data():
+        for dcat in ldcat:
+            dataset.data(dcat)
+
+    def with_value():
+        for dcat in ldcat:
+            dataset.value(dcat)
+
+    def with_selector_idx():
+        for lcat in llcat:
+            selector.idx(*lcat)
+
+    def with_selector_value():
+        for lcat in llcat:
+            selector.value(*lcat)
+
+    def with_selector():
+        for lcat in llcat:
+            selector.data(*lcat)
+
+    def with_data_many():
+        dataset.data_many(ldcat)
+
+    print("{}: {} lookups on {} datapoints".format(os.path.basename(filename), nr_lookups, len(dataset)))
+    for name, f in [("data()", with_data),
+                    ("value()", with_value),
+                    ("selector.idx()", with_selector_idx),
+                    ("selector.value()", with_selector_value),
+                    ("selector.data()", with_selector),
+                    ("data_many()", with_data_many)]:
+        t = min(timeit.repeat(f, number=1, repeat=5))
+        print("  {:<16} {:8.3f} us per lookup".format(name, t / nr_lookups * 1e6))
+
+
+if __name__ == "__main__":
+    if len(sys.argv) > 1:
+        benchmark(sys.argv[1])
+    else:
+        benchmark(os.path.join(jsonstat._examples_dir, "www.json-stat.org", "oecd-canada-col.json"))
+        benchmark(os.path.join(JSONSTAT_HOME, "jsonstat-tests", "fixtures", "www.ssb.no", "29843.json"))
@@ -0,0 +1,67 @@
+# -*- coding: utf-8 -*-
+# This file is part of https://github.com/26fe/jsonstat.py
+# Copyright (C) 2016-2021 gf <gf@26fe.com>
+# See LICENSE file
+
+# stdlib
+import os
+
+# external modules
+import pytest
+
+# jsonstat
+import jsonstat
+
+
+@pytest.fixture
+def restore_backend():
+    backend = jsonstat.json_backend()
+    yield
+    jsonstat.set_json_backend(backend)
+
+
+@pytest.mark.parametrize("backend", jsonstat.available_json_backends())
+def test_backends_give_same_dataset(backend, restore_backend):
+    json_pathname = os.path.join(jsonstat._examples_dir, "www.json-stat.org", "oecd-canada-col.json")
+    jsonstat.set_json_backend("json")
+    expected = jsonstat.from_file(json_pathname).dataset(0).to_table()
+
+    assert jsonstat.set_json_backend(backend) == backend
+    assert jsonstat.json_backend() == backend
+    assert jsonstat.from_file(json_pathname).dataset(0).to_table() == expected
+
+
+def test_from_string_accepts_bytes():
+    json_pathname = os.path.join(jsonstat._examples_dir, "www.json-stat.org", "oecd-canada-col.json")
+    with open(json_pathname, 'rb') as f:
+        collection = jsonstat.from_string(f.read())
+    assert collection.dataset(0).value(area="AU", year="2003") == 5.943826289
+
+    with pytest.raises(jsonstat.JsonStatException):
+        jsonstat.from_string(b'{"version": ')
+
+
+def test_unknown_backend(restore_backend):
+    with pytest.raises(jsonstat.JsonStatException):
+        jsonstat.set_json_backend("unknown")
+
+
+@pytest.mark.parametrize("backend", jsonstat.available_json_backends())
+def test_backends_accept_nan_and_infinity(backend, restore_backend):
+    # rejected by orjson, decoded by the json module
+    jsonstat.set_json_backend(backend)
+    json_data = jsonstat.backend.loads(memoryview(b'{"value": [NaN, Infinity, 1]}'))
+    assert json_data["value"][1:] == [float("inf"), 1]
+    assert json_data["value"][0] != json_data["value"][0]
+
+    with pytest.raises(ValueError):
+        jsonstat.backend.loads(b'{"value": [NaN')
+
+
+@pytest.mark.skipif("orjson" not in jsonstat.available_json_backends(), reason="orjson not installed")
+def test_orjson_big_integers_are_floats(restore_backend):
+    # integers beyond 64 bits are not decoded as int by orjson
+    jsonstat.set_json_backend("orjson")
+    assert jsonstat.backend.loads(b'[123456789012345678901234567890]') == [1.2345678901234568e+29]
+    jsonstat.set_json_backend("json")
+    assert jsonstat.backend.loads(b'[123456789012345678901234567890]') == [123456789012345678901234567890]
@@ -124,3 +124,48 @@ def test_parse_v2_from_file():
 
     canada = collection.dataset(1)
     assert canada is not None
+
+
+def test_datasets_are_parsed_on_first_access():
+    json_string = """
+        {
+            "oecd" : {
+                "value": [1],
+                "dimension" : {
+                    "id": ["one"],
+                    "size": [1],
+                    "one": { "category": { "index":{"2010":0}} }
+                }
+            },
+            "canada" : {
+                "dimension": {}
+            }
+        }
+        """
+    collection = jsonstat.JsonStatCollection()
+    collection.from_string(json_string)
+    assert len(collection) == 2
+
+    oecd = collection.dataset("oecd")
+    assert oecd is collection.dataset(0)
+
+    with pytest.raises(jsonstat.JsonStatMalformedJson):
+        collection.dataset("canada")
+
+
+def test_parse_with_workers():
+    filename = os.path.join(jsonstat._examples_dir, "www.json-stat.org", "oecd-canada.json")
+    expected = jsonstat.from_file(filename)
+    collection = jsonstat.from_file(filename, workers=2)
+    for name in ["oecd", "canada"]:
+        dataset = collection.dataset(name)
+        assert dataset.name == name
+        assert dataset.to_table(status_column="status") == expected.dataset(name).to_table(status_column="status")
+
+
+def test_parse_with_workers_collection_of_links():
+    filename = os.path.join(jsonstat._examples_dir, "www.json-stat.org", "collection.json")
+    expected = jsonstat.from_file(filename)
+    collection = jsonstat.from_file(filename, workers=2)
+    assert str(collection) == str(expected)
+    assert collection.dataset(1).label == "Population by sex and age group. Canada. 2012"
@@ -7,6 +7,7 @@
 import os
 
 # external modules
+import numpy as np
 import pytest
 
 # jsonstat
@@ -71,6 +72,25 @@ def json_incorrect_data_size():
         '''
 
 
+@pytest.fixture(scope='module')
+def json_sparse_value():
+    return '''
+        {
+            "version" : "2.0",
+            "class" : "dataset",
+            "label" : "sparse",
+            "value" : { "5" : 15, "0" : 10, "11" : 21.5 },
+            "status" : { "5" : "p" },
+            "id" : ["year", "area"],
+            "size" : [3, 4],
+            "dimension" : {
+                "year" : { "category" : { "index" : ["2012", "2013", "2014"] } },
+                "area" : { "category" : { "index" : ["AU", "AT", "BE", "IT"] } }
+            }
+        }
+        '''
+
+
 #
 # test exceptions
 #
@@ -283,6 +303,31 @@ def test_idx_as_lint():
     assert lint == [0, 0, 10]
 
 
+def test_idx_as_lint_first_dimension():
+    json_pathname = os.path.join(fixture_dir, "dataset", "three_dim_v1.json")
+    dataset = jsonstat.JsonStatDataSet()
+    dataset.from_file(json_pathname)
+
+    for idx in range(len(dataset)):
+        assert dataset.lint_as_idx(dataset.idx_as_lint(idx)) == idx
+
+
+def test_unravel():
+    json_pathname = os.path.join(fixture_dir, "dataset", "three_dim_v1.json")
+    dataset = jsonstat.JsonStatDataSet()
+    dataset.from_file(json_pathname)
+
+    idx = list(range(len(dataset)))
+    lint = dataset.unravel(idx)
+    assert lint.tolist() == list(dataset.all_pos())
+
+    lcat = dataset.unravel(idx, content="id")
+    assert lcat.tolist() == [dataset.lint_as_lcat(lint) for lint in dataset.all_pos()]
+
+    with pytest.raises(jsonstat.JsonStatException):
+        dataset.unravel([len(dataset)])
+
+
 #
 # enumeration function
 # all_pos test
@@ -361,3 +406,208 @@ def test_all_pos_with_three_dim():
         [1, 1, 0], [1, 1, 1], [1, 1, 2], [1, 1, 3]
     ]
     assert result == expected
+
+
+#
+# test value storage
+#
+
+def test_data_with_null_values():
+    json_pathname = os.path.join(fixture_dir, "www.ec.europa.eu_eurostat", "eurostat-name_gpd_c-geo_IT.json")
+    collection = jsonstat.JsonStatCollection()
+    collection.from_file(json_pathname)
+    gdp_c = collection.dataset('nama_gdp_c')
+
+    assert gdp_c.data(0).value is None
+    data = gdp_c.data(time="1990", unit="EUR_HAB")
+    assert data.value == 15800
+    assert isinstance(data.value, int)
+
+
+def test_data_with_dtype():
+    json_pathname = os.path.join(fixture_dir, "dataset", "three_dim_v1.json")
+    dataset = jsonstat.JsonStatDataSet(dtype="float32")
+    dataset.from_file(json_pathname)
+
+    data = dataset.data(one="one_2", two="two_2", three="three_2")
+    assert data.value == 222
+
+
+def test_data_with_string_values():
+    json_pathname = os.path.join(jsonstat._examples_dir, "www.json-stat.org", "order.json")
+    dataset = jsonstat.from_file(json_pathname)
+    assert dataset.data(0).value == "A1B1C1"
+
+
+#
+# test dataset.data_many()
+#
+
+def test_data_many():
+    json_pathname = os.path.join(jsonstat._examples_dir, "www.json-stat.org", "oecd-canada.json")
+    collection = jsonstat.JsonStatCollection()
+    collection.from_file(json_pathname)
+    oecd = collection.dataset('oecd')
+
+    ldcat = [{'area': 'AU', 'year': '2004'},
+             {'concept': 'UNR', 'area': 'AU', 'year': '2013'},
+             {'area': 'Italy', 'year': '2014'}]
+    expected = [oecd.data(dcat) for dcat in ldcat]
+
+    # list of dict
+    data = oecd.data_many(ldcat)
+    assert [e.idx for e in expected] == data.idx.tolist()
+    assert [e.value for e in expected] == data.value.tolist()
+    assert [e.status for e in expected] == data.status.tolist()
+
+    # dict of list
+    data = oecd.data_many({'area': ['AU', 'AU', 'Italy'], 'year': ['2004', '2013', '2014']})
+    assert [e.idx for e in expected] == data.idx.tolist()
+
+    # array of positions
+    lint = [oecd.dcat_to_lint(dcat) for dcat in ldcat]
+    assert [e.value for e in expected] == oecd.values_at(lint).tolist()
+
+    # array of indexes
+    assert [e.value for e in expected] == oecd.values_at([e.idx for e in expected]).tolist()
+
+    # positions mixed with indexes and labels
+    area = oecd.dimension('area')
+    data = oecd.data_many({'area': ['AU', area.category('AU').pos, 'Italy'], 'year': ['2004', '2013', 11]})
+    assert [e.idx for e in expected] == data.idx.tolist()
+    with pytest.raises(jsonstat.JsonStatException):
+        oecd.data_many({'area': ['AU', len(area)], 'year': ['2004', '2013']})
+
+
+def test_data_many_wrong_coords():
+    json_pathname = os.path.join(fixture_dir, "dataset", "three_dim_v1.json")
+    dataset = jsonstat.JsonStatDataSet()
+    dataset.from_file(json_pathname)
+
+    with pytest.raises(jsonstat.JsonStatException):
+        dataset.data_many({"one": ["one_1", "one_3"], "two": ["two_1", "two_1"]})
+    with pytest.raises(jsonstat.JsonStatException):
+        dataset.data_many([[0, 0, 0], [5, 0, 0]])
+
+
+#
+# test dataset.selector()
+#
+
+def test_selector():
+    json_pathname = os.path.join(jsonstat._examples_dir, "www.json-stat.org", "oecd-canada.json")
+    collection = jsonstat.JsonStatCollection()
+    collection.from_file(json_pathname)
+    oecd = collection.dataset('oecd')
+
+    selector = oecd.selector("year", "OECD countries, EU15 and total", concept="UNR")
+    assert selector.dids == ["year", "area"]
+    for area in ["AU", "Italy", "OECD"]:
+        for year in ["2003", "2013"]:
+            assert selector.data(year, area) == oecd.data(area=area, year=year)
+            assert selector(year, area) == oecd.value(area=area, year=year)
+
+    with pytest.raises(jsonstat.JsonStatException):
+        selector.idx("2003", "XX")
+    with pytest.raises(jsonstat.JsonStatException):
+        selector.idx("2003")
+
+
+#
+# test sparse values
+#
+
+def test_sparse_value(json_sparse_value):
+    dataset = jsonstat.JsonStatDataSet()
+    dataset.from_string(json_sparse_value)
+
+    assert len(dataset) == 12
+    assert dataset.data(year="2012", area="AU").value == 10
+    assert dataset.data(year="2013", area="AT") == jsonstat.JsonStatValue(5, 15, "p")
+    assert dataset.data(year="2014", area="IT").value == 21.5
+    assert dataset.data(year="2013", area="IT").value is None
+
+    table = dataset.to_table(content="id")
+    assert len(table) == 12 + 1
+    table = dataset.to_table(content="id", skip_empty=True)
+    assert table[1:] == [["2012", "AU", 10], ["2013", "AT", 15], ["2014", "IT", 21.5]]
+
+    values, axes = dataset.to_ndarray(masked=True)
+    assert values.count() == 3
+    assert values[1, 1] == 15
+
+    subset = dataset.sel(area=["IT", "AT"])
+    assert subset.to_table(content="id", skip_empty=True)[1:] == [["2013", "AT", 15], ["2014", "IT", 21.5]]
+
+
+def test_sparse_value_out_of_size(json_sparse_value):
+    dataset = jsonstat.JsonStatDataSet("sparse")
+    with pytest.raises(jsonstat.JsonStatMalformedJson) as excinfo:
+        dataset.from_string(json_sparse_value.replace('"11" : 21.5', '"12" : 21.5'))
+    expected = "dataset 'sparse': index 12 of 'value' is out of calculate size 12 by dimension"
+    assert expected == str(excinfo.value)
+
+
+#
+# test status
+#
+
+def test_status_codes():
+    json_pathname = os.path.join(jsonstat._examples_dir, "www.json-stat.org", "oecd-canada.json")
+    collection = jsonstat.JsonStatCollection()
+    collection.from_file(json_pathname)
+    oecd = collection.dataset('oecd')
+
+    table, codes = oecd.status_codes()
+    assert table == [None, "e"]
+    assert len(codes) == len(oecd)
+    assert codes.dtype == np.uint8
+    assert oecd.status_mask("e").sum() == 72
+    assert oecd.status_mask("e")[oecd.data(area="AU", year="2013").idx]
+    assert not oecd.status_mask("x").any()
+
+
+def test_status_as_list(json_sparse_value):
+    dataset = jsonstat.JsonStatDataSet()
+    status = '["a", null, null, null, null, "p", null, null, null, null, "a", null]'
+    dataset.from_string(json_sparse_value.replace('{ "5" : "p" }', status))
+
+    table, codes = dataset.status_codes()
+    assert table == [None, "a", "p"]
+    assert codes.tolist() == [1, 0, 0, 0, 0, 2, 0, 0, 0, 0, 1, 0]
+    assert dataset.status(year="2013", area="AT") == "p"
+
+    subset = dataset.sel(area=["BE", "AU"], year=["2014", "2012"])
+    assert subset.status_codes()[1].tolist() == [1, 0, 0, 1]
+    assert subset.to_table(content="id", status_column="Status")[1] == ["2014", "BE", None, "a"]
+
+
+def test_status_as_string(json_sparse_value):
+    dataset = jsonstat.JsonStatDataSet()
+    dataset.from_string(json_sparse_value.replace('{ "5" : "p" }', '"e"'))
+    assert dataset.status(year="2014", area="IT") == "e"
+    assert dataset.status_mask("e").all()
+    assert dataset.sel(area="IT").status(year="2012") == "e"
+
+
+@pytest.mark.parametrize("values, expected", [
+    # json 100.0 stays a float, 100 an int
+    ([100.0, 9.0, None], [100.0, 9.0, None]),
+    ([100, 9, None], [100, 9, None]),
+    ([100, 9.5, None], [100, 9.5, None]),
+    # not numbers or not representable as float are kept as they are
+    (["1.5", "2", None], ["1.5", "2", None]),
+    ([True, False, None], [True, False, None]),
+    ([2 ** 53 + 1, 1, None], [2 ** 53 + 1, 1, None]),
+])
+def test_data_keeps_json_types(values, expected):
+    json_data = {
+        "version": "2.0", "class": "dataset", "id": ["a"], "size": [3], "value": values,
+        "dimension": {"a": {"category": {"index": ["x", "y", "z"]}}}
+    }
+    for value in [values, {str(i): v for i, v in enumerate(values)}]:
+        json_data["value"] = value
+        dataset = jsonstat.from_json(json_data)
+        got = [dataset.data(i).value for i in range(3)]
+        assert [(v, type(v)) for v in got] == [(v, type(v)) for v in expected]
+        assert [row[-1] for row in dataset.to_table()[1:]] == got
@@ -4,9 +4,11 @@
 # See LICENSE file
 
 # stdlib
+import json
 import os
 
 # external packages
+import numpy as np
 import pandas as pd
 import pandas.util.testing as pdt
 import pytest
@@ -143,6 +145,30 @@ def test_to_table_ssb_no():
             assert t == row, msg
 
 
+def test_to_table_same_order_of_all_pos():
+    json_pathname = os.path.join(fixture_dir, "dataset", "three_dim_v1.json")
+    dataset = jsonstat.JsonStatDataSet()
+    dataset.from_file(json_pathname)
+
+    order = ["three", "one", "two"]
+    blocked_dims = {"two": "two_2"}
+    table = dataset.to_table(content="id", order=order, blocked_dims=blocked_dims)
+
+    expected = [dataset.lint_as_lcat(lint) + [dataset.value(lint)]
+                for lint in dataset.all_pos(order=order, blocked_dims=blocked_dims)]
+    assert expected == table[1:]
+
+
+def test_to_table_not_initialized():
+    # datasets of a collection with only an href are not initialized
+    json_pathname = os.path.join(jsonstat._examples_dir, "www.json-stat.org", "collection.json")
+    dataset = jsonstat.from_file(json_pathname).dataset(0)
+    with pytest.raises(jsonstat.JsonStatException):
+        dataset.to_table()
+    with pytest.raises(jsonstat.JsonStatException):
+        dataset.to_data_frame()
+
+
 #
 # to_data_frame
 #
@@ -186,3 +212,183 @@ def test_to_data_frame_year_IT():
     assert (df.columns == pd.Series(['serie', 'area', 'Value'])).all()
     # pdt.assert_series_equal(df.columns,pd.Series(['area', 'Value']))
     assert 34 == df.loc['2014']['Value']
+
+
+#
+# to_ndarray
+#
+
+def test_to_ndarray():
+    json_pathname = os.path.join(fixture_dir, "dataset", "three_dim_v1.json")
+    dataset = jsonstat.JsonStatDataSet()
+    dataset.from_file(json_pathname)
+
+    values, axes = dataset.to_ndarray()
+    assert values.shape == tuple(len(dim) for dim in dataset.dimensions())
+    assert [axis.did for axis in axes] == ["one", "two", "three"]
+
+    lint = dataset.dcat_to_lint({"one": "one_2", "two": "two_2", "three": "three_2"})
+    assert values[tuple(lint)] == dataset.value(lint)
+    assert not values.flags.writeable
+
+
+def test_to_ndarray_masked():
+    json_pathname = os.path.join(fixture_dir, "www.ec.europa.eu_eurostat", "eurostat-name_gpd_c-geo_IT.json")
+    collection = jsonstat.JsonStatCollection()
+    collection.from_file(json_pathname)
+    gdp_c = collection.dataset('nama_gdp_c')
+
+    values, axes = gdp_c.to_ndarray(masked=True)
+    assert values.count() == sum(1 for row in gdp_c.to_table()[1:] if row[-1] is not None)
+    assert values[0, 0, 0, 0] is np.ma.masked
+
+
+#
+# sel
+#
+
+def test_sel():
+    json_pathname = os.path.join(jsonstat._examples_dir, "www.json-stat.org", "oecd-canada.json")
+    collection = jsonstat.JsonStatCollection()
+    collection.from_file(json_pathname)
+    oecd = collection.dataset('oecd')
+
+    subset = oecd.sel(area=["IT", "Australia"], year=slice("2012", None))
+    assert len(subset) == 2 * 3
+    assert [len(dim) for dim in subset.dimensions()] == [1, 2, 3]
+    for area in ["IT", "AU"]:
+        for year in ["2012", "2013", "2014"]:
+            assert subset.data(area=area, year=year) == oecd.data(area=area, year=year)._replace(
+                idx=subset.data(area=area, year=year).idx)
+
+    # status of AU 2013 is 'e'
+    assert subset.status(area="AU", year="2013") == "e"
+
+
+def test_sel_is_a_view():
+    json_pathname = os.path.join(fixture_dir, "www.ssb.no", "29843.json")
+    dataset = jsonstat.from_file(json_pathname).dataset(0)
+
+    time = dataset.dimension("Tid")
+    subset = dataset.sel(Tid=slice(time.category(12).index, time.category(23).index))
+    values, axes = subset.to_ndarray()
+    all_values, all_axes = dataset.to_ndarray()
+    assert np.shares_memory(values, all_values)
+    assert len(axes[2].index) == 12
+    table = subset.to_table()
+    assert len(table) == len(subset) + 1
+
+
+def test_sel_unknown_category():
+    json_pathname = os.path.join(fixture_dir, "dataset", "three_dim_v1.json")
+    dataset = jsonstat.JsonStatDataSet()
+    dataset.from_file(json_pathname)
+
+    with pytest.raises(jsonstat.JsonStatException):
+        dataset.sel(one="one_3")
+    with pytest.raises(jsonstat.JsonStatException):
+        dataset.sel(one=["one_1", "one_1"])
+
+
+def test_to_table_status_column():
+    json_pathname = os.path.join(jsonstat._examples_dir, "www.json-stat.org", "oecd-canada.json")
+    collection = jsonstat.JsonStatCollection()
+    collection.from_file(json_pathname)
+    oecd = collection.dataset('oecd')
+
+    table = oecd.to_table(content="id", status_column="Status")
+    assert table[0] == ["concept", "area", "year", "Value", "Status"]
+    assert table[11] == ["UNR", "AU", "2013", 5.50415003, "e"]
+    assert table[1][4] is None
+
+    df = oecd.to_data_frame(content="id", status_column="Status")
+    assert df["Status"].dtype.name == "category"
+    assert (df["Status"] == "e").sum() == 72
+
+
+#
+# aggregate
+#
+@pytest.mark.parametrize("func", ["sum", "mean", "min", "max", "count"])
+def test_aggregate_same_as_groupby(func):
+    filename = os.path.join(jsonstat._examples_dir, "www.json-stat.org", "oecd.json")
+    dataset = jsonstat.from_file(filename)
+    expected = dataset.to_data_frame(content="id").groupby("area")["Value"].agg(func)
+
+    by_area = dataset.aggregate(by=["area"], func=func)
+    assert [dim.did for dim in by_area.dimensions()] == ["area"]
+    df = by_area.to_data_frame(content="id").set_index("area")
+    np.testing.assert_allclose(df["Value"].values, expected.reindex(df.index).values)
+
+
+@pytest.mark.parametrize("sparse", [False, True])
+def test_aggregate_nulls_and_status(sparse):
+    values = [1, 2, None, 4, None, None]
+    status = ["e", "e", "m", "c", "m", "m"]
+    json_data = {
+        "version": "2.0",
+        "class": "dataset",
+        "id": ["a", "b"],
+        "size": [2, 3],
+        "value": {str(i): v for i, v in enumerate(values)} if sparse else values,
+        "status": status,
+        "dimension": {
+            "a": {"category": {"index": ["p", "q"]}},
+            "b": {"category": {"index": ["x", "y", "z"]}}
+        }
+    }
+    dataset = jsonstat.from_json(json_data)
+
+    def data(d):
+        return [(d.data(i).value, d.data(i).status) for i in range(len(d))]
+
+    assert data(dataset.aggregate("a")) == [(3, "e"), (4, "c")]
+    assert data(dataset.aggregate("a", skipna=False)) == [(None, None), (None, None)]
+    assert data(dataset.aggregate("b", func="mean")) == [(2.5, None), (2, "e"), (None, "m")]
+    assert data(dataset.aggregate("a", skip_status=["c"])) == [(3, "e"), (None, None)]
+    assert data(dataset.aggregate([], func="count")) == [(3, None)]
+
+
+@pytest.mark.parametrize("sparse", [False, True])
+def test_aggregate_groups_without_values(sparse):
+    # only the first row has values, with sparse values the second row has no stored cells
+    values = [1, 2, 3, None, None, None]
+    json_data = {
+        "version": "2.0",
+        "class": "dataset",
+        "id": ["a", "b"],
+        "size": [2, 3],
+        "value": {str(i): v for i, v in enumerate(values) if v is not None} if sparse else values,
+        "dimension": {
+            "a": {"category": {"index": ["p", "q"]}},
+            "b": {"category": {"index": ["x", "y", "z"]}}
+        }
+    }
+    dataset = jsonstat.from_json(json_data)
+    assert [dataset.aggregate("a", func="count").value(i) for i in range(2)] == [3, 0]
+    assert [dataset.aggregate("a", func="sum").value(i) for i in range(2)] == [6, None]
+
+
+@pytest.mark.parametrize("sparse", [False, True])
+def test_aggregate_keeps_order_of_by(sparse):
+    filename = os.path.join(jsonstat._examples_dir, "www.json-stat.org", "oecd.json")
+    with open(filename) as f:
+        json_data = json.load(f)
+    if sparse:
+        json_data["value"] = {str(i): v for i, v in enumerate(json_data["value"]) if i % 3}
+    dataset = jsonstat.from_json(json_data)
+    by_area_year = dataset.aggregate(by=["area", "year"])
+    by_year_area = dataset.aggregate(by=["year", "area"])
+    assert [dim.did for dim in by_year_area.dimensions()] == ["year", "area"]
+    for area in ["AU", "IT"]:
+        for year in ["2003", "2014"]:
+            assert by_year_area.value(year=year, area=area) == by_area_year.value(area=area, year=year)
+
+
+def test_aggregate_errors():
+    filename = os.path.join(jsonstat._examples_dir, "www.json-stat.org", "oecd.json")
+    dataset = jsonstat.from_file(filename)
+    with pytest.raises(jsonstat.JsonStatException):
+        dataset.aggregate(by=["area"], func="median")
+    with pytest.raises(jsonstat.JsonStatException):
+        dataset.aggregate(by=["area", "area"])
@@ -4,6 +4,7 @@
 # See LICENSE file
 
 # stdlib
+import json
 import sys
 import re
 
@@ -130,6 +131,41 @@ def test_exception_mismatch_index_and_label(json_str_label_and_index):
     assert str(excinfo.value) == expected
 
 
+def test_lazy_categories(json_str_only_index, json_str_label_and_index):
+    dim = jsonstat.JsonStatDimension("year", 12, 0, None)
+    dim.from_json(json.loads(json_str_only_index), lazy=True)
+    assert len(dim) == 12
+    assert dim.label == "2003-2014"
+    assert dim.category("2013").pos == 10
+
+    # size is checked when parsing, categories on first use
+    dim = jsonstat.JsonStatDimension("year", 10, 0, None)
+    with pytest.raises(jsonstat.JsonStatMalformedJson):
+        dim.from_json(json.loads(json_str_only_index), lazy=True)
+
+    dim = jsonstat.JsonStatDimension("year", 4, 0, None)
+    dim.from_json(json.loads(json_str_label_and_index), lazy=True)
+    with pytest.raises(jsonstat.JsonStatMalformedJson):
+        dim.category("CA")
+
+
+def test_category_tables():
+    json_data = {"category": {"index": ["A", "B", "C"], "label": {"A": "B", "C": "Canada"}}}
+    dim = jsonstat.JsonStatDimension("dim", 3, 0, None).from_json(json_data)
+    assert not hasattr(dim, "__dict__")
+
+    # categories are created on demand, indexes take precedence over labels
+    assert dim.category("B") == jsonstat.dimension.JsonStatCategory(label=None, index="B", pos=1)
+    assert dim.category("Canada") == jsonstat.dimension.JsonStatCategory(label="Canada", index="C", pos=2)
+    assert dim._lbl2pos("B") == 0
+
+    # exports are read only arrays
+    assert dim._pos2idx_array().tolist() == ["A", "B", "C"]
+    assert dim._pos2lbl_array().tolist() == ["B", "B", "Canada"]
+    with pytest.raises(ValueError):
+        dim._pos2idx_array()[0] = "Z"
+
+
 #
 # queries methods
 #  JsonstatDimension.category()
@@ -4,6 +4,7 @@
 # See LICENSE file
 
 # stdlib
+import gzip
 
 # external modules
 import pytest
@@ -39,3 +40,13 @@ def test_downloader_with_no_cache_dir():
         response = d.download(uri)
 
     assert body == response
+
+
+def test_downloader_reads_compressed_cache(tmpdir):
+    uri = 'http://json-stat.org/samples/oecd-canada.json'
+    body = 'This is a test'
+
+    with gzip.open(str(tmpdir.join("oecd-canada.json")), "wt") as f:
+        f.write(body)
+    d = jsonstat.Downloader(cache_dir=str(tmpdir))
+    assert body == d.download(uri, "oecd-canada.json")
@@ -350,3 +350,19 @@ def test_validate():
                     assert jsonstat.validate(json_string), "validating {}".format(jsonstat_file)
                 except jsonstat.JsonStatException:
                     pass
+
+
+def test_validation_errors_fail_fast():
+    jsonstat_data = {
+        "version": "2.0",
+        "class": "dataset",
+        "id": "area",
+        "size": ["2"],
+        "value": [1, 2],
+        "dimension": {}
+    }
+    assert not jsonstat.validate(jsonstat_data)
+    assert len(jsonstat.validation_errors(jsonstat_data, fail_fast=True)) == 1
+    assert len(jsonstat.validation_errors(jsonstat_data)) >= 1
+    # json strings are validated too
+    assert not jsonstat.validate(json.dumps(jsonstat_data))
@@ -4,6 +4,9 @@
 # See LICENSE file
 
 # stdlib
+import bz2
+import gzip
+import lzma
 import os
 from os.path import isfile, join
 
@@ -91,3 +94,74 @@ def test_parsing_json_stat_org_files():
             ret = jsonstat.from_file(jsonstat_file)
             msg = "parsing {}".format(jsonstat_file)
             assert ret is not None, msg
+
+
+@pytest.mark.parametrize("backend", jsonstat.available_json_backends())
+def test_from_string_memoryview(backend):
+    json_pathname = os.path.join(jsonstat._examples_dir, "www.json-stat.org", "oecd-canada-col.json")
+    previous = jsonstat.json_backend()
+    jsonstat.set_json_backend(backend)
+    try:
+        with jsonstat.utility.map_file(json_pathname) as buf, memoryview(buf) as json_string:
+            collection = jsonstat.from_string(json_string)
+    finally:
+        jsonstat.set_json_backend(previous)
+    assert collection.dataset(0).value(area="AU", year="2003") == 5.943826289
+
+
+def test_from_file_empty(tmpdir):
+    json_pathname = str(tmpdir.join("empty.json"))
+    open(json_pathname, "w").close()
+    with pytest.raises(jsonstat.JsonStatException):
+        jsonstat.from_file(json_pathname)
+
+
+@pytest.mark.parametrize("streaming", [False, True])
+@pytest.mark.parametrize("open_function", [gzip.open, bz2.open, lzma.open])
+def test_from_file_compressed(tmpdir, open_function, streaming):
+    json_pathname = os.path.join(jsonstat._examples_dir, "www.json-stat.org", "oecd-canada-col.json")
+    # the extension is not used to detect the compression
+    compressed_pathname = str(tmpdir.join("oecd-canada-col.json"))
+    with open(json_pathname, "rb") as f, open_function(compressed_pathname, "wb") as out:
+        out.write(f.read())
+
+    collection = jsonstat.from_file(compressed_pathname, streaming=streaming)
+    assert collection.dataset(0).value(area="AU", year="2003") == 5.943826289
+
+
+def test_from_file_compressed_truncated(tmpdir, monkeypatch):
+    json_pathname = os.path.join(jsonstat._examples_dir, "www.json-stat.org", "oecd-canada-col.json")
+    with open(json_pathname, "rb") as f:
+        compressed = gzip.compress(f.read())
+    compressed_pathname = str(tmpdir.join("truncated.json.gz"))
+    with open(compressed_pathname, "wb") as f:
+        f.write(compressed[:len(compressed) // 2])
+
+    # the temporary file of the decompressed json is removed also on errors
+    decompress_dir = tmpdir.mkdir("decompress")
+    monkeypatch.setattr(jsonstat.utility, "DECOMPRESS_DIR", str(decompress_dir))
+    with pytest.raises(EOFError):
+        jsonstat.from_file(compressed_pathname)
+    assert decompress_dir.listdir() == []
+
+
+@pytest.mark.parametrize("workers", [None, 2])
+def test_from_files(tmpdir, workers):
+    examples_dir = os.path.join(jsonstat._examples_dir, "www.json-stat.org")
+    invalid_pathname = str(tmpdir.join("invalid.json"))
+    with open(invalid_pathname, "w") as f:
+        f.write("{")
+    paths = [os.path.join(examples_dir, "oecd-canada-col.json"),
+             invalid_pathname,
+             os.path.join(examples_dir, "oecd.json"),
+             str(tmpdir.join("missing.json")),
+             os.path.join(examples_dir, "collection.json")]
+
+    results = jsonstat.from_files(paths, workers=workers)
+    assert list(results) == paths
+    assert results[paths[0]].dataset(0).value(area="AU", year="2003") == 5.943826289
+    assert isinstance(results[paths[1]], jsonstat.JsonStatException)
+    assert results[paths[2]].value(area="AU", year="2003") == 5.943826289
+    assert isinstance(results[paths[3]], OSError)
+    # collection of links to datasets
+    assert str(results[paths[4]]) == str(jsonstat.from_file(paths[4]))
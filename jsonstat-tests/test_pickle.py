@@ -0,0 +1,73 @@
+# -*- coding: utf-8 -*-
+# This file is part of https://github.com/26fe/jsonstat.py
+# Copyright (C) 2016-2021 gf <gf@26fe.com>
+# See LICENSE file
+
+# stdlib
+import os
+import pickle
+
+# external modules
+import pytest
+
+# jsonstat
+import jsonstat
+
+
+@pytest.mark.parametrize("protocol", [2, pickle.HIGHEST_PROTOCOL])
+def test_pickle_collection(protocol):
+    filename = os.path.join(jsonstat._examples_dir, "www.json-stat.org", "oecd-canada.json")
+    collection = jsonstat.from_file(filename)
+    o = pickle.loads(pickle.dumps(collection, protocol=protocol))
+    assert len(o) == 2
+    for name in ["oecd", "canada"]:
+        assert o.dataset(name).to_table(status_column="status") == \
+            collection.dataset(name).to_table(status_column="status")
+
+
+def test_pickle_sparse_dataset():
+    json_data = {"version": "2.0", "class": "dataset", "id": ["one"], "size": [3],
+                 "value": {"0": 1, "2": 3}, "status": {"2": "e"},
+                 "dimension": {"one": {"category": {"index": ["x", "y", "z"]}}}}
+    dataset = jsonstat.from_json(json_data)
+    o = pickle.loads(pickle.dumps(dataset))
+    assert o.to_table() == dataset.to_table()
+
+
+@pytest.mark.skipif(pickle.HIGHEST_PROTOCOL < 5, reason="requires pickle protocol 5")
+def test_pickle_dataset_out_of_band_buffers():
+    filename = os.path.join(jsonstat._examples_dir, "www.json-stat.org", "oecd.json")
+    dataset = jsonstat.from_file(filename)
+    buffers = []
+    data = pickle.dumps(dataset, protocol=5, buffer_callback=buffers.append)
+    assert len(buffers) > 0
+    o = pickle.loads(data, buffers=buffers)
+    assert o.data(area="IT", year="2014") == dataset.data(area="IT", year="2014")
+
+
+def test_pickle_dimension():
+    json_data = {"label": "dim", "category": {"index": ["A", "B", "C"], "label": {"A": "a", "C": "c\0c"}}}
+    dim = jsonstat.JsonStatDimension("dim", 3, 0, None).from_json(json_data)
+    o = pickle.loads(pickle.dumps(dim))
+    assert o.label == "dim"
+    assert o._pos2lbl_array().tolist() == ["a", "B", "c\0c"]
+    assert o.category("B").pos == 1
+    assert o.category("a").index == "A"
+
+    o = pickle.loads(pickle.dumps(jsonstat.JsonStatDimension("empty")))
+    assert o.did == "empty"
+
+
+def test_pickle_collection_of_links():
+    # datasets with only an href keep label and href, they are not initialized
+    filename = os.path.join(jsonstat._examples_dir, "www.json-stat.org", "collection.json")
+    collection = jsonstat.from_file(filename)
+    o = pickle.loads(pickle.dumps(collection))
+    assert str(o) == str(collection)
+    dataset = pickle.loads(pickle.dumps(collection.dataset(0)))
+    assert dataset.label == "Unemployment rate in the OECD countries 2003-2014"
+    with pytest.raises(jsonstat.JsonStatException):
+        dataset.data(0)
+
+    # the href is kept, see JsonStatDataSet.save
+    assert pickle.loads(pickle.dumps(dataset))._to_snapshot(None)["href"] == "http://json-stat.org/samples/oecd.json"
@@ -0,0 +1,100 @@
+# -*- coding: utf-8 -*-
+# This file is part of https://github.com/26fe/jsonstat.py
+# Copyright (C) 2016-2021 gf <gf@26fe.com>
+# See LICENSE file
+
+# stdlib
+import gc
+import multiprocessing
+import os
+import subprocess
+import sys
+
+# external modules
+import pytest
+
+# jsonstat
+import jsonstat
+
+json_pathname = os.path.join(jsonstat._examples_dir, "www.json-stat.org", "oecd-canada-col.json")
+
+
+def _value_in_other_process(name, queue):
+    dataset = jsonstat.attach_shared(name).dataset(0)
+    queue.put(dataset.value(area="AU", year="2003"))
+
+
+def test_collection_shared_with_other_process():
+    collection = jsonstat.from_file(json_pathname)
+    with collection.to_shared() as segment:
+        queue = multiprocessing.Queue()
+        process = multiprocessing.Process(target=_value_in_other_process, args=(segment.name, queue))
+        process.start()
+        value = queue.get(timeout=60)
+        process.join()
+        assert value == 5.943826289
+
+        # the segment is not removed by the exit of the other process
+        shared = jsonstat.attach_shared(segment.name)
+        assert shared.dataset(1).to_table() == collection.dataset(1).to_table()
+        del shared
+        gc.collect()
+        jsonstat.detach_shared(segment.name)
+
+
+_OWNER_SCRIPT = """
+import multiprocessing
+import sys
+import jsonstat
+
+
+def child(name, queue):
+    shared = jsonstat.attach_shared(name)
+    queue.put(shared.dataset(0).value(area="AU", year="2003"))
+
+
+if __name__ == "__main__":
+    ctx = multiprocessing.get_context(sys.argv[2])
+    with jsonstat.from_file(sys.argv[1]).to_shared() as segment:
+        queue = ctx.Queue()
+        process = ctx.Process(target=child, args=(segment.name, queue))
+        process.start()
+        print(queue.get(timeout=60))
+        process.join()
+"""
+
+
+@pytest.mark.parametrize("method", [m for m in ["fork", "spawn"] if m in multiprocessing.get_all_start_methods()])
+def test_segment_tracked_by_the_owner(tmpdir, method):
+    # a child process shares the resource tracker of the owner, attaching the segment
+    # must not remove the registration of the owner (the tracker reports a KeyError on unlink)
+    script = str(tmpdir.join("owner.py"))
+    with open(script, "w") as f:
+        f.write(_OWNER_SCRIPT)
+    env = dict(os.environ, PYTHONPATH=os.path.dirname(os.path.dirname(jsonstat.__file__)))
+    result = subprocess.run([sys.executable, script, json_pathname, method], env=env,
+                            stdout=subprocess.PIPE, stderr=subprocess.PIPE, timeout=120)
+    assert result.returncode == 0, result.stderr.decode()
+    assert result.stdout.decode().strip() == "5.943826289"
+    assert result.stderr.decode() == ""
+
+
+def test_shared_lifecycle():
+    dataset = jsonstat.from_file(json_pathname).dataset(0)
+    segment = dataset.to_shared()
+    shared = jsonstat.attach_shared(segment.name)
+    assert shared.to_ndarray()[0].flags.writeable is False
+
+    with pytest.raises(jsonstat.JsonStatException):
+        # the segment is still used
+        jsonstat.detach_shared(segment.name)
+
+    segment.unlink()
+    # attached datasets are still usable after the segment is removed
+    assert shared.value(area="AU", year="2003") == 5.943826289
+    del shared
+    gc.collect()
+    jsonstat.detach_shared(segment.name)
+
+    with pytest.raises(jsonstat.JsonStatException):
+        jsonstat.attach_shared(segment.name)
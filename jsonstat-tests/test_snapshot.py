@@ -0,0 +1,89 @@
+# -*- coding: utf-8 -*-
+# This file is part of https://github.com/26fe/jsonstat.py
+# Copyright (C) 2016-2021 gf <gf@26fe.com>
+# See LICENSE file
+
+# stdlib
+import os
+
+# external modules
+import pytest
+
+# jsonstat
+import jsonstat
+
+fixture_dir = os.path.join(os.path.dirname(__file__), "fixtures")
+
+
+@pytest.mark.parametrize("mmap", [True, False])
+def test_dataset_snapshot(tmpdir, mmap):
+    json_pathname = os.path.join(fixture_dir, "www.ssb.no", "29843.json")
+    dataset = jsonstat.from_file(json_pathname).dataset(0)
+    snapshot = str(tmpdir.join("29843.snapshot"))
+    dataset.save(snapshot)
+
+    loaded = jsonstat.load_snapshot(snapshot, mmap=mmap)
+    assert isinstance(loaded, jsonstat.JsonStatDataSet)
+    assert str(loaded) == str(dataset)
+    assert loaded.to_table() == dataset.to_table()
+    values, axes = loaded.to_ndarray()
+    assert not values.flags.writeable
+
+
+def test_collection_snapshot(tmpdir):
+    json_pathname = os.path.join(jsonstat._examples_dir, "www.json-stat.org", "oecd-canada.json")
+    collection = jsonstat.from_file(json_pathname)
+    snapshot = str(tmpdir.join("oecd-canada.snapshot"))
+    collection.save(snapshot)
+
+    loaded = jsonstat.load_snapshot(snapshot)
+    assert isinstance(loaded, jsonstat.JsonStatCollection)
+    assert len(loaded) == 2
+    oecd = loaded.dataset("oecd")
+    assert oecd.data(area="AU", year="2013") == collection.dataset("oecd").data(area="AU", year="2013")
+    assert oecd.status_codes()[0] == [None, "e"]
+    assert loaded.dataset(1).to_table() == collection.dataset(1).to_table()
+
+
+def test_snapshot_of_subset_and_sparse_values(tmpdir):
+    json_pathname = os.path.join(jsonstat._examples_dir, "www.json-stat.org", "oecd-canada-col.json")
+    dataset = jsonstat.from_file(json_pathname).dataset(0)
+    subset = dataset.sel(area=["IT", "AU"], year=slice("2012", "2014"))
+    snapshot = str(tmpdir.join("subset.snapshot"))
+    subset.save(snapshot)
+    assert jsonstat.load_snapshot(snapshot).to_table(status_column="Status") == \
+        subset.to_table(status_column="Status")
+
+    sparse = jsonstat.from_string('''{
+        "version": "2.0", "class": "dataset",
+        "value": {"5": 15, "0": 10}, "status": {"5": "p"},
+        "id": ["year", "area"], "size": [3, 2],
+        "dimension": {
+            "year": {"category": {"index": ["2012", "2013", "2014"]}},
+            "area": {"category": {"index": ["AU", "IT"]}}
+        }}''')
+    sparse.save(snapshot)
+    loaded = jsonstat.load_snapshot(snapshot)
+    assert loaded.data(year="2014", area="IT") == jsonstat.JsonStatValue(5, 15, "p")
+    assert loaded.to_table() == sparse.to_table()
+
+
+def test_load_snapshot_not_a_snapshot():
+    json_pathname = os.path.join(jsonstat._examples_dir, "www.json-stat.org", "oecd-canada-col.json")
+    with pytest.raises(jsonstat.JsonStatException):
+        jsonstat.load_snapshot(json_pathname)
+
+
+def test_collection_of_links_snapshot(tmpdir):
+    # datasets with only an href are saved as links and loaded not initialized
+    json_pathname = os.path.join(jsonstat._examples_dir, "www.json-stat.org", "collection.json")
+    collection = jsonstat.from_file(json_pathname)
+    snapshot = str(tmpdir.join("collection.snapshot"))
+    collection.save(snapshot)
+
+    loaded = jsonstat.load_snapshot(snapshot)
+    assert len(loaded) == len(collection)
+    assert str(loaded) == str(collection)
+    assert loaded.dataset(0).label == "Unemployment rate in the OECD countries 2003-2014"
+    with pytest.raises(jsonstat.JsonStatException):
+        loaded.dataset(0).data(0)
@@ -0,0 +1,133 @@
+# -*- coding: utf-8 -*-
+# This file is part of https://github.com/26fe/jsonstat.py
+# Copyright (C) 2016-2021 gf <gf@26fe.com>
+# See LICENSE file
+
+# stdlib
+import gzip
+import os
+
+# external modules
+import pytest
+
+# jsonstat
+import jsonstat
+import jsonstat.streaming
+
+fixture_dir = os.path.join(os.path.dirname(__file__), "fixtures")
+
+
+@pytest.mark.parametrize("filename", [
+    os.path.join(jsonstat._examples_dir, "www.json-stat.org", "oecd-canada.json"),
+    os.path.join(jsonstat._examples_dir, "www.json-stat.org", "oecd-canada-col.json"),
+    os.path.join(jsonstat._examples_dir, "www.json-stat.org", "order.json"),
+    os.path.join(fixture_dir, "www.ssb.no", "29843.json"),
+])
+def test_streaming_same_as_from_string(filename, monkeypatch):
+    # small chunks to decode arrays in many pieces
+    monkeypatch.setattr(jsonstat.streaming, "CHUNK_SIZE", 16)
+    expected = jsonstat.from_file(filename, streaming=False)
+    o = jsonstat.from_file(filename, streaming=True)
+    if isinstance(o, jsonstat.JsonStatCollection):
+        pairs = [(expected.dataset(i), o.dataset(i)) for i in range(len(o))]
+    else:
+        pairs = [(expected, o)]
+    for e, d in pairs:
+        assert e.to_table(status_column="Status") == d.to_table(status_column="Status")
+
+
+def test_streaming_strings_and_escapes(monkeypatch):
+    monkeypatch.setattr(jsonstat.streaming, "CHUNK_SIZE", 3)
+    json_data = jsonstat.streaming.load_buffer(
+        br'{"value": [1, "a,b]", null, 2.5], "status": ["x\"],", null, "e", "e"],'
+        br' "extension": {"value": [3]}}')
+
+    value = json_data["value"]
+    assert value.array.tolist() == [1, "a,b]", None, 2.5]
+    assert value.mask.tolist() == [True, True, False, True]
+    status = json_data["status"]
+    assert status.table == [None, 'x"],', "e"]
+    assert status.codes.tolist() == [1, 0, 2, 2]
+    # arrays not belonging to a dataset are decoded as usual
+    assert json_data["extension"]["value"] == [3]
+
+
+def test_use_streaming_measures_decompressed_size(tmpdir, monkeypatch):
+    json_pathname = os.path.join(jsonstat._examples_dir, "www.json-stat.org", "oecd.json")
+    compressed_pathname = str(tmpdir.join("oecd.json.gz"))
+    with open(json_pathname, "rb") as f, gzip.open(compressed_pathname, "wb") as out:
+        out.write(f.read())
+    threshold = os.path.getsize(compressed_pathname) + 1
+    assert threshold < os.path.getsize(json_pathname)
+    monkeypatch.setattr(jsonstat.streaming, "STREAMING_THRESHOLD", threshold)
+
+    with jsonstat.utility.map_file(compressed_pathname) as buf:
+        assert jsonstat.streaming.use_streaming(buf)
+
+
+def test_streaming_dataset_with_dtype():
+    json_pathname = os.path.join(fixture_dir, "dataset", "three_dim_v1.json")
+    dataset = jsonstat.JsonStatDataSet(dtype="float32")
+    dataset.from_file(json_pathname, streaming=True)
+    assert dataset.to_ndarray()[0].dtype == "float32"
+    assert dataset.data(one="one_2", two="two_2", three="three_2").value == 222
+
+
+def test_streaming_invalid_json():
+    with pytest.raises(jsonstat.JsonStatException):
+        jsonstat.streaming.load_buffer(b'{"value": [1, 2}')
+
+
+def test_from_file_select(monkeypatch):
+    monkeypatch.setattr(jsonstat.streaming, "CHUNK_SIZE", 16)
+    filename = os.path.join(jsonstat._examples_dir, "www.json-stat.org", "oecd.json")
+    select = {"area": ["IT", "FR"], "year": slice("2005", "2010")}
+    expected = jsonstat.from_file(filename).sel(**select)
+
+    dataset = jsonstat.from_file(filename, select=select)
+    assert len(dataset) == 12
+    assert len(dataset.dimension("area")) == 2
+    assert dataset.to_table(status_column="Status") == expected.to_table(status_column="Status")
+
+
+def test_deferred_array_load_selected_items(monkeypatch):
+    monkeypatch.setattr(jsonstat.streaming, "CHUNK_SIZE", 3)
+    json_data = jsonstat.streaming.load_buffer(
+        b'{"value": [0, 1, 2, 3, 4, 5, 6], "status": ["a", "b", "c", "d", "e", "f", "g"]}', deferred=True)
+    assert len(json_data["value"]) == 7
+    assert json_data["value"].load([5, 1, 6]).array.tolist() == [5, 1, 6]
+    status = json_data["status"].load([5, 1])
+    assert [status.get(i) for i in range(2)] == ["f", "b"]
+    with pytest.raises(jsonstat.JsonStatMalformedJson):
+        json_data["value"].load([7])
+
+
+def test_streaming_keeps_ints_and_floats(monkeypatch):
+    monkeypatch.setattr(jsonstat.streaming, "CHUNK_SIZE", 3)
+    value = jsonstat.streaming.load_buffer(b'{"value": [1, 2, null, 3, 4.0, 5, null]}')["value"]
+    got = [value.get(i) for i in range(7)]
+    assert [(v, type(v)) for v in got] == [(v, type(v)) for v in [1, 2, None, 3, 4.0, 5, None]]
+
+
+@pytest.mark.parametrize("content", [
+    '{"version": "2.0", "class": "dataset", "id": ["a", "b"], "size": [2, 2],'
+    ' "value": ["x,y", 1, "z,w", 2], "status": ["e", "f", "g", "h"],',
+    '{"ds": {"value": ["x,y", 1, "z,w", 2], "status": ["e", "f", "g", "h"],'
+    ' "dimension": {"id": ["a", "b"], "size": [2, 2],',
+], ids=["v2", "v1"])
+def test_from_file_select_strings_with_commas(content, tmp_path):
+    # the length of a not decoded array of strings containing commas is only an upper bound
+    dimension = ('"a": {"category": {"index": ["a1", "a2"]}},'
+                 ' "b": {"category": {"index": ["b1", "b2"]}}')
+    if content.startswith('{"ds"'):
+        content += dimension + '}}}'
+    else:
+        content += '"dimension": {' + dimension + '}}'
+    filename = str(tmp_path / "commas.json")
+    with open(filename, "w") as f:
+        f.write(content)
+
+    o = jsonstat.from_file(filename, select={"b": ["b1"]})
+    dataset = o.dataset(0) if isinstance(o, jsonstat.JsonStatCollection) else o
+    table = dataset.to_table(status_column="Status")
+    assert table[1:] == [["a1", "b1", "x,y", "e"], ["a2", "b1", "z,w", "g"]]
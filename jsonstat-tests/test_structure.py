@@ -0,0 +1,136 @@
+# -*- coding: utf-8 -*-
+# This file is part of https://github.com/26fe/jsonstat.py
+# Copyright (C) 2016-2021 gf <gf@26fe.com>
+# See LICENSE file
+
+# stdlib
+import copy
+import gzip
+import json
+import os
+
+# external modules
+import pytest
+from click.testing import CliRunner
+
+# jsonstat
+import jsonstat
+from jsonstat.cli.cli_jsonstat import cli
+
+fixture_dir = os.path.join(os.path.dirname(__file__), "fixtures")
+
+json_dataset = {
+    "version": "2.0",
+    "class": "dataset",
+    "label": "ds",
+    "id": ["a", "b"],
+    "size": [2, 3],
+    "value": [1, 2.5, None, "x", 5, 6],
+    "status": ["e", None, "e", "p", "p", "p"],
+    "dimension": {
+        "a": {"category": {"index": {"p": 0, "q": 1}, "label": {"p": "P", "q": "Q"}}},
+        "b": {"category": {"index": ["x", "y", "z"]}}
+    }
+}
+
+
+@pytest.mark.parametrize("filename", [
+    os.path.join(jsonstat._examples_dir, "www.json-stat.org", "oecd-canada.json"),
+    os.path.join(jsonstat._examples_dir, "www.json-stat.org", "oecd-canada-col.json"),
+    os.path.join(jsonstat._examples_dir, "www.json-stat.org", "galicia.json"),
+    os.path.join(fixture_dir, "www.ssb.no", "29843.json"),
+])
+def test_structure_of_examples(filename):
+    with open(filename, "rb") as f:
+        json_data = jsonstat.backend.loads(f.read())
+    assert jsonstat.structure_errors(json_data) == []
+    # also arrays decoded by jsonstat.streaming
+    assert jsonstat.structure_errors(jsonstat.streaming.load_file(filename)) == []
+
+
+@pytest.mark.parametrize("change, error", [
+    (lambda d: d["size"].append(1), "dataset_id is different of dataset_size"),
+    (lambda d: d["value"].append(7), "size 7 is different from calculate size 6 by dimension"),
+    (lambda d: d["value"].__setitem__(1, True), "item 1 of 'value' has an invalid type (True)"),
+    (lambda d: d["status"].__setitem__(0, 1), "item 0 of 'status' has an invalid type (1)"),
+    (lambda d: d.__setitem__("status", ["e", "e"]), "incorrect size of status fields"),
+    (lambda d: d.__setitem__("value", {"0": 1, "6": 2}), "index 6 of 'value' is out of calculate size 6 by dimension"),
+    (lambda d: d["dimension"].pop("b"), "malformed json: missing key b in dimension"),
+    (lambda d: d["dimension"]["a"]["category"]["index"].update(q=0), "dimension 'a': hole in index at position 1"),
+    (lambda d: d["dimension"]["a"]["category"]["label"].update(r="R"),
+     "dimension 'a': label 'R' is associated with index 'r' that not exists!"),
+    (lambda d: d["dimension"]["b"]["category"]["index"].pop(),
+     "dimension 'b': malformed json: number of indexes 2 not match with size 3"),
+])
+def test_structure_errors(change, error):
+    assert jsonstat.structure_errors(json_dataset) == []
+    json_data = copy.deepcopy(json_dataset)
+    change(json_data)
+    assert jsonstat.structure_errors(json_data) == ["dataset 'ds': " + error]
+
+
+def test_structure_fail_fast():
+    json_data = copy.deepcopy(json_dataset)
+    json_data["value"].append(7)
+    json_data["status"][0] = 1
+    assert len(jsonstat.structure_errors(json_data)) == 2
+    assert len(jsonstat.structure_errors(json_data, fail_fast=True)) == 1
+
+
+def test_from_json_check():
+    json_data = copy.deepcopy(json_dataset)
+    json_data["dimension"]["a"]["category"]["index"]["q"] = 0
+    # without check the hole in the categories is found on first access
+    dataset = jsonstat.from_json(json_data)
+    with pytest.raises(jsonstat.JsonStatMalformedJson):
+        dataset.dimension("a").category(0)
+    with pytest.raises(jsonstat.JsonStatMalformedJson):
+        jsonstat.from_json(json_data, check=True)
+
+
+def test_from_file_select_check(tmpdir):
+    # arrays are not decoded before the selection, their size is checked by their length
+    filename = str(tmpdir.join("ds.json"))
+    json_data = copy.deepcopy(json_dataset)
+    json_data["value"][3] = "x,y"
+    with open(filename, "w") as f:
+        json.dump(json_data, f)
+    dataset = jsonstat.from_file(filename, select={"a": ["q"]}, check=True)
+    assert dataset.value(a="q", b="x") == "x,y"
+
+    json_data["value"].append(7)
+    with open(filename, "w") as f:
+        json.dump(json_data, f)
+    with pytest.raises(jsonstat.JsonStatMalformedJson, match="size 7 is different from calculate size 6"):
+        jsonstat.from_file(filename, select={"a": ["q"]}, check=True)
+
+
+def test_cli_validate_streamed(tmpdir):
+    runner = CliRunner()
+    filename = str(tmpdir.join("ds.json.gz"))
+    with gzip.open(filename, "wt") as f:
+        json.dump(json_dataset, f)
+    result = runner.invoke(cli, ["validate", filename])
+    assert result.exit_code == 0, result.output
+
+    json_data = copy.deepcopy(json_dataset)
+    json_data["value"].append(7)
+    json_data["status"][0] = 1
+    with gzip.open(filename, "wt") as f:
+        json.dump(json_data, f)
+    result = runner.invoke(cli, ["validate", filename])
+    assert result.exit_code == 1
+    assert "  dataset 'ds': size 7 is different from calculate size 6 by dimension\n" in result.output
+    assert "  dataset 'ds': item 0 of 'status' has an invalid type (1)\n" in result.output
+
+
+def test_cli_validate():
+    runner = CliRunner()
+    filename = os.path.join(jsonstat._examples_dir, "www.json-stat.org", "oecd.json")
+    result = runner.invoke(cli, ["validate", "--no-schema", filename])
+    assert result.exit_code == 0
+
+    filename = os.path.join(fixture_dir, "www.unece.org", "cso_ie-NQQ25.json")
+    result = runner.invoke(cli, ["validate", filename])
+    assert result.exit_code == 1
+    assert "  invalid json\n" in result.output
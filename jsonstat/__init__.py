@@ -14,6 +14,9 @@ from jsonstat.dataset import JsonStatDataSet
 from jsonstat.collection import JsonStatCollection
 
 from jsonstat.downloader import Downloader
+from jsonstat.backend import json_backend
+from jsonstat.backend import set_json_backend
+from jsonstat.backend import available_json_backends
 from jsonstat.parse_functions import *
 
 import os
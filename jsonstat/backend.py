@@ -0,0 +1,107 @@
+# -*- coding: utf-8 -*-
+# This file is part of https://github.com/26fe/jsonstat.py
+# Copyright (C) 2016-2021 gf <gf@26fe.com>
+# See LICENSE file
+
+# json decoder used to parse jsonstat.
+#
+# The fastest installed decoder is used (orjson, ujson, simdjson),
+# the json module of the standard library is the fallback.
+# All the decoders accept str and bytes, bytes are not decoded to str before parsing.
+#
+# The decoders do not accept the same inputs as the json module:
+#   - NaN and Infinity literals are rejected by orjson, such inputs are decoded
+#     again by the json module
+#   - integers beyond 64 bits are decoded as floats by orjson (not as int)
+
+# stdlib
+import importlib
+import json
+
+# jsonstat
+from jsonstat.exceptions import JsonStatException
+
+# backends in order of preference
+_BACKENDS = ["orjson", "ujson", "simdjson", "json"]
+
+# backends decoding directly buffers (memoryview), the others need a bytes copy
+_BUFFER_BACKENDS = {"orjson"}
+
+__backend__ = None
+__loads__ = None
+
+
+def _import_loads(name):
+    """returns the loads function of the backend name or None if it is not installed"""
+    if name == "json":
+        return json.loads
+    try:
+        module = importlib.import_module(name)
+    except ImportError:
+        return None
+    return getattr(module, "loads", None)
+
+
+def available_json_backends():
+    """Returns the names of the installed json decoders, the fastest first
+
+    >>> import jsonstat
+    >>> "json" in jsonstat.available_json_backends()
+    True
+    """
+    return [name for name in _BACKENDS if _import_loads(name) is not None]
+
+
+def set_json_backend(name=None):
+    """Selects the json decoder used by all the from_* functions
+
+    :param name: "orjson", "ujson", "simdjson" or "json" (standard library),
+        None selects the fastest installed decoder
+    :returns: the name of the selected decoder
+    """
+    global __backend__, __loads__
+    if name is None:
+        name = available_json_backends()[0]
+    loads = _import_loads(name) if name in _BACKENDS else None
+    if loads is None:
+        msg = "json backend '{}' is not available, use one of {}".format(name, available_json_backends())
+        raise JsonStatException(msg)
+    __backend__ = name
+    __loads__ = loads
+    return name
+
+
+def json_backend():
+    """Returns the name of the json decoder in use
+
+    >>> import jsonstat
+    >>> jsonstat.json_backend() in jsonstat.available_json_backends()
+    True
+    """
+    if __backend__ is None:
+        set_json_backend()
+    return __backend__
+
+
+def loads(json_string):
+    """Decodes a json with the selected backend
+
+    objects are decoded as dict (insertion ordered).
+
+    :param json_string: str, bytes or memoryview (f.e. on a memory mapped file) containing a json
+    :returns: data structure (dictionary) representing the json
+    :raises ValueError: if json_string is not a valid json
+    """
+    if __loads__ is None:
+        set_json_backend()
+    if not isinstance(json_string, (str, bytes, bytearray)) and __backend__ not in _BUFFER_BACKENDS:
+        json_string = bytes(json_string)
+    try:
+        return __loads__(json_string)
+    except ValueError:
+        if __backend__ == "json":
+            raise
+    # f.e. NaN or Infinity, accepted by the json module
+    if not isinstance(json_string, (str, bytes, bytearray)):
+        json_string = bytes(json_string)
+    return json.loads(json_string)
@@ -52,17 +52,45 @@ def info(cache_dir, args):
 
 
 @cli.command()
+@click.option('--schema/--no-schema', default=True,
+              help='validate also against the jsonstat schema (slow for big files)')
 @click.argument('args', nargs=-1)  # help="file containing jsonstat to validate")
-def validate(args):
+def validate(schema, args):
+    valid = True
     for arg in args:
+        click.echo("validate '{}'".format(arg))
         if arg.startswith("http"):
             print("download '{}'".format(arg))
             contents = jsonstat.download(arg)
+            if isinstance(contents, str):
+                contents = contents.encode("utf-8")
+            errors = _validation_errors(contents, schema)
         else:
             print("reading '{}'".format(arg))
-            contents = open(arg).read()
-        click.echo("validate '{}'".format(arg))
-        jsonstat.validate(contents)
+            # the file is mapped, "value" and "status" arrays are decoded a chunk at a time
+            with jsonstat.utility.map_file(arg) as buf:
+                errors = _validation_errors(buf, schema)
+        for error in errors:
+            click.echo("  {}".format(error))
+        if errors:
+            valid = False
+    if not valid:
+        sys.exit(1)
+
+
+def _validation_errors(buf, schema):
+    """structural (and schema) errors of the json into buf (bytes or mmap)"""
+    try:
+        json_data = jsonstat.streaming.load_buffer(buf)
+    except jsonstat.JsonStatException:
+        return ["invalid json"]
+    errors = jsonstat.structure_errors(json_data)
+    if schema and not errors and "version" in json_data:
+        # the schema is checked on the json decoded without numpy arrays
+        with memoryview(buf) as json_string:
+            json_data = jsonstat.backend.loads(json_string)
+        errors = [e.message for e in jsonstat.validation_errors(json_data) or []]
+    return errors
 
 
 if __name__ == "__main__":
@@ -4,22 +4,54 @@
 # See LICENSE file
 
 # stdlib
-from collections import OrderedDict
+from concurrent.futures import ProcessPoolExecutor
 import dateutil.parser
-import json
 
 # packages
 import terminaltables
 
 # jsonstat
+from jsonstat.backend import loads as json_loads
 from jsonstat.dataset import JsonStatDataSet
+from jsonstat.shared import create_segment
+from jsonstat.snapshot import SnapshotReader
+from jsonstat.snapshot import SnapshotWriter
+from jsonstat.streaming import load_buffer
+from jsonstat.streaming import use_streaming
 from jsonstat.utility import lst2html
+from jsonstat.utility import map_file
+
+
+def _parse_dataset(name, json_data_ds, json_v2, select=None):
+    """parses the json of a dataset belonging to a collection"""
+    dataset = JsonStatDataSet(name)
+    if json_v2:
+        dataset._from_json_v2(json_data_ds, select)
+    else:
+        dataset.from_json(json_data_ds, select)
+    return dataset
+
+
+def _parse_dataset_to_bytes(args):
+    """parses a dataset into a worker process, it is sent back as snapshot
+
+    :param args: (name, json_data_ds, json_v2) see _parse_dataset
+    :returns: bytes of the snapshot of the dataset
+    """
+    writer = SnapshotWriter()
+    header = {"dataset": _parse_dataset(*args)._to_snapshot(writer)}
+    return writer.to_bytes(header)
+
+
+def _collection_from_pickle(state):
+    return JsonStatCollection()._from_pickle(state)
 
 
 class JsonStatCollection:
     """Represents a jsonstat collection.
 
-    It contains one or more datasets.
+    It contains one or more datasets. Datasets are parsed on first access
+    (see :py:meth:`dataset`), opening a collection only indexes their json.
 
     >>> import os, jsonstat  # doctest: +ELLIPSIS
     >>> filename = os.path.join(jsonstat._examples_dir, "www.json-stat.org", "oecd-canada-col.json")
@@ -42,8 +74,11 @@ class JsonStatCollection:
         self.__label = None
         self.__updated = None
 
-        self.__name2dataset = {}  # str -> dataset
-        self.__pos2dataset = []  # int -> dataset
+        self.__name2pos = {}  # str -> int
+        self.__pos2name = []  # int -> name of dataset (jsonstat v1) or None
+        self.__pos2dataset = []  # int -> dataset, None if not parsed yet
+        self.__pos2json = []  # int -> json of dataset not parsed yet, None once parsed
+        self.__json_v2 = False
 
     def __len__(self):
         """the number of dataset contained in this collection"""
@@ -58,16 +93,70 @@ class JsonStatCollection:
             - an integer (for jsonstat v1 and v2)
 
         :returns: a JsonStatDataSet object
+        :raises JsonStatMalformedJson: if the json of the dataset is not valid,
+            datasets are parsed on first access
         """
 
-        if type(spec) is int:
-            return self.__pos2dataset[spec]
-        return self.__name2dataset[spec]
+        pos = spec if type(spec) is int else self.__name2pos[spec]
+        dataset = self.__pos2dataset[pos]
+        if dataset is None:
+            dataset = self.__parse_dataset(pos)
+        return dataset
+
+    def __parse_dataset(self, pos, select=None):
+        """parses the json of the dataset at position pos and caches it"""
+        dataset = _parse_dataset(self.__pos2name[pos], self.__pos2json[pos], self.__json_v2, select)
+        self.__pos2dataset[pos] = dataset
+        self.__pos2json[pos] = None
+        return dataset
+
+    def _parse_datasets(self, workers=1, select=None):
+        """parses all the datasets not parsed yet
+
+        .. warning::
+
+            this is an internal library function (it is not public api)
+
+        :param workers: number of processes parsing the datasets, 1 to parse them in this process
+        :param select: categories to keep for each dataset, see :py:meth:`jsonstat.JsonStatDataSet.from_file`,
+            datasets are parsed in this process
+        """
+        lpos = [pos for pos, dataset in enumerate(self.__pos2dataset) if dataset is None]
+        # links to datasets have nothing to parse, they are not sent to the workers
+        for pos in lpos:
+            if self.__is_link(pos):
+                self.__parse_dataset(pos)
+        lpos = [pos for pos in lpos if self.__pos2dataset[pos] is None]
+        if workers is None or workers <= 1 or len(lpos) <= 1 or select is not None:
+            for pos in lpos:
+                self.__parse_dataset(pos, select)
+            return
+
+        # workers send back parsed datasets as snapshots, arrays are not copied
+        args = [(self.__pos2name[pos], self.__pos2json[pos], self.__json_v2) for pos in lpos]
+        with ProcessPoolExecutor(max_workers=min(workers, len(lpos))) as executor:
+            for pos, buf in zip(lpos, executor.map(_parse_dataset_to_bytes, args)):
+                reader = SnapshotReader.from_bytes(buf)
+                self.__pos2dataset[pos] = JsonStatDataSet()._from_snapshot(reader.header["dataset"], reader)
+                self.__pos2json[pos] = None
+
+    def __is_link(self, pos):
+        """True if the json of the dataset at position pos is only a link (jsonstat 2.0 item with an href)"""
+        json_data_ds = self.__pos2json[pos]
+        return self.__json_v2 and "id" not in json_data_ds and "href" in json_data_ds
+
+    def __dataset_name(self, pos):
+        """name of the dataset at position pos without parsing it"""
+        if self.__pos2dataset[pos] is not None:
+            return self.__pos2dataset[pos].name
+        if self.__pos2name[pos] is not None:
+            return self.__pos2name[pos]
+        return self.__pos2json[pos].get("label")
 
     def __to_table(self):
         lst = [["pos", "dataset"]]
-        for i, dataset in enumerate(self.__pos2dataset):
-            row = [str(i), "'" + dataset.name + "'"]
+        for i in range(len(self)):
+            row = [str(i), "'{}'".format(self.__dataset_name(i))]
             lst.append(row)
         return lst
 
@@ -91,34 +180,49 @@ class JsonStatCollection:
     #
     # parsing methods
     #
-    def from_file(self, filename):
+    def from_file(self, filename, streaming=None, workers=None, select=None):
         """initialize this collection from a file
         It is better to use :py:meth:`jsonstat.from_file`
 
         :param filename: name containing a jsonstat
+        :param streaming: see :py:meth:`jsonstat.JsonStatDataSet.from_file`
+        :param workers: see :py:meth:`from_json`
+        :param select: see :py:meth:`from_json`
         :returns: itself to chain call
         """
-        with open(filename) as f:
-            json_string = f.read()
-            self.from_string(json_string)
+        with map_file(filename) as buf:
+            if select is not None:
+                # arrays are decoded from the mapped file after parsing dimensions
+                return self.from_json(load_buffer(buf, deferred=True), workers, select)
+            if streaming is None:
+                streaming = use_streaming(buf)
+            if streaming:
+                return self.from_json(load_buffer(buf), workers)
+            with memoryview(buf) as json_string:
+                self.from_string(json_string, workers)
         return self
 
-    def from_string(self, json_string):
+    def from_string(self, json_string, workers=None):
         """Initialize this collection from a string
         It is better to use :py:meth:`jsonstat.from_string`
 
-        :param json_string: string containing a json
+        :param json_string: string (str, bytes or memoryview) containing a json
+        :param workers: see :py:meth:`from_json`
         :returns: itself to chain call
         """
-        json_data = json.loads(json_string, object_pairs_hook=OrderedDict)
-        self.from_json(json_data)
+        json_data = json_loads(json_string)
+        self.from_json(json_data, workers)
         return self
 
-    def from_json(self, json_data):
+    def from_json(self, json_data, workers=None, select=None):
         """initialize this collection from a json structure
         It is better to use :py:meth:`jsonstat.from_json`
 
         :param json_data: data structure (dictionary) representing a json
+        :param workers: None (default) to parse each dataset on first access,
+            otherwise all the datasets are parsed by a pool of workers processes
+        :param select: categories to keep for each dataset (see :py:meth:`jsonstat.JsonStatDataSet.from_file`),
+            all the datasets are parsed at once
         :returns: itself to chain call
         """
 
@@ -127,6 +231,8 @@ class JsonStatCollection:
         else:
             # jsonstat version 1.0
             self._from_json_v1(json_data)
+        if workers is not None or select is not None:
+            self._parse_datasets(workers, select)
         return self
 
     def _from_json_v1(self, json_data):
@@ -147,10 +253,10 @@ class JsonStatCollection:
 
         """
         for dataset_name, dataset_json in json_data.items():
-            dataset = JsonStatDataSet(dataset_name)
-            dataset.from_json(dataset_json)
-            self.__name2dataset[dataset_name] = dataset
-            self.__pos2dataset.append(dataset)
+            self.__name2pos[dataset_name] = len(self.__pos2json)
+            self.__pos2name.append(dataset_name)
+            self.__pos2json.append(dataset_json)
+        self.__pos2dataset = len(self.__pos2json) * [None]
 
     def _from_json_v2(self, json_data):
         """parse a jsonstat version 2
@@ -188,8 +294,99 @@ class JsonStatCollection:
             self.__updated = dateutil.parser.parse(json_data["updated"])
 
         json_data_ds = json_data["link"]["item"]
+        self.__json_v2 = True
+        self.__pos2json = list(json_data_ds)
+        self.__pos2name = len(json_data_ds) * [None]
         self.__pos2dataset = len(json_data_ds) * [None]
-        for pos, ds in enumerate(json_data_ds):
-            dataset = JsonStatDataSet()
-            dataset._from_json_v2(ds)
-            self.__pos2dataset[pos] = dataset
+
+    #
+    # pickle
+    #
+
+    def __reduce__(self):
+        """pickles the parsed datasets (see JsonStatDataSet.__reduce__), datasets not parsed yet are parsed"""
+        self._parse_datasets()
+        state = (self.__href, self.__label, self.__updated, self.__pos2name, self.__pos2dataset)
+        return _collection_from_pickle, (state,)
+
+    def _from_pickle(self, state):
+        """initialize this collection from the state returned by __reduce__
+
+        .. warning::
+
+            this is an internal library function (it is not public api)
+
+        :returns: itself to chain calls
+        """
+        self.__href, self.__label, self.__updated, self.__pos2name, self.__pos2dataset = state
+        self.__name2pos = {name: pos for pos, name in enumerate(self.__pos2name) if name is not None}
+        self.__pos2json = len(self.__pos2dataset) * [None]
+        return self
+
+    #
+    # snapshot
+    #
+
+    def save(self, filename):
+        """Saves the collection into a binary snapshot file
+
+        The snapshot is loaded by :py:meth:`jsonstat.load_snapshot` without parsing json,
+        see :py:meth:`jsonstat.JsonStatDataSet.save`
+
+        :param filename: path of the snapshot file
+        """
+        writer = SnapshotWriter()
+        writer.write(filename, self._to_snapshot(writer))
+
+    def to_shared(self, name=None):
+        """Copies the collection into a shared memory segment
+
+        see :py:meth:`jsonstat.JsonStatDataSet.to_shared`
+
+        :param name: name of the segment, None to generate an unique name
+        :returns: a SharedSegment, its name is used to attach the collection
+        """
+        writer = SnapshotWriter()
+        return create_segment(writer, self._to_snapshot(writer), name)
+
+    def _to_snapshot(self, writer):
+        """header of the collection for a snapshot
+
+        .. warning::
+
+            this is an internal library function (it is not public api)
+
+        :param writer: SnapshotWriter where the arrays are added
+        :returns: json serializable structure
+        """
+        return {"class": "collection",
+                "href": self.__href,
+                "label": self.__label,
+                "updated": None if self.__updated is None else self.__updated.isoformat(),
+                "names": self.__pos2name,
+                "datasets": [self.dataset(pos)._to_snapshot(writer) for pos in range(len(self))]}
+
+    def _from_snapshot(self, header, reader):
+        """initialize this collection from a snapshot
+
+        .. warning::
+
+            this is an internal library function (it is not public api)
+
+        :param header: header of the snapshot (see save)
+        :param reader: SnapshotReader of the snapshot file
+        :returns: itself to chain calls
+        """
+        self.__href = header["href"]
+        self.__label = header["label"]
+        if header["updated"] is not None:
+            self.__updated = dateutil.parser.parse(header["updated"])
+
+        for name, json_data_ds in zip(header["names"], header["datasets"]):
+            dataset = JsonStatDataSet()._from_snapshot(json_data_ds, reader)
+            if name is not None:
+                self.__name2pos[name] = len(self.__pos2dataset)
+            self.__pos2name.append(name)
+            self.__pos2dataset.append(dataset)
+            self.__pos2json.append(None)
+        return self
@@ -4,8 +4,8 @@
 # See LICENSE file
 
 # stdlib
+from collections import namedtuple
 from functools import reduce
-import json
 
 # packages
 import numpy as np
@@ -13,11 +13,36 @@ import pandas as pd
 import terminaltables
 
 # jsonstat
+from jsonstat.backend import loads as json_loads
 from jsonstat.value import JsonStatValue
+from jsonstat.selector import JsonStatSelector
+from jsonstat.shared import create_segment
+from jsonstat.snapshot import SnapshotWriter
 from jsonstat.dimension import JsonStatDimension
 from jsonstat.exceptions import JsonStatException
 from jsonstat.exceptions import JsonStatMalformedJson
+from jsonstat.storage import AGGREGATE_FUNCTIONS
+from jsonstat.storage import DenseStorage
+from jsonstat.storage import SparseStorage
+from jsonstat.storage import StatusStorage
+from jsonstat.storage import sparse_values_to_arrays
+from jsonstat.storage import values_to_array
+from jsonstat.storage import aggregate_codes
+from jsonstat.storage import aggregate_values
+from jsonstat.storage import array_to_values
+from jsonstat.storage import dense_reducer
+from jsonstat.storage import sparse_reducer
+from jsonstat.streaming import DeferredArray
+from jsonstat.streaming import load_buffer
+from jsonstat.streaming import use_streaming
 from jsonstat.utility import lst2html
+from jsonstat.utility import map_file
+
+JsonStatAxis = namedtuple('JsonStatAxis', ['did', 'index', 'label'])
+
+
+def _dataset_from_pickle(state):
+    return JsonStatDataSet()._from_pickle(state)
 
 
 class JsonStatDataSet:
@@ -84,12 +109,13 @@ class JsonStatDataSet:
         JsonStatValue(idx=0, value=5.943826289, status=None)
     """
 
-    def __init__(self, name=None):
+    def __init__(self, name=None, dtype=None):
         """Initialize an empty dataset.
 
         Dataset could have a name (key) if we parse a jsonstat format version 1.
 
         :param name: dataset name (for jsonstat v.1)
+        :param dtype: numpy dtype used to store values, default is float64
         """
         self.__valid = False
 
@@ -97,6 +123,7 @@ class JsonStatDataSet:
         self.__title = None
         self.__label = None
         self.__source = None
+        self.__href = None
 
         # dimensions
         self.__dim_nr = 0  # len(self.__pos2dim)
@@ -108,8 +135,11 @@ class JsonStatDataSet:
         self.__did2dim = {}  # dict  id  -> dim
         self.__lbl2dim = {}  # dict  lbl -> dim
 
-        self.__value = None
-        self.__status = None
+        # values are stored into a numpy array, null values are NaN
+        self.__dtype = dtype
+        self.__value = None  # DenseStorage
+        # status are encoded as a table of distinct status plus an array of codes
+        self.__status = None  # StatusStorage
 
     @property
     def name(self):
@@ -261,22 +291,15 @@ class JsonStatDataSet:
 
         # decoding args
         idx = self._2idx(*args, **kargs)
-        value = self.__value[idx]
+        value = self.__value.get(idx)
+        status = self.__status_at(idx)
+        return JsonStatValue(idx, value, status)
 
-        #
-        # status
-        #
+    def __status_at(self, idx):
+        """status of the cell at index idx"""
         if self.__status is None:
-            status = None
-        elif isinstance(self.__status, str):
-            status = self.__status
-        elif isinstance(self.__status, list) and len(self.__status) == 1:
-            status = self.__status[0]
-        elif isinstance(self.__status, dict) and idx not in self.__status:
-            status = None
-        else:
-            status = self.__status[idx]
-        return JsonStatValue(idx, value, status)
+            return None
+        return self.__status.get(idx)
 
     def value(self, *args, **kargs):
         """get a value
@@ -297,13 +320,141 @@ class JsonStatDataSet:
         # TODO: add onlystatus=true to extract only the value?
         return self.data(*args, **kargs).status
 
+    def selector(self, *dids, **blocked_dims):
+        """Returns a JsonStatSelector to access datapoints by categories of the dimensions dids
+
+        Dimensions and categories are resolved once when the selector is created,
+        use it in loops where :py:meth:`data` is called many times.
+
+        :param dids: ids or labels of the dimensions whose categories are passed to the selector
+        :param blocked_dims: categories of the other dimensions, f.e. {"concept": "UNR"},
+            ommitted dimensions are at position 0
+        :returns: a JsonStatSelector
+
+        >>> import os, jsonstat  # doctest: +ELLIPSIS
+        >>> filename = os.path.join(jsonstat._examples_dir, "www.json-stat.org", "oecd-canada-col.json")
+        >>> dataset = jsonstat.from_file(filename).dataset(0)
+        >>> selector = dataset.selector("year", "area", concept="UNR")
+        >>> selector("2003", "AU")
+        5.943826289
+        """
+        if not self.__valid:
+            raise JsonStatException('dataset not initialized')
+
+        ldim = [self.__dimension_by_id_or_label(did) for did in dids]
+        offset = self.lint_as_idx(self.dcat_to_lint(blocked_dims))
+        return JsonStatSelector([dim.did for dim in ldim],
+                                [dim._cat2pos_dict() for dim in ldim],
+                                [self.__pos2mult[dim.pos] for dim in ldim],
+                                offset,
+                                self.__value,
+                                self.__status_at)
+
+    def data_many(self, coords):
+        """Returns values and status of many datapoints at once
+
+        Datapoints are resolved all together with numpy, instead of calling
+        :py:meth:`data` for each datapoint.
+
+        :param coords: can be
+
+            - a list of dict ``[{k1:v1, k2:v2, ...}, ...]`` each dict as in ``data(<dict>)``
+            - a dict ``{k1: [v1, v2, ...], k2: [...], ...}`` with a list (or array) of
+              categories (index or label) for each dimension, dimension of size 1 can be ommitted
+            - a 2-dimensional array of integer with shape (n, number of dimensions), each row
+              contains the positions of a datapoint as in ``data(<list>)``
+            - a 1-dimensional array of integer indexes
+
+        :returns: a JsonStatValue whose fields idx, value and status are numpy arrays,
+            null values are NaN
+
+        >>> import os, jsonstat  # doctest: +ELLIPSIS
+        >>> filename = os.path.join(jsonstat._examples_dir, "www.json-stat.org", "oecd-canada-col.json")
+        >>> dataset = jsonstat.from_file(filename).dataset(0)
+        >>> data = dataset.data_many({'area': ['AU', 'AU', 'IT'], 'year': ['2003', '2013', '2003']})
+        >>> data.idx
+        array([  0,  10, 192])
+        >>> data.status
+        array([None, 'e', None], dtype=object)
+        """
+        if not self.__valid:
+            raise JsonStatException('dataset not initialized')
+
+        idx = self._2idx_array(coords)
+        value, mask = self.__value.take(idx)
+        return JsonStatValue(idx, value, self.__status_array(idx))
+
+    def values_at(self, coords):
+        """Returns the values of many datapoints at once
+
+        For the parameters see :py:meth:`jsonstat.JsonStatDataSet.data_many`.
+
+        :returns: numpy array of values, null values are NaN
+        """
+        if not self.__valid:
+            raise JsonStatException('dataset not initialized')
+
+        value, mask = self.__value.take(self._2idx_array(coords))
+        return value
+
+    def status_codes(self):
+        """Returns the status of all datapoints encoded as codes into a table of distinct status
+
+        >>> import os, jsonstat  # doctest: +ELLIPSIS
+        >>> filename = os.path.join(jsonstat._examples_dir, "www.json-stat.org", "oecd-canada-col.json")
+        >>> dataset = jsonstat.from_file(filename).dataset(0)
+        >>> table, codes = dataset.status_codes()
+        >>> table
+        [None, 'e']
+        >>> codes[:12]
+        array([0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 1, 1], dtype=uint8)
+
+        :returns: a tuple (table, codes), table is the list of distinct status,
+            table[0] is None (no status); codes is an array of unsigned integer with
+            the code of each datapoint in the order of values
+        """
+        if not self.__valid:
+            raise JsonStatException('dataset not initialized')
+
+        if self.__status is None:
+            return [None], np.zeros(len(self.__value), dtype=np.uint8)
+        return list(self.__status.table), self.__status.all_codes()
+
+    def status_mask(self, status):
+        """Returns which datapoints have a status
+
+        :param status: a status, f.e. "e"; None selects the datapoints without status
+        :returns: boolean array, True where datapoint has status
+        """
+        table, codes = self.status_codes()
+        if status not in table:
+            return np.zeros(len(codes), dtype=bool)
+        return codes == table.index(status)
+
+    def __status_array(self, idx):
+        """status of the cells at indexes idx
+
+        :param idx: array of integer indexes into values
+        :returns: numpy array (dtype object)
+        """
+        if self.__status is None:
+            return np.full(len(idx), None, dtype=object)
+        return self.__status.take(idx)
+
+    def __status_column_for_data_frame(self, idx):
+        """status at idx as pandas categorical, null where there is no status"""
+        if self.__status is None:
+            return pd.Categorical.from_codes(np.full(len(idx), -1), categories=[])
+        codes = self.__status.take_codes(idx).astype(np.int64) - 1
+        return pd.Categorical.from_codes(codes, categories=self.__status.table[1:])
+
     def __value_from_vec_pos(self, lst):
         """
 
         :param lst: [0,3,4]
         :returns: value at dimension [0,3,4]
         """
-        return self.__value[self.lint_as_idx(lst)]
+        return self.__value.get(self.lint_as_idx(lst))
 
     #
     # dataset can be access using different type of indexes
@@ -347,6 +498,52 @@ class JsonStatDataSet:
         msg = "unexpected parameters"
         raise JsonStatException(msg)
 
+    def _2idx_array(self, coords):
+        """vectorized version of _2idx, see :py:meth:`data_many` for coords"""
+
+        # [{k1:v1, k2:v2}, ...]
+        if isinstance(coords, list) and len(coords) > 0 and isinstance(coords[0], dict):
+            dcat = {}
+            for i, dims in enumerate(coords):
+                for (cat, val) in dims.items():
+                    dim = self.__dimension_by_id_or_label(cat)
+                    if dim.pos not in dcat:
+                        # ommitted dimension are at position 0
+                        dcat[dim.pos] = len(coords) * [dim._pos2cat(0).index]
+                    dcat[dim.pos][i] = val
+            coords = {self.__pos2dim[pos].did: lcat for pos, lcat in dcat.items()}
+
+        # {k1:[v1, ...], k2:[...]}
+        if isinstance(coords, dict):
+            lcat = {self.__dimension_by_id_or_label(cat).pos: val for (cat, val) in coords.items()}
+            sizes = set(len(val) for val in lcat.values())
+            if len(sizes) > 1:
+                msg = "dataset '{}': lists of categories have different length".format(self.__name)
+                raise JsonStatException(msg)
+            n = sizes.pop() if sizes else 0
+            lpos = [self.__pos2dim[pos]._cat2pos_array(lcat[pos]) if pos in lcat
+                    else np.zeros(n, dtype=np.int64)
+                    for pos in range(self.__dim_nr)]
+            return self._lpos_as_idx_array(lpos)
+
+        array = np.asarray(coords)
+        if array.size == 0:
+            return np.zeros(0, dtype=np.int64)
+        if array.dtype.kind in 'iu':
+            try:
+                # [i1, i2, ...]
+                if array.ndim == 1:
+                    return np.ravel_multi_index((array,), (len(self),))
+                # [[p1, p2, p3], ...]
+                if array.ndim == 2 and array.shape[1] == self.__dim_nr:
+                    return np.ravel_multi_index(tuple(array.T), self.__pos2size)
+            except ValueError as e:
+                msg = "dataset '{}': {}".format(self.__name, e)
+                raise JsonStatException(msg)
+
+        msg = "unexpected parameters"
+        raise JsonStatException(msg)
+
     def dcat_to_lint(self, dims):
         """Transforms a dimension dict to dimension array
 
@@ -361,23 +558,25 @@ class JsonStatDataSet:
         """
         apos = len(self.__pos2dim) * [0]
         for (cat, val) in dims.items():
-            # key is id
-            if cat in self.__did2dim:
-                dim = self.__did2dim[cat]
-            # key is label
-            elif cat in self.__lbl2dim:
-                dim = self.__lbl2dim[cat]
-            # key is not id or label so raise error
-            else:
-                allowed_categories = ", ".join(
-                    ["'{}'".format(dim.did) for dim in self.__pos2dim])
-                msg = "dataset '{}': category '{}' don't exists allowed categories are: {}"
-                msg = msg.format(self.__name, cat, allowed_categories)
-                raise JsonStatException(msg)
-
+            dim = self.__dimension_by_id_or_label(cat)
             apos[dim.pos] = dim.category(val).pos
         return apos
 
+    def __dimension_by_id_or_label(self, cat):
+        """returns the dimension with id or label cat"""
+        # key is id
+        if cat in self.__did2dim:
+            return self.__did2dim[cat]
+        # key is label
+        if cat in self.__lbl2dim:
+            return self.__lbl2dim[cat]
+        # key is not id or label so raise error
+        allowed_categories = ", ".join(
+            ["'{}'".format(dim.did) for dim in self.__pos2dim])
+        msg = "dataset '{}': category '{}' don't exists allowed categories are: {}"
+        msg = msg.format(self.__name, cat, allowed_categories)
+        raise JsonStatException(msg)
+
     def lint_as_idx(self, lst):
         """from a list of position get a index into value array
 
@@ -385,20 +584,50 @@ class JsonStatDataSet:
         :param lst: list of integer
         :returns: an integer index into values
         """
-        s = np.array(self.__pos2mult)
-        r = s * lst
-        return np.sum(r)
+        return sum(mult * pos for mult, pos in zip(self.__pos2mult, lst))
 
     def idx_as_lint(self, idx):
         """ 10 -> [<int1>, <int2>, ...]
         """
-        lint = self.__dim_nr * [0]
-        i = len(self.__pos2size) - 1
-        while idx > 0 and i != 0:
-            lint[i] = idx % self.__pos2size[i]
-            idx -= (lint[i] * self.__pos2mult[i])
-            i -= 1
-        return lint
+        return self.unravel([idx])[0].tolist()
+
+    def unravel(self, idx, content=None):
+        """vectorized version of :py:meth:`idx_as_lint` and :py:meth:`idx_as_lcat`
+
+        transforms an array of indexes into values into the coordinates of the cells
+
+        >>> import os, jsonstat  # doctest: +ELLIPSIS
+        >>> filename = os.path.join(jsonstat._examples_dir, "www.json-stat.org", "oecd-canada-col.json")
+        >>> dataset = jsonstat.from_file(filename).dataset(0)
+        >>> dataset.unravel([10, 430])
+        array([[ 0,  0, 10],
+               [ 0, 35, 10]])
+        >>> dataset.unravel([10, 430], content="id")
+        array([['UNR', 'AU', '2013'],
+               ['UNR', 'OECD', '2013']], dtype=object)
+
+        :param idx: array of integer indexes
+        :param content: None to get positions, "id" to get indexes of categories,
+            "label" to get labels of categories
+        :returns: 2-dimensional array with shape (len(idx), number of dimensions)
+        """
+        idx = np.asarray(idx, dtype=np.int64)
+        try:
+            lpos = np.unravel_index(idx, self.__pos2size)
+        except ValueError as e:
+            msg = "dataset '{}': {}".format(self.__name, e)
+            raise JsonStatException(msg)
+
+        if content is None:
+            return np.stack(lpos, axis=-1) if lpos else np.zeros((len(idx), 0), dtype=np.int64)
+
+        lcat = []
+        for dim, pos in zip(self.__pos2dim, lpos):
+            if content == "label":
+                lcat.append(dim._pos2lbl_array()[pos])
+            else:
+                lcat.append(dim._pos2idx_array()[pos])
+        return np.stack(lcat, axis=-1)
 
     def idx_as_lcat(self, idx):
         lint = self.idx_as_lint(idx)
@@ -518,6 +747,87 @@ class JsonStatDataSet:
                     if not vec_pos_blocked[cur_dim]:
                         vec_pos[cur_dim] += 1
 
+    def _all_pos_array(self, blocked_dims={}, order=None):
+        """vectorized version of :py:meth:`all_pos`
+
+        returns the same positions generated by all_pos as one array for each dimension
+
+        :param blocked_dims:  {"year":2013, country:"IT"}
+        :param order: order
+        :returns: list of numpy arrays, one array for each dimension
+        """
+        order = self.__order_as_lpos(order)
+        pos2range = [np.arange(size, dtype=np.int64) for size in self.__pos2size]
+        for dpos, pos in self.__blocked_dims_as_dpos(blocked_dims).items():
+            pos2range[dpos] = np.array([pos], dtype=np.int64)
+
+        # the last dimension in order changes faster
+        total = reduce(lambda x, y: x * y, (len(r) for r in pos2range), 1)
+        lpos = len(pos2range) * [None]
+        repeat = total
+        for dpos in order:
+            r = pos2range[dpos]
+            repeat //= len(r)
+            lpos[dpos] = np.tile(np.repeat(r, repeat), total // (len(r) * repeat))
+        return lpos
+
+    def _valid_pos_array(self, blocked_dims={}, order=None):
+        """as :py:meth:`_all_pos_array` but only for the not null cells
+
+        the not null cells are enumerated directly from the values storage,
+        so the cost is proportional to the number of not null cells (f.e. for sparse values)
+
+        :returns: a tuple (lpos, idx), lpos is a list of arrays of positions one for each dimension,
+            idx is the array of indexes into values
+        """
+        order = self.__order_as_lpos(order)
+        idx = self.__value.valid_idx()
+        lpos = list(np.unravel_index(idx, self.__pos2size))
+
+        keep = np.ones(len(idx), dtype=bool)
+        for dpos, pos in self.__blocked_dims_as_dpos(blocked_dims).items():
+            keep &= lpos[dpos] == pos
+        if not keep.all():
+            idx = idx[keep]
+            lpos = [pos[keep] for pos in lpos]
+
+        # np.lexsort uses the last key as primary key
+        if list(order) != list(range(len(lpos))):
+            sort = np.lexsort([lpos[dpos] for dpos in reversed(order)])
+            idx = idx[sort]
+            lpos = [pos[sort] for pos in lpos]
+        return lpos, idx
+
+    def __order_as_lpos(self, order):
+        """from order (list of ids or positions of dimensions) to list of positions"""
+        nr_dim = len(self.__pos2dim)
+        if order is None:
+            return range(nr_dim)
+        if len(order) != nr_dim:
+            msg = "length of the order vector is different from number of dimension {}".format(
+                nr_dim)
+            raise JsonStatException(msg)
+        return [o if isinstance(o, (int, np.integer)) else self.__did2dim[o].pos for o in order]
+
+    def __blocked_dims_as_dpos(self, blocked_dims):
+        """from {did: index} to {dimension position: category position}"""
+        dpos2pos = {}
+        for (cat, idx) in blocked_dims.items():
+            d = self.dimension(cat)
+            dpos2pos[d.pos] = d._idx2pos(idx)
+        return dpos2pos
+
+    def _lpos_as_idx_array(self, lpos):
+        """vectorized version of :py:meth:`lint_as_idx`
+
+        :param lpos: list of arrays of positions, one for each dimension
+        :returns: array of integer indexes into values
+        """
+        idx = np.zeros(len(lpos[0]) if len(lpos) > 0 else 0, dtype=np.int64)
+        for mult, pos in zip(self.__pos2mult, lpos):
+            idx += mult * pos
+        return idx
+
     def generate_all_vec(self, **blocked_dims):
         for vec_pos in self.all_pos(blocked_dims):
             vec_idx = self.lint_as_lcat(vec_pos)
@@ -533,7 +843,9 @@ class JsonStatDataSet:
                  rtype=list,
                  blocked_dims={},
                  value_column="Value",
-                 without_one_dimensions=False):
+                 without_one_dimensions=False,
+                 skip_empty=False,
+                 status_column=None):
         """Transforms a dataset into a table (a list of row)
 
         table len is the size of dataset + 1 for headers
@@ -542,9 +854,12 @@ class JsonStatDataSet:
         :param order:
         :param rtype:
         :param blocked_dims:
+        :param skip_empty: if True rows with null value are not included
+        :param status_column: if not None, name of a column (after the value) with the status
         :returns: a list of row, first line is the header
         """
-        table = []
+        if not self.__valid:
+            raise JsonStatException('dataset not initialized')
 
         # header
         if content == "label":
@@ -553,33 +868,304 @@ class JsonStatDataSet:
             header = [dim.did for dim in self.__pos2dim]
 
         header.append(value_column)
+        if status_column is not None:
+            header.append(status_column)
 
         # data
-        table.append(header)
-        for apos in self.all_pos(order=order, blocked_dims=blocked_dims):
-            value = self.__value_from_vec_pos(apos)
+        # columns are built with numpy, rows are never enumerated one by one
+        if skip_empty:
+            lpos, idx = self._valid_pos_array(order=order, blocked_dims=blocked_dims)
+        else:
+            lpos = self._all_pos_array(order=order, blocked_dims=blocked_dims)
+            idx = self._lpos_as_idx_array(lpos)
+
+        columns = []
+        for dim, pos in zip(self.__pos2dim, lpos):
+            if without_one_dimensions and len(dim) == 1:
+                continue
             if content == "label":
-                row = self._lint_to_llbl(
-                    apos, without_one_dimension=without_one_dimensions)
+                columns.append(dim._pos2lbl_array()[pos])
             else:
-                row = self.lint_as_lcat(
-                    apos, without_one_dimension=without_one_dimensions)
-            row.append(value)
-            table.append(row)
+                columns.append(dim._pos2idx_array()[pos])
 
         if rtype == pd.DataFrame:
-            ret = pd.DataFrame(table[1:], columns=table[0])
+            columns.append(self.__value_column_for_data_frame(idx))
+            if status_column is not None:
+                columns.append(self.__status_column_for_data_frame(idx))
+            ret = pd.DataFrame({i: c for i, c in enumerate(columns)})
+            ret.columns = header
         else:
+            columns.append(array_to_values(*self.__value.take(idx), self.__value.take_integral(idx)))
+            if status_column is not None:
+                columns.append(self.__status_array(idx))
+            table = [header]
+            table.extend(map(list, zip(*columns)))
             ret = table
 
         return ret
 
+    def to_ndarray(self, masked=False):
+        """Returns the values of the dataset as a N-dimensional numpy array
+
+        The array is a read only view of the values (no copy is made),
+        its shape is the size of the dimensions and the axes are in the same order of the dimensions.
+        If values are sparse (json "value" is an object) a dense array is built.
+
+        >>> import os, jsonstat  # doctest: +ELLIPSIS
+        >>> filename = os.path.join(jsonstat._examples_dir, "www.json-stat.org", "oecd-canada-col.json")
+        >>> dataset = jsonstat.from_file(filename).dataset(0)
+        >>> values, axes = dataset.to_ndarray()
+        >>> values.shape
+        (1, 36, 12)
+        >>> axes[1].did, axes[1].index[0], axes[1].label[0]
+        ('area', 'AU', 'Australia')
+
+        :param masked: if True values are returned as numpy masked array, null values are masked
+        :returns: a tuple (values, axes), axes is a list of JsonStatAxis(did, index, label)
+            one for each dimension, index and label are arrays of categories ordered by position
+        """
+        if not self.__valid:
+            raise JsonStatException('dataset not initialized')
+
+        values, mask = self.__value.reshape(self.__pos2size)
+        values = values.view()
+        values.flags.writeable = False
+        if masked:
+            values = np.ma.MaskedArray(values, mask=~mask, copy=False)
+
+        axes = [JsonStatAxis(dim.did, dim._pos2idx_array(), dim._pos2lbl_array())
+                for dim in self.__pos2dim]
+        return values, axes
+
+    def sel(self, **kargs):
+        """Selects a subset of the dataset by categories
+
+        The keys of kargs are ids or labels of dimension,
+        the values can be:
+
+            - an index or label of a category, the dimension is kept with size 1
+            - a list of indexes or labels
+            - a slice of indexes or labels, f.e. ``slice("2005", "2010")``, the stop category is included
+
+        Dimensions not in kargs are kept entirely.
+        When the selected categories of each dimension are evenly spaced (f.e. a single category or a slice)
+        the values of the returned dataset are a view on the values of this dataset (no copy is made).
+
+        >>> import os, jsonstat  # doctest: +ELLIPSIS
+        >>> filename = os.path.join(jsonstat._examples_dir, "www.json-stat.org", "oecd-canada-col.json")
+        >>> dataset = jsonstat.from_file(filename).dataset(0)
+        >>> subset = dataset.sel(area=["IT", "FR"], year=slice("2005", "2010"))
+        >>> len(subset)
+        12
+        >>> subset.data(area="Italy", year="2005")
+        JsonStatValue(idx=0, value=7.708360512, status=None)
+
+        :returns: a new JsonStatDataSet
+        """
+        if not self.__valid:
+            raise JsonStatException('dataset not initialized')
+
+        key, lpos = self.__sel_keys(kargs)
+
+        dataset = JsonStatDataSet(self.__name, self.__dtype)
+        dataset.__title = self.__title
+        dataset.__label = self.__label
+        dataset.__source = self.__source
+        dataset.__dim_nr = self.__dim_nr
+        dataset.__select_dimensions(self.__pos2dim, lpos)
+
+        dataset.__value = self.__value.select(self.__pos2size, key)
+        dataset.__compute_pos2mult()
+        if self.__status is not None:
+            dataset.__status = self.__status.select(self.__pos2size, key)
+        dataset.__valid = True
+        return dataset
+
+    def __sel_keys(self, kargs):
+        """from the selected categories (see sel) to the key selecting the values
+
+        :returns: (key, lpos) key is a tuple of slices or arrays of positions (one for each dimension),
+            lpos are the positions of the selected categories for each dimension
+        """
+        key = self.__dim_nr * [slice(None)]
+        for (cat, spec) in kargs.items():
+            dim = self.__dimension_by_id_or_label(cat)
+            key[dim.pos] = self.__sel_key(dim, spec)
+        key = tuple(key)
+        lpos = [np.arange(size)[k] for size, k in zip(self.__pos2size, key)]
+        return key, lpos
+
+    def __select_dimensions(self, pos2dim, lpos):
+        """sets the dimensions of this dataset keeping only the categories at positions lpos"""
+        self.__pos2size = [len(pos) for pos in lpos]
+        self.__pos2dim = [dim if len(pos) == len(dim) else dim._select(pos)
+                          for dim, pos in zip(pos2dim, lpos)]
+        self.__did2dim = {}
+        self.__lbl2dim = {}
+        for dim in self.__pos2dim:
+            self.__did2dim[dim.did] = dim
+            if dim.label is not None:
+                self.__lbl2dim[dim.label] = dim
+
+    def __sel_key(self, dim, spec):
+        """from the selected categories of a dimension to a slice or to an array of positions"""
+        if isinstance(spec, slice):
+            start = 0 if spec.start is None else dim.category(spec.start).pos
+            stop = len(dim) if spec.stop is None else dim.category(spec.stop).pos + 1
+            lpos = range(start, stop, 1 if spec.step is None else spec.step)
+        elif isinstance(spec, (list, tuple, np.ndarray)):
+            lpos = [dim.category(c).pos for c in spec]
+        else:
+            lpos = [dim.category(spec).pos]
+
+        if len(lpos) == 0:
+            msg = "dataset '{}': empty selection for dimension '{}'".format(self.__name, dim.did)
+            raise JsonStatException(msg)
+        if len(set(lpos)) != len(lpos):
+            msg = "dataset '{}': categories selected more than once for dimension '{}'"
+            msg = msg.format(self.__name, dim.did)
+            raise JsonStatException(msg)
+
+        # evenly spaced positions can be selected with a slice (so values are a view)
+        step = lpos[1] - lpos[0] if len(lpos) > 1 else 1
+        if step > 0 and all(b - a == step for a, b in zip(lpos, lpos[1:])):
+            return slice(lpos[0], lpos[-1] + 1, step)
+        return np.array(lpos, dtype=np.int64)
+
+    def aggregate(self, by, func="sum", skipna=True, skip_status=None):
+        """Aggregates the values over the dimensions not in by
+
+        The values are reduced directly on the N-dimensional array of values
+        (sparse values on the stored cells only), rows are never enumerated.
+        The status of an aggregated value is the status shared by all the values used
+        to compute it, otherwise it has no status.
+
+        >>> import os, jsonstat  # doctest: +ELLIPSIS
+        >>> filename = os.path.join(jsonstat._examples_dir, "www.json-stat.org", "oecd-canada-col.json")
+        >>> dataset = jsonstat.from_file(filename).dataset(0)
+        >>> by_year = dataset.aggregate(by=["year"], func="max")
+        >>> len(by_year), by_year.dimension(0).did
+        (12, 'year')
+        >>> by_year.data(year="2012")
+        JsonStatValue(idx=9, value=25.04773498, status=None)
+
+        :param by: list of ids or labels of the dimensions to keep (or a single one),
+            the new dataset has them in this order
+        :param func: "sum", "mean", "min", "max" or "count" (number of not null values)
+        :param skipna: if True null values are skipped, otherwise the aggregation of
+            values containing a null value is null
+        :param skip_status: list of status whose values are considered null (f.e. confidential values)
+        :returns: a new JsonStatDataSet with only the dimensions in by
+        """
+        if not self.__valid:
+            raise JsonStatException('dataset not initialized')
+        if func not in AGGREGATE_FUNCTIONS:
+            msg = "dataset '{}': unknown aggregate function '{}', use one of {}"
+            raise JsonStatException(msg.format(self.__name, func, AGGREGATE_FUNCTIONS))
+        if func != "count" and self.__value.dtype.kind not in "iuf":
+            msg = "dataset '{}': cannot aggregate values of type {}"
+            raise JsonStatException(msg.format(self.__name, self.__value.dtype))
+
+        if isinstance(by, str):
+            by = [by]
+        keep = [self.__dimension_by_id_or_label(cat).pos for cat in by]
+        if len(set(keep)) != len(keep):
+            msg = "dataset '{}': dimension to keep selected more than once".format(self.__name)
+            raise JsonStatException(msg)
+
+        new_shape = [self.__pos2size[pos] for pos in keep]
+        new_size = reduce(lambda x, y: x * y, new_shape, 1)
+        group_size = len(self.__value) // new_size if new_size > 0 else 0
+
+        if isinstance(self.__value, SparseStorage):
+            idx = self.__value.idx
+            array, mask = self.__value.array, self.__value.mask
+            reducer, new_idx = sparse_reducer(idx, self.__pos2size, keep)
+        else:
+            idx = None
+            array, mask = self.__value.reshape(self.__pos2size)
+            axes = tuple(pos for pos in range(self.__dim_nr) if pos not in keep)
+            # the kept dimensions in the order of by
+            order = [sorted(keep).index(pos) for pos in keep]
+            reducer, new_idx = dense_reducer(axes, order), None
+
+        codes = None
+        if self.__status is not None:
+            codes = self.__status.take_codes(idx) if idx is not None else \
+                self.__status.all_codes().reshape(self.__pos2size)
+            skip_codes = [c for c, status in enumerate(self.__status.table) if c > 0 and status in (skip_status or [])]
+            if skip_codes:
+                mask = mask & ~np.isin(codes, skip_codes)
+
+        values, new_mask = aggregate_values(reducer, array, mask, group_size, func, skipna)
+        new_codes = None if codes is None else aggregate_codes(reducer, codes, mask, ~new_mask)
+        if func == "count" and new_idx is not None:
+            # groups without stored cells count 0 values, as with dense values
+            values = self.__scatter(new_idx, values, new_size)
+            new_mask = np.ones(new_size, dtype=bool)
+            if new_codes is not None:
+                new_codes = self.__scatter(new_idx, new_codes, new_size)
+            new_idx = None
+
+        dataset = JsonStatDataSet(self.__name, values.dtype)
+        dataset.__title = self.__title
+        dataset.__label = self.__label
+        dataset.__source = self.__source
+        dataset.__dim_nr = len(keep)
+        pos2dim = [JsonStatDimension(dim.did, len(dim), pos, dim.role).from_json(dim._to_json())
+                   for pos, dim in enumerate(self.__pos2dim[p] for p in keep)]
+        dataset.__select_dimensions(pos2dim, [np.arange(size) for size in new_shape])
+
+        # sum, min and max of integers are integers
+        integral = self.__value.integral if func in ("sum", "min", "max") else False
+        if isinstance(integral, np.ndarray):
+            if new_idx is None:
+                integral = integral.reshape(self.__pos2size)
+            integral = reducer(np.logical_and, integral | ~mask)
+        if new_idx is None:
+            dataset.__value = DenseStorage(values, new_mask, integral)
+        else:
+            dataset.__value = SparseStorage(new_idx, values, new_mask, new_size, integral)
+        if new_codes is not None:
+            if new_idx is None:
+                dataset.__status = StatusStorage(self.__status.table, new_codes, None, new_size)
+            else:
+                with_status = new_codes > 0
+                dataset.__status = StatusStorage(self.__status.table, new_codes[with_status],
+                                                 new_idx[with_status], new_size)
+        dataset.__compute_pos2mult()
+        dataset.__valid = True
+        return dataset
+
+    @staticmethod
+    def __scatter(idx, array, size):
+        """dense array of size items, array at positions idx and 0 elsewhere"""
+        dense = np.zeros(size, dtype=array.dtype)
+        dense[idx] = array
+        return dense
+
+    def __value_column_for_data_frame(self, idx):
+        """values at idx as pandas would infer them from a list of python values
+
+        :param idx: array of integer indexes into values
+        :returns: a numpy array
+        """
+        value, mask = self.__value.take(idx)
+        integral = self.__value.take_integral(idx)
+        if value.dtype.kind != 'f' or not mask.any():
+            return array_to_values(value, mask, integral).tolist()
+        if mask.all() and np.all(integral):
+            return value.astype(np.int64)
+        return value
+
     def to_data_frame(self,
                       index=None,
                       content="label",
                       order=None,
                       blocked_dims={},
-                      value_column="Value"):
+                      value_column="Value",
+                      skip_empty=False,
+                      status_column=None):
         """Transform dataset to pandas data frame
 
         extract_bidimensional("year", "country")
@@ -594,6 +1180,8 @@ class JsonStatDataSet:
         :param blocked_dims:
         :param order:
         :param value_column:
+        :param skip_empty: if True rows with null value are not included
+        :param status_column: if not None, name of a column (after the value) with the status
 
         :returns:
         """
@@ -602,7 +1190,9 @@ class JsonStatDataSet:
                            order=order,
                            rtype=pd.DataFrame,
                            blocked_dims=blocked_dims,
-                           value_column=value_column)
+                           value_column=value_column,
+                           skip_empty=skip_empty,
+                           status_column=status_column)
         # TODO: avoid creating a new dataframe (?)
         # df.index = df[index]
         # del df[index]
@@ -610,21 +1200,242 @@ class JsonStatDataSet:
             df = df.set_index([index])
         return df
 
+    #
+    # Pickle
+    #
+
+    def __reduce__(self):
+        """pickles values and status as numpy arrays
+
+        with pickle protocol 5 the arrays can be sent as out-of-band buffers
+        (see ``buffer_callback`` of :py:func:`pickle.dumps`), dimensions are pickled
+        as packed strings (see JsonStatDimension.__reduce__).
+        """
+        # datasets not initialized (f.e. links of a collection) have no value
+        state = (self.__name, self.__title, self.__label, self.__source, self.__href, self.__dtype,
+                 self.__pos2size, self.__pos2dim, self.__value if self.__valid else None, self.__status)
+        return _dataset_from_pickle, (state,)
+
+    def _from_pickle(self, state):
+        """initialize this dataset from the state returned by __reduce__
+
+        .. warning::
+
+            this is an internal library function (it is not public api)
+
+        :returns: itself to chain calls
+        """
+        (self.__name, self.__title, self.__label, self.__source, self.__href, self.__dtype,
+         self.__pos2size, self.__pos2dim, self.__value, self.__status) = state
+        if self.__value is None:
+            return self
+        self.__dim_nr = len(self.__pos2dim)
+        for dim in self.__pos2dim:
+            self.__did2dim[dim.did] = dim
+            if dim.label is not None:
+                self.__lbl2dim[dim.label] = dim
+        self.__compute_pos2mult()
+        self.__valid = True
+        return self
+
+    #
+    # Snapshot
+    #
+
+    def save(self, filename):
+        """Saves the dataset into a binary snapshot file
+
+        The snapshot is loaded by :py:meth:`jsonstat.load_snapshot` without parsing json,
+        values and status are memory mapped.
+
+        >>> import os, tempfile, jsonstat  # doctest: +ELLIPSIS
+        >>> filename = os.path.join(jsonstat._examples_dir, "www.json-stat.org", "oecd-canada-col.json")
+        >>> dataset = jsonstat.from_file(filename).dataset(0)
+        >>> snapshot = os.path.join(tempfile.mkdtemp(), "oecd.snapshot")
+        >>> dataset.save(snapshot)
+        >>> jsonstat.load_snapshot(snapshot).data(area="AU", year="2013")
+        JsonStatValue(idx=10, value=5.50415003, status='e')
+
+        :param filename: path of the snapshot file
+        """
+        writer = SnapshotWriter()
+        writer.write(filename, {"class": "dataset", "dataset": self._to_snapshot(writer)})
+
+    def to_shared(self, name=None):
+        """Copies the dataset into a shared memory segment
+
+        Other processes get a read only copy of the dataset with :py:meth:`jsonstat.attach_shared`,
+        values, status and categories are not copied, parsed or pickled.
+        The segment exists until :py:meth:`jsonstat.shared.SharedSegment.unlink` is called.
+
+        >>> import os, jsonstat  # doctest: +ELLIPSIS
+        >>> filename = os.path.join(jsonstat._examples_dir, "www.json-stat.org", "oecd-canada-col.json")
+        >>> dataset = jsonstat.from_file(filename).dataset(0)
+        >>> with dataset.to_shared() as segment:
+        ...     shared = jsonstat.attach_shared(segment.name)
+        ...     shared.data(area="AU", year="2013")
+        JsonStatValue(idx=10, value=5.50415003, status='e')
+
+        :param name: name of the segment, None to generate an unique name
+        :returns: a SharedSegment, its name is used to attach the dataset
+        """
+        writer = SnapshotWriter()
+        return create_segment(writer, {"class": "dataset", "dataset": self._to_snapshot(writer)}, name)
+
+    def _to_snapshot(self, writer):
+        """header of the dataset for a snapshot
+
+        .. warning::
+
+            this is an internal library function (it is not public api)
+
+        :param writer: SnapshotWriter where the arrays are added
+        :returns: json serializable structure
+        """
+        if not self.__valid:
+            if self.__href is None:
+                raise JsonStatException('dataset not initialized')
+            # link to a dataset (jsonstat 2.0 collection item without data), restored not initialized
+            return {"name": self.__name, "label": self.__label, "href": self.__href}
+
+        if isinstance(self.__value, SparseStorage):
+            value = {"storage": "sparse",
+                     "idx": writer.add(self.__value.idx),
+                     "array": writer.add(self.__value.array),
+                     "mask": writer.add(self.__value.mask),
+                     "integral": self.__integral_to_snapshot(writer, self.__value.integral)}
+        else:
+            array, mask = self.__value.reshape(-1)
+            integral = self.__value.integral
+            if isinstance(integral, np.ndarray):
+                integral = integral.reshape(-1)
+            value = {"storage": "dense", "array": writer.add(array), "mask": writer.add(mask),
+                     "integral": self.__integral_to_snapshot(writer, integral)}
+
+        status = None
+        if self.__status is not None:
+            codes = self.__status.codes
+            if codes is not None and self.__status.idx is None:
+                codes = codes.reshape(-1)
+            status = {"table": self.__status.table,
+                      "codes": writer.add(codes),
+                      "idx": writer.add(self.__status.idx)}
+
+        return {"name": self.__name,
+                "title": self.__title,
+                "label": self.__label,
+                "href": self.__href,
+                "source": self.__source,
+                "dtype": None if self.__dtype is None else np.dtype(self.__dtype).str,
+                "dimensions": [{"id": dim.did, "role": dim.role, "json": dim._to_json()}
+                               for dim in self.__pos2dim],
+                "size": self.__pos2size,
+                "value": value,
+                "status": status}
+
+    @staticmethod
+    def __integral_to_snapshot(writer, integral):
+        """integral flags of values (bool or boolean array) into the snapshot header"""
+        if isinstance(integral, np.ndarray):
+            return writer.add(integral)
+        return integral
+
+    @staticmethod
+    def __integral_from_snapshot(value, reader):
+        integral = value.get("integral", False)
+        if isinstance(integral, dict):
+            return reader.array(integral)
+        return integral
+
+    def _from_snapshot(self, header, reader):
+        """initialize this dataset from a snapshot
+
+        .. warning::
+
+            this is an internal library function (it is not public api)
+
+        :param header: header of the dataset (see _to_snapshot)
+        :param reader: SnapshotReader of the snapshot file
+        :returns: itself to chain calls
+        """
+        self.__name = header["name"]
+        self.__label = header["label"]
+        self.__href = header.get("href")
+        if "value" not in header:
+            # link to a dataset, see _to_snapshot
+            return self
+        self.__title = header["title"]
+        self.__source = header["source"]
+        self.__dtype = header["dtype"]
+
+        self.__pos2size = header["size"]
+        self.__dim_nr = len(self.__pos2size)
+        self.__pos2dim = self.__dim_nr * [None]
+        for dpos, json_data_dim in enumerate(header["dimensions"]):
+            did = json_data_dim["id"]
+            dimension = JsonStatDimension(did, self.__pos2size[dpos], dpos, json_data_dim["role"])
+            dimension.from_json(json_data_dim["json"])
+            self.__did2dim[did] = dimension
+            self.__pos2dim[dpos] = dimension
+            if dimension.label is not None:
+                self.__lbl2dim[dimension.label] = dimension
+
+        size_total = reduce(lambda x, y: x * y, self.__pos2size, 1)
+        value = header["value"]
+        if value["storage"] == "sparse":
+            self.__value = SparseStorage(reader.array(value["idx"]), reader.array(value["array"]),
+                                         reader.array(value["mask"]), size_total,
+                                         self.__integral_from_snapshot(value, reader))
+        else:
+            self.__value = DenseStorage(reader.array(value["array"]), reader.array(value["mask"]),
+                                        self.__integral_from_snapshot(value, reader))
+
+        status = header["status"]
+        if status is not None:
+            self.__status = StatusStorage(status["table"], reader.array(status["codes"]),
+                                          reader.array(status["idx"]), size_total)
+
+        self.__compute_pos2mult()
+        self.__valid = True
+        return self
+
     #
     # Parsing code
     #
 
-    def from_file(self, filename):
+    def from_file(self, filename, streaming=None, select=None):
         """read a jsonstat from a file and parse it to initialize this dataset.
 
         It is better to use :py:meth:`jsonstat.from_file`
 
+        big files are loaded incrementally, see :py:mod:`jsonstat.streaming`
+
+        >>> import os, jsonstat  # doctest: +ELLIPSIS
+        >>> filename = os.path.join(jsonstat._examples_dir, "www.json-stat.org", "oecd.json")
+        >>> dataset = jsonstat.JsonStatDataSet().from_file(filename, select={"area": ["IT", "FR"]})
+        >>> len(dataset)
+        24
+        >>> dataset.data(area="IT", year="2014")
+        JsonStatValue(idx=11, value=11.7584873, status='e')
+
         :param filename: path of the file.
+        :param streaming: if True "value" and "status" arrays are decoded directly into numpy arrays
+            without building python lists, if None (default) only files bigger than
+            ``jsonstat.streaming.STREAMING_THRESHOLD`` are loaded this way
+        :param select: dict from dimension (id or label) to the categories to load (see :py:meth:`sel`),
+            the dimensions are parsed first and only the selected cells of "value" and "status" are decoded
         :returns: itself to chain calls
         """
-        with open(filename) as f:
-            json_string = f.read()
-            self.from_string(json_string)
+        with map_file(filename) as buf:
+            if select is not None:
+                # arrays are decoded from the mapped file after parsing dimensions
+                return self.from_json(load_buffer(buf, self.__dtype, deferred=True), select)
+            if streaming is None:
+                streaming = use_streaming(buf)
+            if streaming:
+                return self.from_json(load_buffer(buf, self.__dtype))
+            with memoryview(buf) as json_string:
+                self.from_string(json_string)
         return self
 
     def from_string(self, json_string):
@@ -632,29 +1443,57 @@ class JsonStatDataSet:
 
         It is better to use :py:meth:`jsonstat.from_string`
 
-        :param json_string: string containing a jsonstat
+        :param json_string: string (str, bytes or memoryview) containing a jsonstat
         :returns: itself to chain calls
         """
-        json_data = json.loads(json_string)
+        json_data = json_loads(json_string)
         self.from_json(json_data)
         return self
 
-    def from_json(self, json_data):
+    def from_json(self, json_data, select=None):
         """parse a json structure and initialize this dataset
 
         It is better to use py:meth:`jsonstat.from_json`
 
         :param json_data: json structure
+        :param select: dict from dimension (id or label) to the categories to keep,
+            see :py:meth:`from_file`
         :returns: itself to chain calls
         """
         if "version" in json_data:
             # assume version 2
-            self._from_json_v2(json_data)
+            self._from_json_v2(json_data, select)
         else:
-            self._from_json_v1(json_data)
+            self._from_json_v1(json_data, select)
         return self
 
-    def _from_json_v1(self, json_data):
+    def __project(self, select):
+        """keeps only the selected categories, not yet decoded arrays are decoded only for the selected cells
+
+        :param select: see :py:meth:`from_file`, None to keep all categories
+        """
+        deferred = isinstance(self.__value, DeferredArray) or isinstance(self.__status, DeferredArray)
+        if select is None and not deferred:
+            return
+        key, lpos = self.__sel_keys({} if select is None else select)
+        idx = None
+        if deferred and select is not None:
+            # selected cells in the order of the projected dataset (None decodes all cells)
+            idx = np.ravel_multi_index(np.ix_(*lpos), self.__pos2size).reshape(-1)
+        pos2size = self.__pos2size
+        self.__value = self.__select_storage(self.__value, pos2size, key, idx)
+        if self.__status is not None:
+            self.__status = self.__select_storage(self.__status, pos2size, key, idx)
+        self.__select_dimensions(self.__pos2dim, lpos)
+        self.__compute_pos2mult()
+
+    @staticmethod
+    def __select_storage(storage, pos2size, key, idx):
+        if isinstance(storage, DeferredArray):
+            return storage.load(idx)
+        return storage.select(pos2size, key)
+
+    def _from_json_v1(self, json_data, select=None):
         """parse a json structure according to jsonstat format version 1.x
 
         .. warning::
@@ -662,6 +1501,7 @@ class JsonStatDataSet:
             this is an internal library function (it is not public api)
 
         :param json_data: json structure
+        :param select: categories to keep, see :py:meth:`from_file`
         """
 
         if 'label' in json_data:
@@ -679,39 +1519,10 @@ class JsonStatDataSet:
         if 'value' not in json_data:
             msg = "dataset '{}': missing 'value' key".format(self.__name)
             raise JsonStatMalformedJson(msg)
-        self.__value = json_data['value']
-
-        if len(self.__value) == 0:
+        if len(json_data['value']) == 0:
             msg = "dataset '{}': field 'value' is empty".format(self.__name)
             raise JsonStatMalformedJson(msg)
 
-        # https://json-stat.org/format/#status
-        # parsing status
-        #
-        # eurostat has the following structure for status
-        # status : {
-        #   'value' : { "": "" }
-        #   'category' : { ... }
-        # }
-
-        if 'status' in json_data:
-            self.__status = json_data['status']
-            if isinstance(self.__status, list):
-                if len(self.__status) != 1 and len(self.__status) != len(
-                        self.__value):
-                    msg = "dataset '{}': incorrect size of status fields"
-                    raise JsonStatMalformedJson(msg)
-            if isinstance(self.__status, dict):
-                # convert key into int
-                # eurostat data has incorrect status { "":"" }
-                nd = {}
-                for k, v in self.__status.items():
-                    try:
-                        nd[int(k)] = v
-                    except ValueError:
-                        pass
-                self.__status = nd
-
         #
         # parsing dimension
         #
@@ -754,15 +1565,33 @@ class JsonStatDataSet:
 
         # validate
         size_total = reduce(lambda x, y: x * y, self.__pos2size)
+        self.__parse_value(json_data['value'], size_total)
+        if isinstance(self.__value, DeferredArray) and len(self.__value) != size_total:
+            # the length of a not decoded array is an upper bound (strings containing commas)
+            self.__value = self.__value.load()
         if len(self.__value) != size_total:
             msg = "dataset '{}': size {} is different from calculate size {} by dimension"
             msg = msg.format(self.__name, len(self.__value), size_total)
             raise JsonStatMalformedJson(msg)
 
+        # https://json-stat.org/format/#status
+        # parsing status
+        #
+        # eurostat has the following structure for status
+        # status : {
+        #   'value' : { "": "" }
+        #   'category' : { ... }
+        # }
+
+        if 'status' in json_data:
+            # eurostat data has incorrect status { "":"" }, not integer keys are skipped
+            self.__parse_status(json_data['status'], strict=False)
+
         self.__compute_pos2mult()
         self.__valid = True
+        self.__project(select)
 
-    def _from_json_v2(self, json_data):
+    def _from_json_v2(self, json_data, select=None):
         """parse a jsonstat structure compliant to jsonstat format version 2.x
 
         .. warning::
@@ -770,6 +1599,7 @@ class JsonStatDataSet:
             this is an internal library function (it is not public api)
 
         :param json_data: json structure
+        :param select: categories to keep, see :py:meth:`from_file`
 
         keys to be parsed
         - version
@@ -811,9 +1641,7 @@ class JsonStatDataSet:
 
         # value is required
         # https://json-stat.org/format/#value
-        # TODO: value into a numpy array?
-        self.__value = json_data['value']
-        if len(self.__value) == 0:
+        if len(json_data['value']) == 0:
             msg = "dataset '{}': field 'value' is empty".format(self.__name)
             raise JsonStatMalformedJson(msg)
 
@@ -833,18 +1661,13 @@ class JsonStatDataSet:
                 self.__name)
             raise JsonStatMalformedJson(msg)
 
+        size_total = reduce(lambda x, y: x * y, self.__pos2size, 1)
+        self.__parse_value(json_data['value'], size_total)
+
         # https://json-stat.org/format/#status
         # parsing status
         if 'status' in json_data:
-            self.__status = json_data['status']
-            if isinstance(self.__status, list):
-                if len(self.__status) != 1 and len(self.__status) != len(
-                        self.__value):
-                    msg = "dataset '{}': incorrect size of status fields"
-                    raise JsonStatMalformedJson(msg)
-            if isinstance(self.__status, dict):
-                # convert key into int
-                self.__status = {int(k): v for k, v in self.__status.items()}
+            self.__parse_status(json_data['status'])
 
         # dimension
         json_data_roles = None
@@ -857,6 +1680,87 @@ class JsonStatDataSet:
 
         self.__compute_pos2mult()
         self.__valid = True
+        self.__project(select)
+
+    def __parse_value(self, json_data_value, size_total):
+        """Store the values into a typed numpy array
+
+        json "value" can be an array or an object ({"<index>": value, ...}),
+        in the latter case values are stored into a SparseStorage.
+
+        :param json_data_value: list of values or dict from index to value
+        :param size_total: number of cells of the dataset (product of dimension sizes)
+        """
+        if isinstance(json_data_value, (DenseStorage, DeferredArray)):
+            # already decoded (or to be decoded after projection) by jsonstat.streaming
+            self.__value = json_data_value
+        elif isinstance(json_data_value, dict):
+            idx, array, mask, integral = sparse_values_to_arrays(json_data_value, self.__dtype)
+            if len(idx) > 0 and (idx[0] < 0 or idx[-1] >= size_total):
+                msg = "dataset '{}': index {} of 'value' is out of calculate size {} by dimension"
+                msg = msg.format(self.__name, idx[0] if idx[0] < 0 else idx[-1], size_total)
+                raise JsonStatMalformedJson(msg)
+            self.__value = SparseStorage(idx, array, mask, size_total, integral)
+        else:
+            self.__value = DenseStorage(*values_to_array(json_data_value, self.__dtype))
+
+    def __parse_status(self, json_data_status, strict=True):
+        """Store the status as a table of distinct status plus an array of codes
+
+        json "status" can be a string (same status for all cells), an array
+        or an object ({"<index>": status, ...}), in the latter case only the codes
+        of the cells with a status are stored.
+
+        :param json_data_status: string, list of status or dict from index to status
+        :param strict: if False keys of json "status" object which are not integer are skipped
+        """
+        size_total = reduce(lambda x, y: x * y, self.__pos2size, 1)
+        if isinstance(json_data_status, DeferredArray):
+            if len(json_data_status) == size_total and size_total != 1:
+                # decoded after projection
+                self.__status = json_data_status
+                return
+            json_data_status = json_data_status.load()
+
+        if json_data_status is None:
+            self.__status = None
+        elif isinstance(json_data_status, StatusStorage):
+            # already decoded by jsonstat.streaming
+            if json_data_status.size == 1:
+                status = json_data_status.get(0)
+                self.__status = None if status is None else StatusStorage.constant(status, size_total)
+            elif json_data_status.size == size_total:
+                self.__status = json_data_status
+            else:
+                msg = "dataset '{}': incorrect size of status fields".format(self.__name)
+                raise JsonStatMalformedJson(msg)
+        elif isinstance(json_data_status, list):
+            if len(json_data_status) == 1:
+                status = json_data_status[0]
+                self.__status = None if status is None else StatusStorage.constant(status, size_total)
+            elif len(json_data_status) == size_total:
+                self.__status = StatusStorage.dense(json_data_status)
+            else:
+                msg = "dataset '{}': incorrect size of status fields".format(self.__name)
+                raise JsonStatMalformedJson(msg)
+        elif isinstance(json_data_status, dict):
+            # convert key into int
+            lidx = []
+            lstatus = []
+            for k, v in json_data_status.items():
+                try:
+                    i = int(k)
+                except ValueError:
+                    if strict:
+                        raise
+                    continue
+                if 0 <= i < size_total:
+                    lidx.append(i)
+                    lstatus.append(v)
+            idx = np.array(lidx, dtype=np.int64)
+            self.__status = StatusStorage.sparse(idx, lstatus, size_total)
+        else:
+            self.__status = StatusStorage.constant(json_data_status, size_total)
 
     def __parse_dimensions(self, json_data_dimension, json_data_roles,
                            pos2iid):
@@ -889,7 +1793,8 @@ class JsonStatDataSet:
                 raise JsonStatException(msg)
 
             dimension = JsonStatDimension(dname, dsize, dpos, roles.get(dname))
-            dimension.from_json(json_data_dimension[dname])
+            # categories are indexed on first use
+            dimension.from_json(json_data_dimension[dname], lazy=True)
             self.__did2dim[dname] = dimension
             self.__pos2dim[dpos] = dimension
             if dimension.label is not None:
@@ -5,21 +5,63 @@
 
 # stdlib
 from collections import namedtuple
-import json
 
 # packages
+import numpy as np
+import pandas as pd
 import terminaltables
 
 # jsonstat
+from jsonstat.backend import loads as json_loads
 from jsonstat.exceptions import JsonStatException
 from jsonstat.exceptions import JsonStatMalformedJson
 
 JsonStatCategory = namedtuple('JsonStatCategory', ['label', 'index', 'pos'])
 
 
+def _pack_strings(array):
+    """packs an object array of strings (or None) into one utf-8 bytes, strings are separated by NUL
+
+    :returns: (packed, missing) packed is bytes or the list of values when they cannot be packed,
+        missing is a bool array (True where the value is None) or None
+    """
+    values = array.tolist()
+    missing = np.equal(array, None)
+    if missing.any():
+        values = ["" if v is None else v for v in values]
+    else:
+        missing = None
+    if all(type(v) is str and "\0" not in v for v in values):
+        return "\0".join(values).encode("utf-8"), missing
+    return values, missing
+
+
+def _unpack_strings(packed, missing, size):
+    """inverse of _pack_strings
+
+    :returns: read only object array of length size
+    """
+    array = np.empty(size, dtype=object)
+    if isinstance(packed, bytes):
+        array[:] = packed.decode("utf-8").split("\0") if size > 0 else []
+    else:
+        array[:] = packed
+    if missing is not None:
+        array[missing] = None
+    array.flags.writeable = False
+    return array
+
+
+def _dimension_from_pickle(state):
+    return JsonStatDimension()._from_pickle(state)
+
+
 class JsonStatDimension:
     """Represents a JsonStat Dimension. It is contained into a JsonStat Dataset.
 
+    Categories are stored as an array of indexes, an array of labels and one dict
+    from index or label to position, JsonStatCategory are created on demand.
+
     >>> from jsonstat import JsonStatDimension
     >>> json_string = '''{
     ...                    "label" : "concepts",
@@ -68,6 +110,10 @@ class JsonStatDimension:
     3
     """
 
+    __slots__ = ('__valid', '__did', '__size', '__role', '__pos', '__label', '__unit',
+                 '__json_data_category', '__pos2idx', '__pos2lbl', '__cat2pos', '__cat2pos_has_labels',
+                 '__cat2pos_index')
+
     def __init__(self, did=None, size=None, pos=None, role=None):
         """initialize a dimension
 
@@ -89,12 +135,22 @@ class JsonStatDimension:
         self.__role = role
         self.__pos = pos
         self.__label = None
+        self.__unit = None
+
+        # json of the categories, category tables are built from it on first use
+        self.__json_data_category = None
+
+        # if indexes are not present in json they are deduced from labels
+        # if labels are not present in json __pos2lbl will be None
+        self.__pos2idx = None  # array pos -> idx
+        self.__pos2lbl = None  # array pos -> lbl (None if category has no label)
+        self.__cat2pos = None  # dict idx or lbl -> pos, indexes take precedence over labels
 
-        # if indexes are not present in json __idx2cat will be None
-        # if labels  are not present in json __lbl2cat will be None
-        self.__pos2cat = None  # int -> cat
-        self.__idx2cat = None  # idx -> cat
-        self.__lbl2cat = None  # lbl -> cat
+        # labels are added to __cat2pos on first lookup by label
+        self.__cat2pos_has_labels = False
+
+        # pandas index on __cat2pos, built on first use (see _cat2pos_array)
+        self.__cat2pos_index = None
 
     #
     # queries
@@ -125,8 +181,10 @@ class JsonStatDimension:
         return self.__size
 
     def __to_list(self):
+        self.__build_categories()
         lst = [["pos", "idx", "label"]]
-        for cat in self.__pos2cat:
+        for pos in range(self.__size):
+            cat = self._pos2cat(pos)
             idx = cat.index
             lbl = cat.label
             if idx is None: idx = ""
@@ -137,7 +195,7 @@ class JsonStatDimension:
         return lst
 
     def __str__(self):
-        if self.__pos2cat is None:
+        if not self.__valid:
             return ""
 
         lst = self.__to_list()
@@ -178,23 +236,18 @@ class JsonStatDimension:
         :param spec: can be index (string) or label (string) or a position (integer)
         :returns: a JsonStatCategory
         """
-        if not self.__valid:
-            raise JsonStatException("dimension '{}': is not initialized".format(self.__did))
-
-        if isinstance(spec, int) and spec < len(self.__pos2cat):
-            cat = self.__pos2cat[spec]
-            return cat
-
-        # try first indexes
-        if spec in self.__idx2cat:
-            cat = self.__idx2cat[spec]
-            return cat
+        self.__build_categories()
 
-        if self.__lbl2cat is not None and spec in self.__lbl2cat:
-            cat = self.__lbl2cat[spec]
-            return cat
+        if isinstance(spec, int) and spec < self.__size:
+            return self.__category_at(spec)
 
-        raise JsonStatException("dimension '{}': unknown index or label '{}'".format(self.__did, spec))
+        # indexes take precedence over labels
+        pos = self.__cat2pos.get(spec)
+        if pos is None and not self.__cat2pos_has_labels:
+            pos = self._cat2pos_dict().get(spec)
+        if pos is None:
+            raise JsonStatException("dimension '{}': unknown index or label '{}'".format(self.__did, spec))
+        return self.__category_at(pos)
 
     def _pos2cat(self, pos):
         """get the category associated with the position (integer)
@@ -203,11 +256,93 @@ class JsonStatDimension:
         :returns: the label or None if the label not exists at position pos
             ex.: JsonStatCategory(index='2013', label='2013', pos=pos)
         """
-        if not self.__valid:
-            raise JsonStatException("dimension '{}': is not initialized".format(self.__did))
-        if self.__pos2cat is None:
-            return None
-        return self.__pos2cat[pos]
+        self.__build_categories()
+        return self.__category_at(pos)
+
+    def __category_at(self, pos):
+        label = None if self.__pos2lbl is None else self.__pos2lbl[pos]
+        return JsonStatCategory(label, self.__pos2idx[pos], pos)
+
+    def _pos2idx_array(self):
+        """indexes of all categories ordered by position
+
+        :returns: read only numpy array (dtype object) of length len(self)
+        """
+        self.__build_categories()
+        return self.__pos2idx
+
+    def _pos2lbl_array(self):
+        """labels of all categories ordered by position, index is used when label is missing
+
+        :returns: read only numpy array (dtype object) of length len(self)
+        """
+        self.__build_categories()
+        if self.__pos2lbl is None:
+            return self.__pos2idx
+        missing = np.equal(self.__pos2lbl, None)
+        if not missing.any():
+            return self.__pos2lbl
+        return np.where(missing, self.__pos2idx, self.__pos2lbl)
+
+    def _cat2pos_dict(self):
+        """dictionary from index or label of categories to position
+
+        indexes take precedence over labels (as in category())
+
+        :returns: a dict
+        """
+        self.__build_categories()
+        if not self.__cat2pos_has_labels:
+            self.__add_labels_to_cat2pos()
+        return self.__cat2pos
+
+    def __add_labels_to_cat2pos(self):
+        cat2pos = self.__cat2pos
+        if self.__pos2lbl is not None:
+            for idx, lbl in zip(self.__pos2idx.tolist(), self.__pos2lbl.tolist()):
+                if lbl is not None:
+                    old_pos = cat2pos.get(lbl)
+                    if old_pos is None or self.__pos2idx[old_pos] != lbl:
+                        # same int object of the index
+                        cat2pos[lbl] = cat2pos[idx]
+        self.__cat2pos_has_labels = True
+
+    def _cat2pos_array(self, specs):
+        """vectorized version of category(spec).pos
+
+        :param specs: list or array of indexes or labels (strings) or of positions (integers)
+        :returns: numpy array of positions
+        """
+        self.__build_categories()
+
+        array = np.asarray(specs)
+        if array.dtype.kind in 'iu':
+            specs = array
+            positions = specs.astype(np.int64)
+            wrong = (positions < 0) | (positions >= self.__size)
+        else:
+            if self.__cat2pos_index is None:
+                cat2pos = self._cat2pos_dict()
+                self.__cat2pos_index = (pd.Index(list(cat2pos.keys()), dtype=object),
+                                        np.fromiter(cat2pos.values(), dtype=np.int64, count=len(cat2pos)))
+            index, pos = self.__cat2pos_index
+            # dtype object: positions mixed with indexes or labels are not converted to strings
+            specs = array if array.dtype.kind == 'O' else np.asarray(specs, dtype=object)
+            found = index.get_indexer(specs)
+            wrong = found < 0
+            positions = pos[found]
+            if wrong.any():
+                lpos = np.flatnonzero(wrong)
+                is_pos = np.fromiter((isinstance(spec, (int, np.integer)) for spec in specs[lpos]),
+                                     dtype=bool, count=len(lpos))
+                lpos = lpos[is_pos]
+                positions[lpos] = specs[lpos].astype(np.int64)
+                wrong[lpos] = (positions[lpos] < 0) | (positions[lpos] >= self.__size)
+
+        if wrong.any():
+            spec = specs[np.flatnonzero(wrong)[0]]
+            raise JsonStatException("dimension '{}': unknown index or label '{}'".format(self.__did, spec))
+        return positions
 
     def _idx2pos(self, idx):
         """from index to position
@@ -215,11 +350,11 @@ class JsonStatDimension:
         :param idx: index for ex.: "2013"
         :returns: integer
         """
-        if not self.__valid:
-            raise JsonStatException("dimension '{}': is not initialized".format(self.__did))
-        if idx not in self.__idx2cat:
+        self.__build_categories()
+        pos = self.__cat2pos.get(idx)
+        if pos is None or self.__pos2idx[pos] != idx:
             raise JsonStatException("dimension '{}': do not have index '{}'".format(self.__did, idx))
-        return self.__idx2cat[idx].pos
+        return pos
 
     def _lbl2pos(self, lbl):
         """from label to position
@@ -227,11 +362,78 @@ class JsonStatDimension:
         :param lbl: index for ex.: "2013"
         :returns: integer
         """
-        if not self.__valid:
-            raise JsonStatException("dimension '{}': is not initialized".format(self.__did))
-        if lbl not in self.__idx2cat:
+        pos = self._cat2pos_dict().get(lbl)
+        if pos is not None and self.__pos2lbl is not None and self.__pos2lbl[pos] != lbl:
+            # label equals to the index of another category
+            lpos = np.flatnonzero(self.__pos2lbl == lbl)
+            pos = int(lpos[-1]) if len(lpos) else None
+        if pos is None or self.__pos2lbl is None:
             raise JsonStatException("dimension '{}': do not have label {}".format(self.__did, lbl))
-        return self.__lbl2cat[lbl].pos
+        return pos
+
+    def _select(self, lpos):
+        """returns a new dimension containing only the categories at positions lpos
+
+        :param lpos: list of positions
+        :returns: a JsonStatDimension
+        """
+        self.__build_categories()
+        dimension = JsonStatDimension(self.__did, len(lpos), self.__pos, self.__role)
+        return dimension.from_json(self._to_json(lpos))
+
+    def _to_json(self, lpos=None):
+        """json structure representing this dimension (as in jsonstat format version 2)
+
+        :param lpos: positions of the categories to include, None for all categories
+        :returns: a dict
+        """
+        self.__build_categories()
+        pos2idx = self.__pos2idx if lpos is None else self.__pos2idx[lpos]
+        pos2lbl = self.__pos2lbl if lpos is None or self.__pos2lbl is None else self.__pos2lbl[lpos]
+
+        json_data_category = {"index": pos2idx.tolist()}
+        if pos2lbl is not None:
+            labels = {idx: lbl for idx, lbl in zip(pos2idx.tolist(), pos2lbl.tolist()) if lbl is not None}
+            if labels:
+                json_data_category["label"] = labels
+        if self.__unit is not None:
+            json_data_category["unit"] = {idx: self.__unit[idx] for idx in pos2idx.tolist() if idx in self.__unit}
+
+        json_data = {"category": json_data_category}
+        if self.__label is not None:
+            json_data["label"] = self.__label
+        return json_data
+
+    #
+    # pickle
+    #
+
+    def __reduce__(self):
+        """pickles indexes and labels as packed strings, the lookup dict is rebuilt on unpickling"""
+        if not self.__valid:
+            return JsonStatDimension, (self.__did, self.__size, self.__pos, self.__role)
+        self.__build_categories()
+        state = (self.__did, self.__size, self.__pos, self.__role, self.__label, self.__unit,
+                 _pack_strings(self.__pos2idx),
+                 None if self.__pos2lbl is None else _pack_strings(self.__pos2lbl))
+        return _dimension_from_pickle, (state,)
+
+    def _from_pickle(self, state):
+        """initialize this dimension from the state returned by __reduce__
+
+        .. warning::
+
+            this is an internal library function (it is not public api)
+
+        :returns: itself to chain calls
+        """
+        self.__did, self.__size, self.__pos, self.__role, self.__label, self.__unit, idx, lbl = state
+        self.__pos2idx = _unpack_strings(*idx, self.__size)
+        if lbl is not None:
+            self.__pos2lbl = _unpack_strings(*lbl, self.__size)
+        # the lookup dict is built on first use
+        self.__valid = True
+        return self
 
     #
     # parsing methods
@@ -243,11 +445,11 @@ class JsonStatDimension:
         :param json_string:
         :returns: itself to chain calls
         """
-        json_data = json.loads(json_string)
+        json_data = json_loads(json_string)
         self.from_json(json_data)
         return self
 
-    def from_json(self, json_data):
+    def from_json(self, json_data, lazy=False):
         """Parse a json structure representing a dimension
 
         From `json-stat.org <https://json-stat.org/format/#dimensionid>`_
@@ -272,6 +474,8 @@ class JsonStatDimension:
             },
 
         :param json_data:
+        :param lazy: if True the category tables are built on first use
+            (f.e. when calling :py:meth:`category`), only the size of the dimension is validated
         :returns: itself to chain call
         """
         # children category, label, class
@@ -288,11 +492,39 @@ class JsonStatDimension:
             msg = "dimension '{}': missing category key".format(self.__did)
             raise JsonStatMalformedJson(msg)
 
-        self.__parse_category(json_data['category'])
+        json_data_category = json_data['category']
+        if 'index' not in json_data_category and 'label' not in json_data_category:
+            msg = "dimension '{}': one of keys 'label' or 'index' must be presents"
+            raise JsonStatMalformedJson(msg)
 
+        # number of categories
+        nr_cats = len(json_data_category['index'] if 'index' in json_data_category else json_data_category['label'])
+        if self.__size is None:
+            self.__size = nr_cats
+        elif lazy and 'index' in json_data_category and nr_cats != self.__size:
+            msg = "dimension '{}': malformed json: number of indexes {} not match with size {}"
+            msg = msg.format(self.__did, nr_cats, self.__size)
+            raise JsonStatMalformedJson(msg)
+
+        if lazy:
+            self.__json_data_category = json_data_category
+        else:
+            self.__parse_category(json_data_category)
         self.__valid = True
         return self
 
+    def __build_categories(self):
+        """checks that dimension is initialized and builds the category tables on first use"""
+        if not self.__valid:
+            raise JsonStatException("dimension '{}': is not initialized".format(self.__did))
+        if self.__cat2pos is None:
+            if self.__json_data_category is not None:
+                self.__parse_category(self.__json_data_category)
+                self.__json_data_category = None
+            else:
+                # unpickled dimension
+                self.__cat2pos = {idx: pos for pos, idx in enumerate(self.__pos2idx.tolist())}
+
     def __parse_category(self, json_data_category):
         """It is used to describe the possible values of a dimension.
         See https://json-stat.org/format/#category
@@ -325,34 +557,29 @@ class JsonStatDimension:
             raise JsonStatMalformedJson(msg)
 
         if 'index' in json_data_category:
-            self.__parse_json_index(json_data_category)
+            idx2pos = self.__parse_json_index(json_data_category)
+        else:
+            idx2pos = None
 
         if 'label' in json_data_category:
-            self.__parse_json_label(json_data_category)
-
-        # validate: number of indexes and labels must the same??
-        if self.__idx2cat is not None and self.__lbl2cat is not None:
-            if len(self.__idx2cat) != len(self.__lbl2cat):
-                # TODO: cannot raise exception, emit warning see hierarchy.json
-                msg = "dimension '{}': the number of indexes ({}) are different of the numbers of labels ({})"
-                msg = msg.format(self.__did, len(self.__idx2cat), len(self.__lbl2cat))
-                # raise JsonStatMalformedJson(msg)
-            if len(self.__idx2cat) < len(self.__lbl2cat):
-                msg = "dimension '{}': the number of labels ({}) are greater than number of indexes ({})"
-                msg = msg.format(self.__did, len(self.__lbl2cat), len(self.__idx2cat))
-                raise JsonStatMalformedJson(msg)
+            idx2pos = self.__parse_json_label(json_data_category, idx2pos)
 
         # validate: indexes must be consistent with size
-        if self.__size != len(self.__idx2cat):
+        if self.__size != len(idx2pos):
             msg = "dimension '{}': malformed json: number of indexes {} not match with size {}"
-            msg = msg.format(self.__did, len(self.__idx2cat), self.__size)
+            msg = msg.format(self.__did, len(idx2pos), self.__size)
             raise JsonStatMalformedJson(msg)
 
         # validate: no hole in the indexes
-        if any(v is None for v in self.__pos2cat):
+        if np.equal(self.__pos2idx, None).any():
             msg = "dimension '{}':hole in index".format(self.__did)
             raise JsonStatMalformedJson(msg)
 
+        self.__pos2idx.flags.writeable = False
+        if self.__pos2lbl is not None:
+            self.__pos2lbl.flags.writeable = False
+        self.__cat2pos = idx2pos
+
         # "category_unit": {
         #                      "type": "object",
         #                      "properties": {
@@ -405,69 +632,64 @@ class JsonStatDimension:
         for ex. the json structure could be
             "category" : { "index" : { "2003" : 0, "2004" : 1, "2005" : 2, "2006" : 3 }
         :param json_data: json structure
+        :returns: dict from index to position
         """
 
         json_data_index = json_data['index']
         if self.__size is None:
             self.__size = len(json_data_index)
 
-        self.__idx2cat = {}
-
-        # preallocate a list of length self.size with default value None
-        self.__pos2cat = self.__size * [None]
+        # preallocate an array of length self.size with default value None
+        self.__pos2idx = np.full(self.__size, None, dtype=object)
 
         if type(json_data_index) is list:
-            for pos, idx in enumerate(json_data_index):
-                self.__parse_json_index_helper(idx, pos)
-        else:
-            for idx, pos in json_data_index.items():
-                self.__parse_json_index_helper(idx, pos)
-
-    def __parse_json_index_helper(self, idx, pos):
-        if pos >= self.__size:
-            msg = "dimension '{}': index {} is greater than size {}"
-            msg = msg.format(self.__did, pos, self.__size)
-            raise JsonStatException(msg)
-
-        cat = JsonStatCategory(pos=pos, index=idx, label=None)
-        self.__pos2cat[pos] = cat
-        self.__idx2cat[idx] = cat
-
-    def __parse_json_label(self, json_data):
+            if len(json_data_index) > self.__size:
+                msg = "dimension '{}': index {} is greater than size {}"
+                msg = msg.format(self.__did, len(json_data_index) - 1, self.__size)
+                raise JsonStatException(msg)
+            self.__pos2idx[:len(json_data_index)] = json_data_index
+            return {idx: pos for pos, idx in enumerate(json_data_index)}
+
+        for idx, pos in json_data_index.items():
+            if pos >= self.__size:
+                msg = "dimension '{}': index {} is greater than size {}"
+                msg = msg.format(self.__did, pos, self.__size)
+                raise JsonStatException(msg)
+            self.__pos2idx[pos] = idx
+        return dict(json_data_index)
+
+    def __parse_json_label(self, json_data, idx2pos):
         """parse label structure
 
             "category" : {"label" : { "CA" : "Canada" }}
         :param json_data: json structure to parse
+        :param idx2pos: dict from index to position, None if indexes are not present into the json
+        :returns: dict from index to position
         """
 
         json_data_label = json_data['label']
         if self.__size is None:
             self.__size = len(json_data_label)
 
-        no_index = 'index' not in json_data
-        if no_index:
-            # self.__size = len(json_data['label'])
-            self.__pos2cat = self.__size * [None]
-            self.__idx2cat = {}
-
-        self.__lbl2cat = {}
-
-        for i, (idx, lbl) in enumerate(json_data_label.items()):
-
-            if no_index:
-                # if index are not defined in json, give an order to the label
-                pos = i
-                cat = JsonStatCategory(pos=pos, label=lbl, index=idx)
-            else:
-                cat = self.__idx2cat.get(idx)
-                if cat is None:
-                    msg = "dimension '{}': label '{}' is associated with index '{}' that not exists!"
-                    msg = msg.format(self.__did, lbl, idx)
-                    raise JsonStatMalformedJson(msg)
-                pos = cat.pos
-                cat = JsonStatCategory(pos=pos, label=lbl, index=idx)
-
-            self.__pos2cat[pos] = cat
-            # if only labels are present into the json,  deduce indexes from labels
-            self.__idx2cat[idx] = cat
-            self.__lbl2cat[lbl] = cat
+        self.__pos2lbl = np.full(self.__size, None, dtype=object)
+
+        if idx2pos is None:
+            # if index are not defined in json, give an order to the label
+            # and deduce indexes from labels
+            if len(json_data_label) > self.__size:
+                msg = "dimension '{}': index {} is greater than size {}"
+                msg = msg.format(self.__did, len(json_data_label) - 1, self.__size)
+                raise JsonStatException(msg)
+            self.__pos2idx = np.full(self.__size, None, dtype=object)
+            self.__pos2idx[:len(json_data_label)] = list(json_data_label.keys())
+            self.__pos2lbl[:len(json_data_label)] = list(json_data_label.values())
+            return {idx: pos for pos, idx in enumerate(json_data_label.keys())}
+
+        for idx, lbl in json_data_label.items():
+            pos = idx2pos.get(idx)
+            if pos is None:
+                msg = "dimension '{}': label '{}' is associated with index '{}' that not exists!"
+                msg = msg.format(self.__did, lbl, idx)
+                raise JsonStatMalformedJson(msg)
+            self.__pos2lbl[pos] = lbl
+        return idx2pos
@@ -13,6 +13,7 @@ import requests
 
 # jsonstat
 from jsonstat.exceptions import JsonStatException
+from jsonstat.utility import open_file
 
 
 class Downloader:
@@ -117,11 +118,11 @@ class Downloader:
 
     @staticmethod
     def __read_page_from_file(pathname):
-        """it reads content from pathname
+        """it reads content from pathname, compressed files (gzip, bz2, xz) are decompressed
 
         :param pathname:
         """
-        with open(pathname, 'r') as f:
-            content = f.read()
+        with open_file(pathname) as f:
+            content = f.read().decode('utf-8')
         return content
 
@@ -15,6 +15,8 @@ class JsonStatException(Exception):
     #     # Now for your custom code...
     #     self.errors = errors
     def __init__(self, value):
+        # args are used to pickle the exception (f.e. raised into a worker process)
+        super().__init__(value)
         self.value = value
 
     def __str__(self):
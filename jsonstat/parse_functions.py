@@ -4,21 +4,45 @@
 # See LICENSE file
 
 # stdlib
-from collections import OrderedDict
-import json
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+import glob
 
 # jsonstat
 from jsonstat.exceptions import JsonStatMalformedJson
+from jsonstat.backend import loads as json_loads
 from jsonstat.downloader import *
 from jsonstat.collection import JsonStatCollection
 from jsonstat.dataset import JsonStatDataSet
 from jsonstat.dimension import JsonStatDimension
+from jsonstat.snapshot import SnapshotReader
+from jsonstat.snapshot import SnapshotWriter
+from jsonstat.shared import attach_segment
+from jsonstat.shared import detach_segment
+from jsonstat.streaming import load_buffer
+from jsonstat.streaming import use_streaming
+from jsonstat.utility import map_file
+from jsonstat.schema import validator as _schema_validator
+from jsonstat.structure import check_structure
+from jsonstat.structure import structure_errors
+
+
+def from_file(filename, streaming=None, workers=None, select=None, check=False):
+    """read a file containing a jsonstat format and return the appropriate object
 
+    big files are loaded incrementally: "value" and "status" arrays are decoded
+    directly into numpy arrays, see :py:mod:`jsonstat.streaming`
 
-def from_file(filename):
-    """read a file containing a jsonstat format and return the appropriate object
+    gzip, bz2 and xz compressed files are decompressed into a temporary file, see :py:meth:`jsonstat.utility.map_file`
 
     :param filename: file containing a jsonstat
+    :param streaming: True to force, False to disable the incremental loading,
+        None (default) to use it only for files bigger than ``jsonstat.streaming.STREAMING_THRESHOLD``
+        (compressed files are measured decompressed)
+    :param workers: number of processes parsing the datasets of a collection, see :py:meth:`jsonstat.from_json`
+    :param select: dict from dimension to the categories to load, dimensions are parsed first and only
+        the selected cells are decoded, see :py:meth:`jsonstat.JsonStatDataSet.from_file`
+    :param check: if True the structure is validated before parsing, see :py:meth:`jsonstat.from_json`
     :returns: a JsonStatCollection, JsonStatDataset or JsonStatDimension object
 
     example
@@ -29,32 +53,53 @@ def from_file(filename):
     >>> type(o)
     <class 'jsonstat.collection.JsonStatCollection'>
     """
-    with open(filename) as f:
-        json_string = f.read()
-        return from_string(json_string)
-
-
-def from_string(json_string):
+    with map_file(filename) as buf:
+        if select is not None:
+            # arrays are decoded from the mapped file after parsing dimensions
+            return from_json(load_buffer(buf, deferred=True), workers, select, check)
+        if streaming is None:
+            streaming = use_streaming(buf)
+        if streaming:
+            return from_json(load_buffer(buf), workers, check=check)
+        with memoryview(buf) as json_string:
+            return from_string(json_string, workers, check)
+
+
+def from_string(json_string, workers=None, check=False):
     """parse a jsonstat string and return the appropriate object
 
-    :param json_string: string containing a json
+    the json is decoded by the fastest installed json library,
+    see :py:meth:`jsonstat.json_backend`
+
+    :param json_string: string (str, bytes or memoryview) containing a json
+    :param workers: number of processes parsing the datasets of a collection, see :py:meth:`jsonstat.from_json`
+    :param check: if True the structure is validated before parsing, see :py:meth:`jsonstat.from_json`
     :returns: a JsonStatCollection, JsonStatDataset or JsonStatDimension object
     """
     try:
-        json_data = json.loads(json_string, object_pairs_hook=OrderedDict)
-    except json.decoder.JSONDecodeError:
+        json_data = json_loads(json_string)
+    except ValueError:
         raise JsonStatException("invalid json")
-    return from_json(json_data)
+    return from_json(json_data, workers, check=check)
 
 
-def from_json(json_data):
+def from_json(json_data, workers=None, select=None, check=False):
     """transform a json structure into jsonstat objects hierarchy
 
+    the datasets of a collection are parsed on first access, with workers
+    they are all parsed at once by a pool of processes.
+
     :param json_data: data structure (dictionary) representing a json
+    :param workers: None (default) to parse datasets of a collection on first access,
+        or the number of processes parsing all of them
+    :param select: categories to keep for each dataset, see :py:meth:`jsonstat.JsonStatDataSet.from_file`
+    :param check: if True the structure of all the datasets is validated before parsing them,
+        see :py:meth:`jsonstat.structure_errors`. Otherwise some errors (f.e. in the categories)
+        are found only on first access.
     :returns: a JsonStatCollection, JsonStatDataset or JsonStatDimension object
+    :raises JsonStatMalformedJson: if check is True and the structure is not valid
 
     >>> import json, jsonstat
-    >>> from collections import OrderedDict
     >>> json_string_v1 = '''{
     ...                       "oecd" : {
     ...                         "value": [1],
@@ -65,7 +110,7 @@ def from_json(json_data):
     ...                         }
     ...                       }
     ...                     }'''
-    >>> json_data = json.loads(json_string_v1, object_pairs_hook=OrderedDict)
+    >>> json_data = json.loads(json_string_v1)
     >>> jsonstat.from_json(json_data)
     JsonstatCollection contains the following JsonStatDataSet:
     +-----+---------+
@@ -75,6 +120,9 @@ def from_json(json_data):
     +-----+---------+
 
     """
+    if check:
+        check_structure(json_data)
+
     o = None
     if "version" in json_data:
         # if version present assuming version 2 of jsonstat format
@@ -84,7 +132,7 @@ def from_json(json_data):
                 o._from_json_v2(json_data)
             elif json_data["class"] == "dataset":
                 o = JsonStatDataSet()
-                o._from_json_v2(json_data)
+                o._from_json_v2(json_data, select)
             elif json_data["class"] == "dimension":
                 o = JsonStatDimension()
                 o.from_json(json_data)
@@ -96,9 +144,124 @@ def from_json(json_data):
         # if version is not present assuming version 1.0 of jsonstat format
         o = JsonStatCollection()
         o._from_json_v1(json_data)
+
+    if isinstance(o, JsonStatCollection) and (workers is not None or select is not None):
+        o._parse_datasets(workers, select)
     return o
 
 
+def load_snapshot(filename, mmap=True):
+    """load a dataset or a collection saved by save()
+
+    see :py:meth:`jsonstat.JsonStatDataSet.save` and :py:meth:`jsonstat.JsonStatCollection.save`
+
+    :param filename: snapshot file
+    :param mmap: if True (default) values and status are memory mapped (they are not read into memory)
+    :returns: a JsonStatCollection or JsonStatDataset object
+    """
+    return _from_snapshot(SnapshotReader(filename, use_mmap=mmap))
+
+
+def attach_shared(name):
+    """attach a dataset or a collection put into shared memory by to_shared()
+
+    see :py:meth:`jsonstat.JsonStatDataSet.to_shared`, the arrays of the returned object
+    are read only views on the shared memory segment.
+
+    :param name: name of the segment (SharedSegment.name)
+    :returns: a JsonStatCollection or JsonStatDataset object
+    """
+    return _from_snapshot(SnapshotReader.from_bytes(attach_segment(name)))
+
+
+def detach_shared(name):
+    """release the shared memory segment attached by attach_shared in this process
+
+    objects returned by attach_shared must be deleted before.
+
+    :param name: name of the segment
+    """
+    detach_segment(name)
+
+
+def _from_snapshot(reader):
+    header = reader.header
+    if header["class"] == "collection":
+        return JsonStatCollection()._from_snapshot(header, reader)
+    return JsonStatDataSet()._from_snapshot(header["dataset"], reader)
+
+
+def from_files(paths, workers=None, streaming=None):
+    """read many files containing jsonstat
+
+    an error reading or parsing a file does not stop the others: the exception
+    is returned in place of the jsonstat object.
+
+    With workers, files are read (and decompressed) and parsed by a pool of processes,
+    only about workers files are in progress at once.
+
+    :param paths: list of files or a glob pattern (f.e. "data/**/*.json.gz")
+    :param workers: number of processes reading and parsing the files,
+        None (default) to read them one at a time in this process
+    :param streaming: see :py:meth:`jsonstat.from_file`
+    :returns: a dict (in the order of paths) from file to a JsonStatCollection,
+        JsonStatDataset, JsonStatDimension object or to the exception raised loading it
+
+    >>> import os, jsonstat
+    >>> pattern = os.path.join(jsonstat._examples_dir, "www.json-stat.org", "oecd-canada*.json")
+    >>> [type(o).__name__ for o in jsonstat.from_files(pattern).values()]
+    ['JsonStatCollection', 'JsonStatCollection']
+    """
+    if isinstance(paths, str):
+        paths = sorted(glob.glob(paths, recursive=True))
+
+    results = {}
+    if workers is None:
+        for filename in paths:
+            try:
+                results[filename] = from_file(filename, streaming)
+            except Exception as e:
+                results[filename] = e
+        return results
+
+    def collect(filename, future):
+        try:
+            buf = future.result()
+            if buf is None:
+                # not a dataset or collection (dimension), parsed here
+                results[filename] = from_file(filename, streaming)
+            else:
+                results[filename] = _from_snapshot(SnapshotReader.from_bytes(buf))
+        except Exception as e:
+            results[filename] = e
+
+    with ProcessPoolExecutor(max_workers=workers) as parsers:
+        # files are submitted while the results are collected, at most workers + 1 files
+        # are in progress; processes read the files themselves, only paths are sent to them
+        pending = deque()
+        for filename in paths:
+            pending.append((filename, parsers.submit(_from_file_to_bytes, filename, streaming)))
+            if len(pending) > workers:
+                collect(*pending.popleft())
+        while pending:
+            collect(*pending.popleft())
+    return {filename: results[filename] for filename in paths}
+
+
+def _from_file_to_bytes(filename, streaming=None):
+    """reads and parses a file into a process of from_files, it is sent back as snapshot
+
+    :returns: bytes of the snapshot, None if json is not a dataset or a collection
+    """
+    o = from_file(filename, streaming)
+    writer = SnapshotWriter()
+    if isinstance(o, JsonStatCollection):
+        return writer.to_bytes(o._to_snapshot(writer))
+    if isinstance(o, JsonStatDataSet):
+        return writer.to_bytes({"class": "dataset", "dataset": o._to_snapshot(writer)})
+    return None
+
+
 # global module variable (simulate a singleton)
 __downloader__ = None
 
@@ -191,36 +354,41 @@ def from_url(url, pathname=None):
     return from_string(json_string)
 
 
-__json_schema__ = None
+def validate(spec):
+    """Validates a jsonstat (version >= 2.0) against the bundled jsonstat schema
 
+    it stops at the first error, use validation_errors to get all the errors.
 
-def validate(spec):
-    try:
-        import jsonschema
-        import strict_rfc3339  # validate date-time format in jsonschema
-    except ImportError:
-        print("to validate install jsonschema and strict_rfc3339")
-        return
+    :param spec: json string or data structure (dictionary)
+    :returns: True if spec is valid, None if jsonschema or strict_rfc3339 are not installed
+    """
+    errors = validation_errors(spec, fail_fast=True)
+    if errors is None:
+        return None
+    return len(errors) == 0
 
-    from jsonstat.schema import JsonStatSchema
+
+def validation_errors(spec, fail_fast=False):
+    """Returns the errors found validating a jsonstat (version >= 2.0)
+
+    :param spec: json string or data structure (dictionary)
+    :param fail_fast: if True stop at the first error
+    :returns: list of jsonschema.ValidationError in the order they are found,
+        None if jsonschema or strict_rfc3339 are not installed
+    """
+    validator = _schema_validator()
+    if validator is None:
+        print("to validate install jsonschema and strict_rfc3339")
+        return None
 
     if not isinstance(spec, dict):
-        json_data = json.loads(spec, object_pairs_hook=OrderedDict)
+        json_data = json_loads(spec)
     else:
         json_data = spec
     if "version" not in json_data:
         raise JsonStatException("cannot validate jsonstat version < 2.0")
-    # schema = JsonStatSchema()
-    jsonstat_schema_url = "https://json-stat.org/format/schema/2.0/"
-
-    # TODO: caching jsonschema (now it is downloaded everytime)
-    global __json_schema__
-    if __json_schema__ is None:
-        downloader = Downloader(cache_dir=None)
-        __json_schema__ = downloader.download(jsonstat_schema_url)
-
-    schema = json.loads(__json_schema__)
-    validator = jsonschema.Draft7Validator(schema, format_checker=jsonschema.FormatChecker())
-    # validator.validate(json_data)
-    errors = sorted(validator.iter_errors(json_data), key=lambda e: e.path)
-    return len(errors) == 0
+
+    errors = validator.iter_errors(json_data)
+    if fail_fast:
+        return [error for error in [next(errors, None)] if error is not None]
+    return list(errors)
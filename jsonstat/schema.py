@@ -7,6 +7,8 @@
 import os
 import json
 
+__validator__ = None
+
 
 class JsonStatSchema:
     def __init__(self):
@@ -62,3 +64,26 @@ class JsonStatSchema:
     @property
     def all(self):
         return self.__all
+
+
+def validator():
+    """Returns the validator of the bundled jsonstat schema
+
+    The validator is built once per process and cached,
+    the schema is not downloaded.
+
+    :returns: jsonschema validator or None if jsonschema or strict_rfc3339 are not installed
+    """
+    global __validator__
+    if __validator__ is None:
+        try:
+            import jsonschema
+            import strict_rfc3339  # validate date-time format in jsonschema
+        except ImportError:
+            return None
+        format_checker = jsonschema.FormatChecker()
+        if "date-time" not in format_checker.checkers:
+            # recent jsonschema versions check date-time only with rfc3339-validator
+            format_checker.checks("date-time")(strict_rfc3339.validate_rfc3339)
+        __validator__ = jsonschema.Draft7Validator(JsonStatSchema().all, format_checker=format_checker)
+    return __validator__
@@ -0,0 +1,106 @@
+# -*- coding: utf-8 -*-
+# This file is part of https://github.com/26fe/jsonstat.py
+# Copyright (C) 2016-2021 gf <gf@26fe.com>
+# See LICENSE file
+
+# jsonstat
+from jsonstat.value import JsonStatValue
+from jsonstat.exceptions import JsonStatException
+
+
+class JsonStatSelector:
+    """Fast access to the datapoints of a dataset by categories of some dimensions.
+
+    It is created by :py:meth:`jsonstat.JsonStatDataSet.selector`.
+    Positions and multiplicative factors of the dimensions are resolved once,
+    so each lookup is only a few dictionary lookups and integer operations.
+
+    >>> import os, jsonstat  # doctest: +ELLIPSIS
+    >>> filename = os.path.join(jsonstat._examples_dir, "www.json-stat.org", "oecd-canada-col.json")
+    >>> dataset = jsonstat.from_file(filename).dataset(0)
+    >>> selector = dataset.selector("area", "year")
+    >>> selector.idx("AU", "2013")
+    10
+    >>> selector.value("AU", "2003")
+    5.943826289
+    >>> selector.data("Australia", "2013")
+    JsonStatValue(idx=10, value=5.50415003, status='e')
+    """
+
+    __slots__ = ('__dids', '__lcat2pos', '__lmult', '__offset', '__value_at', '__status_at')
+
+    def __init__(self, dids, lcat2pos, lmult, offset, value, status_at):
+        """initialize a selector
+
+        .. warning::
+
+            this is an internal library function (it is not public api)
+
+        :param dids: ids of the selected dimensions
+        :param lcat2pos: for each selected dimension a dict from category (index or label) to position
+        :param lmult: for each selected dimension the multiplicative factor
+        :param offset: index of the datapoint when all selected dimensions are at position 0
+        :param value: storage of values of the dataset
+        :param status_at: function from index to status
+        """
+        self.__dids = dids
+        self.__lcat2pos = lcat2pos
+        self.__lmult = lmult
+        self.__offset = offset
+        # bound methods, they are called on each lookup
+        self.__value_at = value.get
+        self.__status_at = status_at
+
+    @property
+    def dids(self):
+        """ids of the selected dimensions"""
+        return self.__dids
+
+    def idx(self, *lcat):
+        """index into values of the datapoint
+
+        :param lcat: one category (index or label) for each selected dimension
+        :returns: an integer
+        """
+        return self.__idx(lcat)
+
+    def __idx(self, lcat):
+        if len(lcat) != len(self.__lmult):
+            msg = "selector on {}: expected {} categories, got {}".format(
+                ", ".join(self.__dids), len(self.__lmult), len(lcat))
+            raise JsonStatException(msg)
+        idx = self.__offset
+        try:
+            for cat2pos, mult, cat in zip(self.__lcat2pos, self.__lmult, lcat):
+                idx += cat2pos[cat] * mult
+        except KeyError as e:
+            msg = "selector on {}: unknown index or label {}".format(", ".join(self.__dids), e)
+            raise JsonStatException(msg)
+        return idx
+
+    def value(self, *lcat):
+        """value of the datapoint
+
+        :param lcat: one category (index or label) for each selected dimension
+        :returns: value (typically a number)
+        """
+        return self.__value_at(self.__idx(lcat))
+
+    def status(self, *lcat):
+        """status of the datapoint
+
+        :param lcat: one category (index or label) for each selected dimension
+        :returns: status (typically a string)
+        """
+        return self.__status_at(self.__idx(lcat))
+
+    def data(self, *lcat):
+        """value and status of the datapoint
+
+        :param lcat: one category (index or label) for each selected dimension
+        :returns: a JsonStatValue
+        """
+        idx = self.__idx(lcat)
+        return JsonStatValue(idx, self.__value_at(idx), self.__status_at(idx))
+
+    __call__ = value
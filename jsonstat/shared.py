@@ -0,0 +1,166 @@
+# -*- coding: utf-8 -*-
+# This file is part of https://github.com/26fe/jsonstat.py
+# Copyright (C) 2016-2021 gf <gf@26fe.com>
+# See LICENSE file
+
+# Datasets and collections in shared memory.
+#
+# The snapshot of a dataset (see jsonstat.snapshot) is written into a
+# multiprocessing.shared_memory segment. Other processes attach the segment
+# by name and use its arrays directly: nothing is parsed, pickled or copied.
+#
+# Lifecycle:
+#   - the process calling to_shared owns the segment and removes it with
+#     SharedSegment.unlink (or leaving the with block)
+#   - the other processes attach it with jsonstat.attach_shared and release
+#     their mapping with jsonstat.detach_shared
+
+# stdlib
+import os
+import sys
+try:
+    from multiprocessing import resource_tracker
+    from multiprocessing.shared_memory import SharedMemory
+except ImportError:
+    # python < 3.8
+    SharedMemory = None
+
+# jsonstat
+from jsonstat.exceptions import JsonStatException
+
+# segments created by this process, name -> SharedMemory
+__created__ = {}
+
+# segments attached by this process, name -> SharedMemory
+__attached__ = {}
+
+
+def _check_available():
+    if SharedMemory is None:
+        raise JsonStatException("shared memory requires python 3.8 or later")
+
+
+class SharedSegment:
+    """Shared memory segment containing a dataset or a collection
+
+    It is returned by :py:meth:`jsonstat.JsonStatDataSet.to_shared`,
+    used as context manager the segment is removed at the end of the with block.
+    """
+
+    def __init__(self, shm):
+        self.__shm = shm
+
+    @property
+    def name(self):
+        """name of the segment, to be passed to :py:meth:`jsonstat.attach_shared`"""
+        return self.__shm.name
+
+    @property
+    def size(self):
+        """size in bytes of the segment"""
+        return self.__shm.size
+
+    def unlink(self):
+        """removes the segment
+
+        processes which have already attached the segment can use it until they detach it.
+        """
+        if __created__.pop(self.__shm.name, None) is not None:
+            self.__shm.close()
+            self.__shm.unlink()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.unlink()
+
+    def __repr__(self):
+        return "SharedSegment(name='{}', size={})".format(self.name, self.size)
+
+
+def create_segment(writer, header, name=None):
+    """writes a snapshot into a new shared memory segment
+
+    :param writer: SnapshotWriter containing the arrays
+    :param header: header of the snapshot
+    :param name: name of the segment, None to generate an unique name
+    :returns: a SharedSegment
+    """
+    _check_available()
+    shms = []
+
+    def allocate(size):
+        shms.append(SharedMemory(name=name, create=True, size=max(size, 1)))
+        return shms[0].buf
+
+    try:
+        writer.to_buffer(header, allocate)
+    except Exception:
+        for shm in shms:
+            shm.close()
+            shm.unlink()
+        raise
+    shm = shms[0]
+    __created__[shm.name] = shm
+    return SharedSegment(shm)
+
+
+def attach_segment(name):
+    """maps a shared memory segment created by create_segment
+
+    :param name: name of the segment
+    :returns: memoryview on the segment
+    """
+    _check_available()
+    shm = __attached__.get(name)
+    if shm is None:
+        try:
+            if sys.version_info >= (3, 13):
+                shm = SharedMemory(name=name, track=False)
+            else:
+                # the segment is registered to the resource tracker also when it is attached
+                own_tracker = _has_own_resource_tracker()
+                shm = SharedMemory(name=name)
+                if own_tracker and name not in __created__:
+                    # only the owner removes the segment, otherwise it would be removed
+                    # at the exit of the first process which attached it. A tracker inherited
+                    # from the parent process is shared with the owner, its registration is kept
+                    resource_tracker.unregister(shm._name, "shared_memory")
+        except FileNotFoundError:
+            raise JsonStatException("shared segment '{}' does not exist".format(name))
+        __attached__[name] = shm
+    return shm.buf
+
+
+def _has_own_resource_tracker():
+    """True if the resource tracker of this process is not inherited from the parent process"""
+    tracker = resource_tracker._resource_tracker
+    if tracker._fd is None:
+        # not running yet, it is started by this process
+        return True
+    if tracker._pid is None:
+        # process started by spawn or forkserver, it uses the tracker of its parent
+        return False
+    try:
+        os.waitpid(tracker._pid, os.WNOHANG)
+    except ChildProcessError:
+        # forked process, the tracker is a child of its parent
+        return False
+    return True
+
+
+def detach_segment(name):
+    """releases the mapping of a segment attached by attach_segment
+
+    :param name: name of the segment
+    """
+    shm = __attached__.get(name)
+    if shm is None:
+        return
+    try:
+        shm.close()
+    except BufferError:
+        msg = "shared segment '{}' is still used by attached datasets".format(name)
+        raise JsonStatException(msg)
+    del __attached__[name]
@@ -0,0 +1,182 @@
+# -*- coding: utf-8 -*-
+# This file is part of https://github.com/26fe/jsonstat.py
+# Copyright (C) 2016-2021 gf <gf@26fe.com>
+# See LICENSE file
+
+# Binary snapshot of parsed datasets and collections.
+#
+# Layout of a snapshot file:
+#
+#   magic        8 bytes  b"JSNAPSHT"
+#   version      uint32   little endian
+#   header size  uint64   little endian
+#   header       json (utf-8): metadata, dimensions, category tables and
+#                the description (offset, dtype, shape) of each array
+#   arrays       raw values, masks, indexes and status codes,
+#                each one aligned to ALIGNMENT bytes from the start of the file
+#
+# Arrays are not copied on load, they are views on the memory mapped file.
+# The same layout is used in memory to send parsed datasets between processes
+# and to share them with shared memory (see jsonstat.shared).
+
+# stdlib
+import io
+import json
+import mmap
+import struct
+
+# packages
+import numpy as np
+
+# jsonstat
+from jsonstat.backend import loads as json_loads
+from jsonstat.exceptions import JsonStatException
+
+MAGIC = b"JSNAPSHT"
+FORMAT_VERSION = 1
+ALIGNMENT = 64
+
+_PREAMBLE = struct.Struct("<8sIQ")
+
+
+def _aligned(offset):
+    return (offset + ALIGNMENT - 1) // ALIGNMENT * ALIGNMENT
+
+
+class SnapshotWriter:
+    """Collects the arrays of a snapshot and writes the snapshot file"""
+
+    def __init__(self):
+        self.__arrays = []  # list of (relative offset, array)
+        self.__size = 0
+
+    def add(self, array):
+        """adds an array to the snapshot
+
+        arrays of python objects (f.e. strings) are stored into the header as json list
+
+        :param array: numpy array or None
+        :returns: description of the array to put into the header
+        """
+        if array is None:
+            return None
+        if array.dtype.kind == 'O':
+            return {"values": array.reshape(-1).tolist(), "shape": list(array.shape)}
+        array = np.ascontiguousarray(array)
+        offset = _aligned(self.__size)
+        self.__arrays.append((offset, array))
+        self.__size = offset + array.nbytes
+        return {"offset": offset, "dtype": array.dtype.str, "shape": list(array.shape)}
+
+    def write(self, filename, header):
+        """writes the snapshot
+
+        :param filename: path of the file
+        :param header: json serializable structure (it contains the descriptions returned by add)
+        """
+        with open(filename, 'wb') as f:
+            self.__write(f, header)
+
+    def to_bytes(self, header):
+        """returns the snapshot as bytes (see write)"""
+        f = io.BytesIO()
+        self.__write(f, header)
+        return f.getvalue()
+
+    def to_buffer(self, header, allocate):
+        """writes the snapshot into a buffer (f.e. a shared memory segment)
+
+        :param header: see write
+        :param allocate: function returning a writable buffer of (at least) the given size
+        :returns: the buffer returned by allocate
+        """
+        json_header = json.dumps(header, separators=(',', ':')).encode('utf-8')
+        data_start = _aligned(_PREAMBLE.size + len(json_header))
+        buf = allocate(data_start + self.__size)
+        buf[:_PREAMBLE.size] = _PREAMBLE.pack(MAGIC, FORMAT_VERSION, len(json_header))
+        buf[_PREAMBLE.size:_PREAMBLE.size + len(json_header)] = json_header
+        for offset, array in self.__arrays:
+            if array.nbytes > 0:
+                start = data_start + offset
+                buf[start:start + array.nbytes] = memoryview(array).cast('B')
+        return buf
+
+    def __write(self, f, header):
+        json_header = json.dumps(header, separators=(',', ':')).encode('utf-8')
+        data_start = _aligned(_PREAMBLE.size + len(json_header))
+        f.write(_PREAMBLE.pack(MAGIC, FORMAT_VERSION, len(json_header)))
+        f.write(json_header)
+        for offset, array in self.__arrays:
+            f.write(b'\0' * (data_start + offset - f.tell()))
+            f.write(array.data)
+
+
+class _BufferFile:
+    """reads a buffer as a file without copying it (io.BytesIO copies buffers which are not bytes)"""
+
+    def __init__(self, buf):
+        self.__view = memoryview(buf)
+        self.__pos = 0
+
+    def read(self, size):
+        data = bytes(self.__view[self.__pos:self.__pos + size])
+        self.__pos += len(data)
+        return data
+
+
+class SnapshotReader:
+    """Reads the header of a snapshot file and returns its arrays"""
+
+    def __init__(self, filename, use_mmap=True):
+        """open a snapshot
+
+        :param filename: path of the file
+        :param use_mmap: if True arrays are views on the memory mapped file,
+            otherwise the file is read into memory
+        """
+        with open(filename, 'rb') as f:
+            self.__read_header(f, filename)
+            if use_mmap:
+                # mapping stays valid after the file is closed
+                self.__buf = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+            else:
+                f.seek(0)
+                self.__buf = f.read()
+
+    @classmethod
+    def from_bytes(cls, buf):
+        """open a snapshot from a bytes like object (see SnapshotWriter.to_bytes)"""
+        reader = cls.__new__(cls)
+        reader.__read_header(_BufferFile(buf), "buffer")
+        reader.__buf = buf
+        return reader
+
+    def __read_header(self, f, filename):
+        preamble = f.read(_PREAMBLE.size)
+        if len(preamble) < _PREAMBLE.size:
+            raise JsonStatException("'{}' is not a jsonstat snapshot".format(filename))
+        magic, version, header_size = _PREAMBLE.unpack(preamble)
+        if magic != MAGIC:
+            raise JsonStatException("'{}' is not a jsonstat snapshot".format(filename))
+        if version != FORMAT_VERSION:
+            msg = "'{}': unsupported snapshot version {}".format(filename, version)
+            raise JsonStatException(msg)
+        self.header = json_loads(f.read(header_size))
+        self.__data_start = _aligned(_PREAMBLE.size + header_size)
+
+    def array(self, desc):
+        """returns a read only array described by desc (see SnapshotWriter.add)"""
+        if desc is None:
+            return None
+        if "values" in desc:
+            array = np.empty(len(desc["values"]), dtype=object)
+            array[:] = desc["values"]
+            return array.reshape(desc["shape"])
+        dtype = np.dtype(desc["dtype"])
+        count = int(np.prod(desc["shape"], dtype=np.int64))
+        if count == 0:
+            return np.empty(desc["shape"], dtype=dtype)
+        array = np.frombuffer(self.__buf, dtype=dtype, count=count, offset=self.__data_start + desc["offset"])
+        # the buffer could be writable (f.e. shared memory)
+        array.flags.writeable = False
+        return array.reshape(desc["shape"])
@@ -0,0 +1,577 @@
+# -*- coding: utf-8 -*-
+# This file is part of https://github.com/26fe/jsonstat.py
+# Copyright (C) 2016-2021 gf <gf@26fe.com>
+# See LICENSE file
+
+# packages
+import numpy as np
+import pandas as pd
+
+
+def _max_exact_int(dtype):
+    """integers greater than this cannot be stored into a float dtype without loss"""
+    return 2 ** (np.finfo(dtype).nmant + 1)
+
+
+def values_to_array(json_value, dtype=None):
+    """Converts the json "value" list into a typed numpy array
+
+    null values are mapped to NaN (or to 0 for non float dtype),
+    the returned mask tells which cells contain a value.
+    Values which cannot be stored without loss into dtype (f.e. strings, booleans
+    or integers beyond the float precision) are kept as python objects.
+
+    :param json_value: list of numbers (or None)
+    :param dtype: numpy dtype of the array, default is float64
+    :returns: a tuple (array, mask, integral) where mask is True where value is not null,
+        integral tells which values are integers into the json (they are returned as int,
+        see array_to_values): True, False or a boolean array when integers and floats are mixed
+    """
+    if dtype is None:
+        dtype = np.float64
+    dtype = np.dtype(dtype)
+
+    types = set(map(type, json_value))
+    if dtype.kind == 'f':
+        if not types <= {int, float, type(None)}:
+            # values are not numbers (f.e. strings)
+            return _values_to_object_array(json_value)
+        # numpy maps None to NaN when dtype is float
+        array = np.array(json_value, dtype=dtype)
+        if int in types:
+            big = np.flatnonzero(~(np.abs(array) < _max_exact_int(dtype)))
+            if any(type(json_value[i]) is int for i in big.tolist()):
+                return _values_to_object_array(json_value)
+        if float not in types:
+            integral = True
+        elif int not in types:
+            integral = False
+        else:
+            # both 100 and 100.0 are in the json
+            integral = np.fromiter((type(v) is int for v in json_value), dtype=bool, count=len(json_value))
+        return array, ~np.isnan(array), integral
+
+    if not types <= {int, type(None)}:
+        return _values_to_object_array(json_value)
+    mask = np.fromiter((v is not None for v in json_value), dtype=bool, count=len(json_value))
+    src = json_value if mask.all() else [0 if v is None else v for v in json_value]
+    try:
+        array = np.array(src, dtype=dtype)
+    except (ValueError, TypeError, OverflowError):
+        return _values_to_object_array(json_value)
+    return array, mask, True
+
+
+def sparse_values_to_arrays(json_value, dtype=None):
+    """Converts the json "value" object ({"<index>": value, ...}) into numpy arrays
+
+    :param json_value: dict from index (as string) to value
+    :param dtype: numpy dtype of the array, default is float64
+    :returns: a tuple (idx, array, mask, integral), idx is sorted, see values_to_array
+    """
+    idx = np.fromiter((int(k) for k in json_value.keys()), dtype=np.int64, count=len(json_value))
+    array, mask, integral = values_to_array(list(json_value.values()), dtype)
+    if np.any(idx[1:] < idx[:-1]):
+        order = np.argsort(idx, kind='stable')
+        idx, array, mask = idx[order], array[order], mask[order]
+        if isinstance(integral, np.ndarray):
+            integral = integral[order]
+    return idx, array, mask, integral
+
+
+def null_array(size, dtype):
+    """array of null values: NaN for float, None for object, 0 otherwise"""
+    if dtype.kind == 'f':
+        return np.full(size, np.nan, dtype=dtype)
+    if dtype.kind == 'O':
+        return np.full(size, None, dtype=dtype)
+    return np.zeros(size, dtype=dtype)
+
+
+def _values_to_object_array(json_value):
+    array = np.empty(len(json_value), dtype=object)
+    array[:] = json_value
+    mask = np.fromiter((v is not None for v in json_value), dtype=bool, count=len(json_value))
+    return array, mask, False
+
+
+def array_to_values(array, mask, integral=False):
+    """Converts an array of values into a list of python objects
+
+    null cells become None.
+
+    :param array: numpy array of values
+    :param mask: boolean array, True where value is not null
+    :param integral: True, False or boolean array, True where the value was an integer into the json
+        (float values are returned as int)
+    :returns: a numpy array with dtype object
+    """
+    out = np.empty(len(array), dtype=object)
+    if array.dtype.kind != 'f' or integral is False:
+        out[mask] = array[mask].tolist()
+    elif integral is True:
+        out[mask] = array[mask].astype(np.int64).tolist()
+    else:
+        ints = mask & integral
+        floats = mask & ~integral
+        out[ints] = array[ints].astype(np.int64).tolist()
+        out[floats] = array[floats].tolist()
+    out[~mask] = None
+    return out
+
+
+def array_to_value(array, mask, idx, integral=False):
+    """Converts a single cell of an array of values into a python object
+
+    :param array: numpy array of values (of any shape)
+    :param mask: boolean array, True where value is not null
+    :param idx: flat (row-major) index of cell
+    :param integral: see array_to_values
+    :returns: a python object or None if the cell is null
+    """
+    if not mask.item(idx):
+        return None
+    v = array.item(idx)
+    if type(v) is float and integral is not False and (integral is True or integral.item(idx)):
+        return int(v)
+    return v
+
+
+def select_dense(array, key):
+    """selects cells of a n-dimensional array
+
+    :param array: n-dimensional array
+    :param key: tuple, one slice or array of positions for each dimension
+    :returns: a view on array if key contains only slices, a copy otherwise
+    """
+    if all(isinstance(k, slice) for k in key):
+        return array[key]
+    key = np.ix_(*[np.arange(s)[k] if isinstance(k, slice) else k for s, k in zip(array.shape, key)])
+    return array[key]
+
+
+def select_sparse(idx, shape, key):
+    """selects cells of a sparse array
+
+    :param idx: sorted flat indexes of the stored cells
+    :param shape: shape of the dense array
+    :param key: tuple, one slice or array of positions for each dimension
+    :returns: a tuple (new_idx, sel, new_size), new_idx are the sorted flat indexes into
+        the selected array, sel are positions into idx of the selected cells
+    """
+    lpos = list(np.unravel_index(idx, shape))
+    keep = np.ones(len(idx), dtype=bool)
+    new_shape = []
+    for d, (size, k) in enumerate(zip(shape, key)):
+        selected = np.arange(size)[k]
+        new_shape.append(len(selected))
+        # old position -> new position (-1 if not selected)
+        remap = np.full(size, -1, dtype=np.int64)
+        remap[selected] = np.arange(len(selected))
+        lpos[d] = remap[lpos[d]]
+        keep &= lpos[d] >= 0
+
+    new_idx = np.ravel_multi_index(tuple(pos[keep] for pos in lpos), new_shape) \
+        if len(shape) > 0 else idx[keep]
+    order = np.argsort(new_idx, kind='stable')
+    sel = np.flatnonzero(keep)[order]
+    return new_idx[order], sel, int(np.prod(new_shape, dtype=np.int64))
+
+
+AGGREGATE_FUNCTIONS = ["sum", "mean", "min", "max", "count"]
+
+
+def dense_reducer(axes, order=None):
+    """returns a function reducing a n-dimensional array over axes
+
+    :param axes: tuple of the axes to reduce
+    :param order: permutation of the remaining axes, None to keep them in their order
+    :returns: function (ufunc, array, dtype=None) -> 1-dimensional array (row-major)
+    """
+    def reduce(ufunc, array, dtype=None):
+        reduced = np.asarray(ufunc.reduce(array, axis=axes, dtype=dtype))
+        if order is not None:
+            reduced = reduced.transpose(order)
+        return reduced.reshape(-1)
+    return reduce
+
+
+def sparse_reducer(idx, shape, keep):
+    """returns a function reducing the stored cells of a sparse array by group
+
+    cells are grouped by their positions in the dimensions keep
+
+    :param idx: flat indexes of the stored cells
+    :param shape: shape of the dense array
+    :param keep: list of the dimensions to keep, in the order of the groups
+    :returns: a tuple (reduce, new_idx), reduce is a function (ufunc, array, dtype=None) -> array
+        with one item for each group, new_idx are the sorted flat indexes of the groups
+        into the array of shape [shape[d] for d in keep]
+    """
+    lpos = np.unravel_index(idx, shape)
+    if keep:
+        group = np.ravel_multi_index([lpos[d] for d in keep], [shape[d] for d in keep])
+    else:
+        group = np.zeros(len(idx), dtype=np.int64)
+    order = np.argsort(group, kind='stable')
+    group = group[order]
+    starts = np.flatnonzero(np.concatenate([[True], group[1:] != group[:-1]])) if len(group) > 0 \
+        else np.zeros(0, dtype=np.int64)
+
+    def reduce(ufunc, array, dtype=None):
+        if len(starts) == 0:
+            return np.zeros(0, dtype=array.dtype if dtype is None else dtype)
+        return ufunc.reduceat(array[order], starts, dtype=dtype)
+    return reduce, group[starts]
+
+
+def aggregate_values(reduce, array, mask, group_size, func, skipna=True):
+    """aggregates the values of each group of cells
+
+    :param reduce: function returned by dense_reducer or sparse_reducer
+    :param array: values (numbers)
+    :param mask: boolean array, True where value is not null
+    :param group_size: number of cells of each group, null cells included
+    :param func: one of AGGREGATE_FUNCTIONS, "count" is the number of not null values
+    :param skipna: if False the result of a group containing null cells is null
+    :returns: a tuple (values, mask) with one value for each group
+    """
+    count = reduce(np.add, mask, dtype=np.int64)
+    if func == "count":
+        return count, np.ones(len(count), dtype=bool)
+    new_mask = count > 0 if skipna else count == group_size
+
+    if func in ("sum", "mean"):
+        dtype = np.float64 if array.dtype.kind == 'f' else np.int64
+        values = reduce(np.add, np.where(mask, array, 0), dtype=dtype)
+        if func == "mean":
+            values = values / np.maximum(count, 1)
+    else:
+        if array.dtype.kind == 'f':
+            fill = np.inf if func == "min" else -np.inf
+        else:
+            info = np.iinfo(array.dtype)
+            fill = info.max if func == "min" else info.min
+        ufunc = np.minimum if func == "min" else np.maximum
+        values = reduce(ufunc, np.where(mask, array, np.array(fill, dtype=array.dtype)))
+
+    values = np.array(values)
+    values[~new_mask] = null_array(1, values.dtype)[0]
+    return values, new_mask
+
+
+def aggregate_codes(reduce, codes, used, null):
+    """status codes of each group of cells
+
+    the status of a group is the status shared by all the cells used to compute
+    its value (by all its cells if the value is null), otherwise no status (code 0)
+
+    :param reduce: function returned by dense_reducer or sparse_reducer
+    :param codes: array of status codes
+    :param used: boolean array, True for the cells used to compute the value
+    :param null: boolean array, True for the groups with a null value
+    :returns: array of codes, one for each group
+    """
+    high = np.array(np.iinfo(codes.dtype).max, dtype=codes.dtype)
+    low = reduce(np.minimum, np.where(used, codes, high))
+    high = reduce(np.maximum, np.where(used, codes, np.zeros(1, dtype=codes.dtype)))
+    low[null] = reduce(np.minimum, codes)[null]
+    high[null] = reduce(np.maximum, codes)[null]
+    return np.where(low == high, low, 0).astype(codes.dtype)
+
+
+class DenseStorage:
+    """Values of a dataset stored into a numpy array
+
+    null cells are tracked by a boolean mask (True where the value is not null).
+    array and mask could be a n-dimensional (not contiguous) view on the values of another dataset,
+    cells are always addressed by the flat (row-major) index.
+    integral is True when the json values were integers (they are returned as int),
+    a boolean array (with the shape of array) when integers and floats are mixed.
+    """
+
+    def __init__(self, array, mask, integral=False):
+        self.array = array
+        self.mask = mask
+        self.integral = integral
+
+    def __len__(self):
+        return self.array.size
+
+    @property
+    def dtype(self):
+        return self.array.dtype
+
+    def __key(self, idx):
+        if self.array.ndim == 1:
+            return idx
+        if np.ndim(idx) == 0 and idx < 0:
+            idx += self.array.size
+        return np.unravel_index(idx, self.array.shape)
+
+    def get(self, idx):
+        """value at flat index idx as python object (None for null)"""
+        return array_to_value(self.array, self.mask, idx, self.integral)
+
+    def take(self, idx):
+        """values at flat indexes idx
+
+        :param idx: array of integer
+        :returns: a tuple (values, mask) of 1-dimensional arrays
+        """
+        key = self.__key(idx)
+        return self.array[key], self.mask[key]
+
+    def take_integral(self, idx):
+        """integral flags at flat indexes idx (see array_to_values)"""
+        if isinstance(self.integral, np.ndarray):
+            return self.integral[self.__key(idx)]
+        return self.integral
+
+    def valid_idx(self):
+        """sorted flat indexes of the not null cells"""
+        return np.flatnonzero(self.mask)
+
+    def reshape(self, shape):
+        """array and mask reshaped without copying
+
+        :returns: a tuple (values, mask)
+        """
+        return self.array.reshape(shape), self.mask.reshape(shape)
+
+    def select(self, shape, key):
+        """returns a new storage with the cells selected by key
+
+        if key contains only slices the new storage is a view on this one.
+
+        :param shape: shape of the values (the size of each dimension)
+        :param key: tuple, one slice or array of positions for each dimension
+        :returns: a DenseStorage
+        """
+        array, mask = self.reshape(shape)
+        integral = self.integral
+        if isinstance(integral, np.ndarray):
+            integral = select_dense(integral.reshape(shape), key)
+        return DenseStorage(select_dense(array, key), select_dense(mask, key), integral)
+
+
+class SparseStorage:
+    """Values of a dataset stored as a sorted array of indexes and an array of values
+
+    It is used when json "value" is an object ({"<index>": value, ...}) instead of an array,
+    only the cells present in the json are stored.
+    It has the same interface of DenseStorage, an integral array is aligned with the stored cells.
+    """
+
+    def __init__(self, idx, array, mask, size, integral=False):
+        self.idx = idx
+        self.array = array
+        self.mask = mask
+        self.size = size
+        self.integral = integral
+
+    def __len__(self):
+        return self.size
+
+    @property
+    def dtype(self):
+        return self.array.dtype
+
+    def get(self, idx):
+        """value at flat index idx as python object (None for null)"""
+        if idx < 0:
+            idx += self.size
+        if not 0 <= idx < self.size:
+            raise IndexError("index {} is out of bounds for size {}".format(idx, self.size))
+        pos = int(self.idx.searchsorted(idx))
+        if pos < len(self.idx) and self.idx.item(pos) == idx:
+            return array_to_value(self.array, self.mask, pos, self.integral)
+        return None
+
+    def take(self, idx):
+        """values at flat indexes idx
+
+        :param idx: array of integer
+        :returns: a tuple (values, mask) of 1-dimensional arrays
+        """
+        idx = np.asarray(idx, dtype=np.int64)
+        values = null_array(len(idx), self.array.dtype)
+        if len(self.idx) == 0:
+            return values, np.zeros(len(idx), dtype=bool)
+        pos = np.minimum(np.searchsorted(self.idx, idx), len(self.idx) - 1)
+        found = (self.idx[pos] == idx) & self.mask[pos]
+        values[found] = self.array[pos[found]]
+        return values, found
+
+    def take_integral(self, idx):
+        """integral flags at flat indexes idx (see array_to_values)"""
+        if not isinstance(self.integral, np.ndarray):
+            return self.integral
+        idx = np.asarray(idx, dtype=np.int64)
+        if len(self.idx) == 0:
+            return np.zeros(len(idx), dtype=bool)
+        pos = np.minimum(np.searchsorted(self.idx, idx), len(self.idx) - 1)
+        return (self.idx[pos] == idx) & self.integral[pos]
+
+    def valid_idx(self):
+        """sorted flat indexes of the not null cells"""
+        return self.idx[self.mask]
+
+    def reshape(self, shape):
+        """dense array and mask with shape
+
+        .. warning::
+
+            the values are copied into a dense array of size len(self)
+
+        :returns: a tuple (values, mask)
+        """
+        array = null_array(self.size, self.array.dtype)
+        mask = np.zeros(self.size, dtype=bool)
+        array[self.idx] = self.array
+        mask[self.idx] = self.mask
+        return array.reshape(shape), mask.reshape(shape)
+
+    def select(self, shape, key):
+        """returns a new storage with the cells selected by key
+
+        :param shape: shape of the values (the size of each dimension)
+        :param key: tuple, one slice or array of positions for each dimension
+        :returns: a SparseStorage
+        """
+        new_idx, sel, new_size = select_sparse(self.idx, shape, key)
+        integral = self.integral[sel] if isinstance(self.integral, np.ndarray) else self.integral
+        return SparseStorage(new_idx, self.array[sel], self.mask[sel], new_size, integral)
+
+
+def code_dtype(nr_codes):
+    """smallest unsigned integer dtype that can contain nr_codes codes"""
+    for dtype in (np.uint8, np.uint16, np.uint32):
+        if nr_codes <= np.iinfo(dtype).max + 1:
+            return np.dtype(dtype)
+    return np.dtype(np.uint64)
+
+
+def encode_status(json_status):
+    """Encodes a list of status into a table of distinct status and an array of codes
+
+    :param json_status: list of status (strings or None)
+    :returns: a tuple (table, codes), table[0] is None (code 0 means no status)
+    """
+    values = np.empty(len(json_status), dtype=object)
+    values[:] = json_status
+    codes, uniques = pd.factorize(values)
+    # pd.factorize gives -1 to None
+    table = [None] + list(uniques)
+    return table, (codes + 1).astype(code_dtype(len(table)))
+
+
+class StatusStorage:
+    """Status of a dataset encoded as a table of distinct status plus an array of codes
+
+    code 0 means no status (table[0] is None). The codes can be:
+
+        - None: all the cells have the same status table[1]
+        - dense: one code for each cell (idx is None), codes could be a n-dimensional view
+        - sparse: idx are the sorted flat indexes of the cells with a code
+    """
+
+    def __init__(self, table, codes, idx, size):
+        self.table = table
+        self.codes = codes
+        self.idx = idx
+        self.size = size
+
+    @classmethod
+    def constant(cls, status, size):
+        return cls([None, status], None, None, size)
+
+    @classmethod
+    def dense(cls, json_status):
+        table, codes = encode_status(json_status)
+        return cls(table, codes, None, len(json_status))
+
+    @classmethod
+    def sparse(cls, idx, json_status, size):
+        table, codes = encode_status(json_status)
+        if np.any(idx[1:] < idx[:-1]):
+            order = np.argsort(idx, kind='stable')
+            idx, codes = idx[order], codes[order]
+        return cls(table, codes, idx, size)
+
+    @property
+    def dtype(self):
+        return code_dtype(len(self.table))
+
+    def get(self, idx):
+        """status at flat index idx"""
+        if self.codes is None:
+            return self.table[1]
+        if self.idx is None:
+            return self.table[self.codes.item(idx)]
+        if idx < 0:
+            idx += self.size
+        pos = int(self.idx.searchsorted(idx))
+        if pos < len(self.idx) and self.idx.item(pos) == idx:
+            return self.table[self.codes.item(pos)]
+        return None
+
+    def take_codes(self, idx):
+        """codes at flat indexes idx
+
+        :param idx: array of integer
+        :returns: array of codes
+        """
+        idx = np.asarray(idx, dtype=np.int64)
+        if self.codes is None:
+            return np.ones(len(idx), dtype=self.dtype)
+        if self.idx is None:
+            if self.codes.ndim == 1:
+                return self.codes[idx]
+            return self.codes[np.unravel_index(idx, self.codes.shape)]
+        codes = np.zeros(len(idx), dtype=self.dtype)
+        if len(self.idx) == 0:
+            return codes
+        pos = np.minimum(np.searchsorted(self.idx, idx), len(self.idx) - 1)
+        found = self.idx[pos] == idx
+        codes[found] = self.codes[pos[found]]
+        return codes
+
+    def take(self, idx):
+        """status at flat indexes idx
+
+        :param idx: array of integer
+        :returns: array of status (dtype object)
+        """
+        table = np.empty(len(self.table), dtype=object)
+        table[:] = self.table
+        return table[self.take_codes(idx)]
+
+    def all_codes(self):
+        """codes of all cells
+
+        :returns: 1-dimensional array of codes of length size
+        """
+        if self.codes is None:
+            return np.ones(self.size, dtype=self.dtype)
+        if self.idx is None:
+            return self.codes.reshape(-1)
+        codes = np.zeros(self.size, dtype=self.dtype)
+        codes[self.idx] = self.codes
+        return codes
+
+    def select(self, shape, key):
+        """returns a new storage with the cells selected by key
+
+        :param shape: shape of the values (the size of each dimension)
+        :param key: tuple, one slice or array of positions for each dimension
+        :returns: a StatusStorage
+        """
+        if self.codes is None:
+            new_size = int(np.prod([len(np.arange(s)[k]) for s, k in zip(shape, key)], dtype=np.int64))
+            return StatusStorage(self.table, None, None, new_size)
+        if self.idx is None:
+            codes = select_dense(self.codes.reshape(shape), key)
+            return StatusStorage(self.table, codes, None, codes.size)
+        new_idx, sel, new_size = select_sparse(self.idx, shape, key)
+        return StatusStorage(self.table, self.codes[sel], new_idx, new_size)
@@ -0,0 +1,378 @@
+# -*- coding: utf-8 -*-
+# This file is part of https://github.com/26fe/jsonstat.py
+# Copyright (C) 2016-2021 gf <gf@26fe.com>
+# See LICENSE file
+
+# Incremental loading of big jsonstat files.
+#
+# The file is memory mapped and scanned for the structure of the json.
+# The "value" and "status" arrays of the datasets are not decoded into python lists:
+# they are decoded a chunk at a time directly into preallocated numpy arrays.
+# The remaining part of the json (metadata, dimensions) is decoded normally.
+# Arrays can also be left undecoded (DeferredArray) to decode only the cells
+# selected by the dimensions (see JsonStatDataSet.from_file with select).
+
+# stdlib
+import json
+import re
+
+# packages
+import numpy as np
+import pandas as pd
+
+# jsonstat
+from jsonstat.backend import loads as json_loads
+from jsonstat.exceptions import JsonStatException
+from jsonstat.exceptions import JsonStatMalformedJson
+from jsonstat.storage import DenseStorage
+from jsonstat.storage import StatusStorage
+from jsonstat.storage import code_dtype
+from jsonstat.storage import values_to_array
+from jsonstat.storage import _values_to_object_array
+from jsonstat.utility import map_file
+
+# files bigger than this (decompressed) are loaded incrementally by from_file
+STREAMING_THRESHOLD = 64 * 1024 * 1024
+
+# size in bytes of the pieces of "value" and "status" arrays decoded at once
+CHUNK_SIZE = 1024 * 1024
+
+# json strings and structural characters, numbers and literals are skipped
+_TOKEN = re.compile(rb'"(?:[^"\\]|\\.)*"|[\[\]{}:,]')
+_STRING_OR_END = re.compile(rb'"(?:[^"\\]|\\.)*"|\]')
+_NOT_WHITESPACE = re.compile(rb'[^ \t\n\r]')
+
+# keys of a jsonstat object that never contain a dataset
+_NOT_DATASET_KEYS = {b'"dimension"', b'"extension"', b'"error"', b'"note"', b'"role"', b'"link"'}
+_LINK_ITEM = [b'"link"', b'"item"', None]
+
+_PLACEHOLDER = "\x00jsonstat-streaming:"
+
+
+def use_streaming(buf):
+    """True if the json is big enough to be loaded incrementally
+
+    :param buf: the mapped file, see :py:meth:`jsonstat.utility.map_file` (compressed files
+        are measured decompressed)
+    """
+    return len(buf) > STREAMING_THRESHOLD
+
+
+def load_file(filename, dtype=None):
+    """Loads a json file, "value" and "status" arrays of datasets are stored into numpy arrays
+
+    the arrays are replaced into the returned json structure by a DenseStorage (for "value")
+    or by a StatusStorage (for "status").
+
+    :param filename: path of the file
+    :param dtype: numpy dtype of the values, default is float64
+    :returns: data structure (dictionary) representing the json
+    """
+    with map_file(filename) as buf:
+        return load_buffer(buf, dtype)
+
+
+def load_buffer(buf, dtype=None, deferred=False):
+    """Loads a json from a bytes like object (bytes, mmap)
+
+    For the parameters see :py:meth:`jsonstat.streaming.load_file`.
+
+    :param deferred: if True "value" and "status" arrays are replaced by a DeferredArray,
+        they are decoded later by DeferredArray.load (buf must be still open)
+    """
+    pieces = []
+    arrays = []
+    copy_from = 0
+    for key, start, end in _iter_dataset_arrays(buf):
+        pieces.append(buf[copy_from:start])
+        pieces.append(json.dumps(_PLACEHOLDER + str(len(arrays))).encode())
+        array = DeferredArray(buf, key == b'"value"', start + 1, end, dtype)
+        arrays.append(array if deferred else array.load())
+        copy_from = end + 1
+    pieces.append(buf[copy_from:])
+
+    try:
+        json_data = json_loads(b''.join(pieces))
+    except ValueError:
+        raise JsonStatException("invalid json")
+    if arrays:
+        _replace_placeholders(json_data, arrays)
+    return json_data
+
+
+class DeferredArray:
+    """"value" or "status" array of a dataset not decoded yet"""
+
+    def __init__(self, buf, is_value, a, b, dtype=None):
+        """
+        :param buf: bytes like object containing the json
+        :param is_value: True for "value", False for "status" array
+        :param a: position of the first byte after the open bracket
+        :param b: position of the closing bracket
+        :param dtype: numpy dtype of the values
+        """
+        self.__buf = buf
+        self.__is_value = is_value
+        self.__a = a
+        self.__b = b
+        self.__dtype = dtype
+        self.__size = None
+
+    def __len__(self):
+        """number of items (exact for arrays of numbers, an upper bound for strings containing commas)"""
+        if self.__size is None:
+            self.__size = _count_items(self.__buf, self.__a, self.__b)
+        return self.__size
+
+    def load(self, idx=None):
+        """decodes the array
+
+        :param idx: array of the positions of the items to decode (in the returned order),
+            None for all the items
+        :returns: a DenseStorage for "value" or a StatusStorage for "status"
+        """
+        if idx is None:
+            if self.__is_value:
+                return _load_values(self.__buf, self.__a, self.__b, self.__dtype)
+            return _load_status(self.__buf, self.__a, self.__b)
+        items = _load_items(self.__buf, self.__a, self.__b, idx)
+        if self.__is_value:
+            return DenseStorage(*values_to_array(items, self.__dtype))
+        return StatusStorage.dense(items)
+
+
+def _load_items(buf, a, b, idx):
+    """decodes the items at positions idx of an array of scalars between a and b
+
+    only the selected items are kept while the array is decoded a chunk at a time.
+
+    :returns: list of items in the order of idx
+    """
+    idx = np.asarray(idx, dtype=np.int64)
+    order = np.argsort(idx, kind='stable')
+    sorted_idx = idx[order]
+    selected = np.empty(len(idx), dtype=object)
+    n = 0  # position of the first item of the chunk
+    k = 0  # first not decoded position of sorted_idx
+    for items in _iter_chunks(buf, a, b):
+        j = int(np.searchsorted(sorted_idx, n + len(items)))
+        if j > k:
+            selected[order[k:j]] = [items[i - n] for i in sorted_idx[k:j].tolist()]
+        k = j
+        n += len(items)
+        if k == len(idx):
+            break
+    if k < len(idx) or (len(idx) > 0 and sorted_idx[0] < 0):
+        raise JsonStatMalformedJson("invalid json array at position {}: too few items".format(a))
+    return selected.tolist()
+
+
+def _replace_placeholders(json_data, arrays):
+    """replaces the placeholders of "value" and "status" with the decoded arrays"""
+    if isinstance(json_data, dict):
+        for k, v in json_data.items():
+            if isinstance(v, str):
+                if v.startswith(_PLACEHOLDER) and k in ('value', 'status'):
+                    json_data[k] = arrays[int(v[len(_PLACEHOLDER):])]
+            else:
+                _replace_placeholders(v, arrays)
+    elif isinstance(json_data, list):
+        for v in json_data:
+            if isinstance(v, (dict, list)):
+                _replace_placeholders(v, arrays)
+
+
+def _is_dataset(stack):
+    """True if the innermost object of the stack could be a dataset
+
+    datasets are the root object, the objects at first level (jsonstat 1.0 collection)
+    and items of a jsonstat 2.0 collection ({"link": {"item": [...]}})
+    """
+    path = [key if kind == 'o' else None for kind, key in stack[:-1]]
+    while path[:3] == _LINK_ITEM:
+        path = path[3:]
+    return len(path) == 0 or (len(path) == 1 and path[0] not in _NOT_DATASET_KEYS)
+
+
+def _iter_dataset_arrays(buf):
+    """yields (key, start, end) for each "value" and "status" array of a dataset
+
+    start and end are the positions of the brackets of the array.
+    """
+    stack = []  # for each open object or array [kind, current key]
+    expect_key = False
+    pos = 0
+    while True:
+        m = _TOKEN.search(buf, pos)
+        if m is None:
+            return
+        pos = m.end()
+        c = buf[m.start()]
+        if c == 0x7b:  # {
+            stack.append(['o', None])
+            expect_key = True
+        elif c == 0x5b:  # [
+            stack.append(['a', None])
+        elif c == 0x7d or c == 0x5d:  # } ]
+            if not stack:
+                raise JsonStatException("invalid json")
+            stack.pop()
+        elif c == 0x2c:  # ,
+            expect_key = bool(stack) and stack[-1][0] == 'o'
+        elif c == 0x3a:  # :
+            if not stack:
+                raise JsonStatException("invalid json")
+            key = stack[-1][1]
+            if key in (b'"value"', b'"status"') and _is_dataset(stack):
+                n = _NOT_WHITESPACE.search(buf, pos)
+                if n is not None and buf[n.start()] == 0x5b:
+                    start = n.start()
+                    end = _find_array_end(buf, start)
+                    yield key, start, end
+                    pos = end + 1
+        elif expect_key:
+            stack[-1][1] = m.group()
+            expect_key = False
+
+
+def _find_array_end(buf, start):
+    """position of the bracket closing an array of scalars starting at start"""
+    end = buf.find(b']', start)
+    if end == -1:
+        raise JsonStatException("invalid json")
+    if buf.find(b'"', start, end) == -1:
+        # array of numbers
+        return end
+
+    # array of strings, a string could contain "]"
+    pos = start + 1
+    nr_quotes = 0
+    while buf.find(b'\\', pos, end) == -1:
+        # without escapes the bracket is outside of strings if the number of quotes before it is even
+        nr_quotes += _count(buf, b'"', pos, end)
+        if nr_quotes % 2 == 0:
+            return end
+        pos = end
+        end = buf.find(b']', end + 1)
+        if end == -1:
+            raise JsonStatException("invalid json")
+
+    # escaped characters, strings are matched one at a time
+    pos = start + 1
+    while True:
+        m = _STRING_OR_END.search(buf, pos)
+        if m is None:
+            raise JsonStatException("invalid json")
+        if buf[m.start()] == 0x5d:
+            return m.start()
+        pos = m.end()
+
+
+def _count(buf, sub, a, b):
+    """number of occurrences of the single byte sub between a and b"""
+    n = 0
+    for i in range(a, b, CHUNK_SIZE):
+        n += buf[i:min(i + CHUNK_SIZE, b)].count(sub)
+    return n
+
+
+def _count_items(buf, a, b):
+    """upper bound of the number of items of an array of scalars between a and b"""
+    if _NOT_WHITESPACE.search(buf, a, b) is None:
+        return 0
+    return _count(buf, b',', a, b) + 1
+
+
+def _iter_chunks(buf, a, b):
+    """decodes the items of an array of scalars between a and b, a chunk at a time
+
+    :returns: an iterator over lists of items
+    """
+    while a < b:
+        cut = min(a + CHUNK_SIZE, b)
+        if cut < b:
+            k = buf.rfind(b',', a, cut)
+            if k <= a:
+                k = buf.find(b',', cut, b)
+            cut = b if k == -1 else k
+        while True:
+            try:
+                items = json_loads(b'[' + buf[a:cut] + b']')
+                break
+            except ValueError:
+                # chunk ends into a string containing a comma
+                if cut >= b:
+                    raise JsonStatMalformedJson("invalid json array at position {}".format(a))
+                k = buf.find(b',', cut + 1, b)
+                cut = b if k == -1 else k
+        yield items
+        a = cut + 1
+
+
+def _load_values(buf, a, b, dtype, as_object=False):
+    """decodes the "value" array between a and b into a DenseStorage"""
+    size = _count_items(buf, a, b)
+    array = None
+    mask = np.empty(size, dtype=bool)
+    integral = None  # True, False or boolean array when integers and floats are mixed (see values_to_array)
+    n = 0
+    for items in _iter_chunks(buf, a, b):
+        if as_object:
+            values, m, chunk_integral = _values_to_object_array(items)
+        else:
+            values, m, chunk_integral = values_to_array(items, dtype)
+        if isinstance(integral, np.ndarray):
+            integral[n:n + len(values)] = chunk_integral
+        elif not m.any():
+            # only nulls
+            pass
+        elif isinstance(chunk_integral, np.ndarray) or (integral is not None and chunk_integral is not integral):
+            flags = np.zeros(size, dtype=bool)
+            flags[:n] = bool(integral)
+            flags[n:n + len(values)] = chunk_integral
+            integral = flags
+        else:
+            integral = chunk_integral
+        if array is None:
+            array = np.empty(size, dtype=values.dtype)
+        elif values.dtype != array.dtype:
+            # values are not numbers (f.e. strings), restart storing them as python objects
+            return _load_values(buf, a, b, dtype, as_object=True)
+        array[n:n + len(values)] = values
+        mask[n:n + len(values)] = m
+        n += len(values)
+    if array is None:
+        array, mask, integral = values_to_array([], dtype)
+    if n < size:
+        # some items contain a comma (they are strings)
+        array, mask = array[:n].copy(), mask[:n].copy()
+    if integral is None or (isinstance(integral, np.ndarray) and integral.all()):
+        integral = True
+    return DenseStorage(array, mask, integral)
+
+
+def _load_status(buf, a, b):
+    """decodes the "status" array between a and b into a StatusStorage"""
+    size = _count_items(buf, a, b)
+    table = [None]
+    status2code = {}
+    codes = np.zeros(size, dtype=np.uint8)
+    n = 0
+    for items in _iter_chunks(buf, a, b):
+        values = np.empty(len(items), dtype=object)
+        values[:] = items
+        chunk_codes, uniques = pd.factorize(values)
+        lookup = np.empty(len(uniques) + 1, dtype=np.int64)
+        lookup[-1] = 0  # pd.factorize gives -1 to None
+        for i, status in enumerate(uniques):
+            if status not in status2code:
+                status2code[status] = len(table)
+                table.append(status)
+            lookup[i] = status2code[status]
+        if code_dtype(len(table)) != codes.dtype:
+            codes = codes.astype(code_dtype(len(table)))
+        codes[n:n + len(items)] = lookup[chunk_codes]
+        n += len(items)
+    if n < size:
+        codes = codes[:n].copy()
+    return StatusStorage(table, codes, None, n)
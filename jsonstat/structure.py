@@ -0,0 +1,351 @@
+# -*- coding: utf-8 -*-
+# This file is part of https://github.com/26fe/jsonstat.py
+# Copyright (C) 2016-2021 gf <gf@26fe.com>
+# See LICENSE file
+
+# Structural validation of jsonstat datasets.
+#
+# Checks the invariants the parser relies on, without a json schema:
+#   - id and size agree, each id has a dimension
+#   - the number of values is the product of the sizes
+#   - categories have no hole in the indexes, labels refer to existing indexes
+#   - values are numbers, strings or null, status are strings or null
+#
+# Types of "value" and "status" arrays are checked on the set of the types of
+# their items, the items are scanned one by one only to report an error.
+# Arrays already decoded by jsonstat.streaming are checked on their storage, the size of
+# arrays not decoded yet is checked by their length (they are decoded only if it differs).
+
+# stdlib
+from functools import reduce
+
+# packages
+import numpy as np
+
+# jsonstat
+from jsonstat.exceptions import JsonStatException
+from jsonstat.exceptions import JsonStatMalformedJson
+from jsonstat.storage import DenseStorage
+from jsonstat.storage import StatusStorage
+from jsonstat.streaming import DeferredArray
+
+_VALUE_TYPES = {int, float, str, type(None)}
+_STATUS_TYPES = {str, type(None)}
+
+
+def structure_errors(json_data, fail_fast=False):
+    """Returns the structural errors of a jsonstat (datasets, collections or dimensions)
+
+    it is faster than validating against the json schema, see :py:meth:`jsonstat.validation_errors`,
+    and checks what the schema cannot check (f.e. the number of values).
+
+    >>> import jsonstat
+    >>> json_data = {"version": "2.0", "class": "dataset", "id": ["a"], "size": [3], "value": [1, 2],
+    ...              "dimension": {"a": {"category": {"index": ["x", "y", "z"]}}}}
+    >>> jsonstat.structure_errors(json_data)
+    ["dataset 'None': size 2 is different from calculate size 3 by dimension"]
+
+    :param json_data: data structure (dictionary) representing a json, also as returned by
+        :py:meth:`jsonstat.streaming.load_buffer`
+    :param fail_fast: if True stop at the first error
+    :returns: list of error messages, empty if json_data is valid
+    """
+    errors = []
+    for error in _iter_errors(json_data):
+        errors.append(error)
+        if fail_fast:
+            break
+    return errors
+
+
+def check_structure(json_data):
+    """Raises an exception at the first structural error, see :py:meth:`structure_errors`
+
+    :param json_data: data structure (dictionary) representing a json
+    :raises JsonStatMalformedJson: if json_data is not valid
+    """
+    errors = structure_errors(json_data, fail_fast=True)
+    if errors:
+        raise JsonStatMalformedJson(errors[0])
+
+
+def _iter_errors(json_data):
+    if not isinstance(json_data, dict):
+        yield "jsonstat must be an object"
+        return
+    if "version" not in json_data:
+        # version 1: object from the name of the dataset to the dataset
+        for name, json_data_ds in json_data.items():
+            if not isinstance(json_data_ds, dict):
+                yield "dataset '{}': must be an object".format(name)
+            else:
+                yield from _dataset_errors(name, json_data_ds, "version" in json_data_ds)
+        return
+
+    cls = json_data.get("class")
+    if cls == "dataset":
+        yield from _dataset_errors(json_data.get("label"), json_data, True)
+    elif cls == "collection":
+        json_data_link = json_data.get("link")
+        items = json_data_link.get("item") if isinstance(json_data_link, dict) else None
+        if not isinstance(items, list):
+            yield "collection: missing 'link.item' key"
+            return
+        for json_data_ds in items:
+            if isinstance(json_data_ds, dict):
+                yield from _dataset_errors(json_data_ds.get("label"), json_data_ds, True)
+    elif cls == "dimension":
+        yield from _dimension_errors(None, None, json_data)
+    else:
+        yield "unknown class {}".format(cls)
+
+
+def _dataset_errors(name, json_data, v2):
+    """yields the errors of a dataset
+
+    :param v2: True for a dataset in jsonstat format version 2.x
+    """
+    prefix = "dataset '{}': ".format(name)
+    if v2:
+        if "id" not in json_data and "href" in json_data:
+            # link to a dataset, not parsed
+            return
+        json_data_dimension = json_data.get("dimension")
+        json_data_ids = json_data
+        key = "{}"
+    else:
+        json_data_dimension = json_data.get("dimension")
+        json_data_ids = json_data_dimension
+        key = "dimension.{}"
+
+    if "value" not in json_data:
+        yield prefix + "missing 'value' key"
+        return
+    if not isinstance(json_data_dimension, dict):
+        yield prefix + "missing 'dimension' key"
+        return
+    for k in ["id", "size"]:
+        if not isinstance(json_data_ids.get(k), list):
+            yield prefix + "missing '{}' key or it is not an array".format(key.format(k))
+            return
+
+    pos2did = json_data_ids["id"]
+    pos2size = []
+    for size in json_data_ids["size"]:
+        try:
+            # cso.ie exposes dimension sizes as strings
+            size = int(size)
+        except (TypeError, ValueError):
+            size = -1
+        if size < 0:
+            yield prefix + "size {} is not a positive integer".format(size)
+            return
+        pos2size.append(size)
+    if len(pos2did) != len(pos2size):
+        yield prefix + "dataset_id is different of dataset_size"
+        return
+
+    for did, size in zip(pos2did, pos2size):
+        if did not in json_data_dimension:
+            yield prefix + "malformed json: missing key {} in dimension".format(did)
+        else:
+            for error in _dimension_errors(did, size, json_data_dimension[did]):
+                yield prefix + error
+
+    size_total = reduce(lambda x, y: x * y, pos2size, 1)
+    for error in _value_errors(json_data["value"], size_total):
+        yield prefix + error
+    if "status" in json_data:
+        # version 1 (eurostat) status could have keys which are not integer, they are skipped
+        for error in _status_errors(json_data["status"], size_total, strict=v2):
+            yield prefix + error
+
+
+def _value_errors(json_data_value, size_total):
+    if isinstance(json_data_value, DeferredArray):
+        try:
+            size = _deferred_size(json_data_value, (size_total,))
+        except JsonStatException as e:
+            yield str(e)
+            return
+    elif isinstance(json_data_value, DenseStorage):
+        size = len(json_data_value)
+        if json_data_value.array.dtype == object:
+            # not only numbers, f.e. strings
+            error = _type_error("value", json_data_value.array.reshape(-1).tolist(), _VALUE_TYPES)
+            if error is not None:
+                yield error
+    elif isinstance(json_data_value, list):
+        size = len(json_data_value)
+        error = _type_error("value", json_data_value, _VALUE_TYPES)
+        if error is not None:
+            yield error
+    elif isinstance(json_data_value, dict):
+        error = _keys_error("value", json_data_value, size_total)
+        if error is not None:
+            yield error
+        error = _type_error("value", list(json_data_value.values()), _VALUE_TYPES)
+        if error is not None:
+            yield error
+        return
+    else:
+        yield "field 'value' must be an array or an object"
+        return
+
+    if size == 0:
+        yield "field 'value' is empty"
+    elif size != size_total:
+        yield "size {} is different from calculate size {} by dimension".format(size, size_total)
+
+
+def _status_errors(json_data_status, size_total, strict):
+    if json_data_status is None or isinstance(json_data_status, str):
+        return
+    if isinstance(json_data_status, DeferredArray):
+        try:
+            size = _deferred_size(json_data_status, (1, size_total))
+        except JsonStatException as e:
+            yield str(e)
+            return
+    elif isinstance(json_data_status, StatusStorage):
+        size = json_data_status.size
+        error = _type_error("status", json_data_status.table, _STATUS_TYPES)
+        if error is not None and json_data_status.codes is not None and json_data_status.idx is None:
+            # position of the first item with the status of invalid type
+            code = next(c for c, status in enumerate(json_data_status.table) if type(status) not in _STATUS_TYPES)
+            pos = int(np.argmax(json_data_status.codes.reshape(-1) == code))
+            error = "item {} of 'status' has an invalid type ({!r})".format(pos, json_data_status.table[code])
+        if error is not None:
+            yield error
+    elif isinstance(json_data_status, list):
+        size = len(json_data_status)
+        error = _type_error("status", json_data_status, _STATUS_TYPES)
+        if error is not None:
+            yield error
+    elif isinstance(json_data_status, dict):
+        if strict:
+            error = _keys_error("status", json_data_status, size_total)
+            if error is not None:
+                yield error
+            error = _type_error("status", list(json_data_status.values()), _STATUS_TYPES)
+            if error is not None:
+                yield error
+        return
+    else:
+        yield "field 'status' must be a string, an array or an object"
+        return
+
+    if size != 1 and size != size_total:
+        yield "incorrect size of status fields"
+
+
+def _deferred_size(array, expected):
+    """number of items of an array not decoded yet (see jsonstat.streaming.DeferredArray)
+
+    its length is an upper bound (strings could contain commas), the array is decoded
+    to count the items only if the length is not one of the expected sizes
+    """
+    size = len(array)
+    if size not in expected:
+        storage = array.load()
+        size = storage.size if isinstance(storage, StatusStorage) else len(storage)
+    return size
+
+
+def _type_error(field, items, types):
+    """returns an error message if an item of the list is not of one of the types"""
+    if set(map(type, items)) <= types:
+        return None
+    pos, item = next((pos, item) for pos, item in enumerate(items) if type(item) not in types)
+    return "item {} of '{}' has an invalid type ({!r})".format(pos, field, item)
+
+
+def _keys_error(field, json_data, size_total):
+    """returns an error message if a key of the object is not an index in [0, size_total)"""
+    try:
+        idx = np.fromiter(map(int, json_data.keys()), dtype=np.int64, count=len(json_data))
+    except (TypeError, ValueError, OverflowError):
+        key = next(k for k in json_data.keys() if not _is_int(k))
+        return "key '{}' of '{}' is not an integer".format(key, field)
+    out = (idx < 0) | (idx >= size_total)
+    if out.any():
+        msg = "index {} of '{}' is out of calculate size {} by dimension"
+        return msg.format(idx[out.argmax()], field, size_total)
+    return None
+
+
+def _is_int(key):
+    try:
+        int(key)
+    except (TypeError, ValueError, OverflowError):
+        return False
+    return True
+
+
+def _dimension_errors(did, size, json_data):
+    """yields the errors of a dimension, size is None when the dimension does not belong to a dataset"""
+    prefix = "dimension '{}': ".format(did)
+    json_data_category = json_data.get("category") if isinstance(json_data, dict) else None
+    if not isinstance(json_data_category, dict):
+        yield prefix + "missing category key"
+        return
+    json_data_index = json_data_category.get("index")
+    json_data_label = json_data_category.get("label")
+    if json_data_index is None and json_data_label is None:
+        yield prefix + "one of keys 'label' or 'index' must be presents"
+        return
+
+    if json_data_index is None:
+        if not isinstance(json_data_label, dict):
+            yield prefix + "'label' must be an object"
+        elif size is not None and len(json_data_label) != size:
+            msg = "malformed json: number of indexes {} not match with size {}"
+            yield prefix + msg.format(len(json_data_label), size)
+        return
+
+    if isinstance(json_data_index, list):
+        if size is not None and len(json_data_index) != size:
+            msg = "malformed json: number of indexes {} not match with size {}"
+            yield prefix + msg.format(len(json_data_index), size)
+            return
+        if not set(map(type, json_data_index)) <= {str}:
+            yield prefix + "indexes must be strings"
+            return
+        idx2pos = set(json_data_index)
+        if len(idx2pos) != len(json_data_index):
+            yield prefix + "duplicated index"
+            return
+    elif isinstance(json_data_index, dict):
+        error = _positions_error(json_data_index, len(json_data_index) if size is None else size)
+        if error is not None:
+            yield prefix + error
+            return
+        idx2pos = json_data_index
+    else:
+        yield prefix + "'index' must be an array or an object"
+        return
+
+    if isinstance(json_data_label, dict):
+        missing = json_data_label.keys() - idx2pos
+        if missing:
+            idx = next(idx for idx in json_data_label if idx in missing)
+            msg = "label '{}' is associated with index '{}' that not exists!"
+            yield prefix + msg.format(json_data_label[idx], idx)
+    elif json_data_label is not None:
+        yield prefix + "'label' must be an object"
+
+
+def _positions_error(json_data_index, size):
+    """returns an error message if the positions of the index object are not 0, 1, ..., size - 1"""
+    if not set(map(type, json_data_index.values())) <= {int}:
+        return "positions of categories must be integers"
+    pos = np.fromiter(json_data_index.values(), dtype=np.int64, count=len(json_data_index))
+    if len(pos) > 0 and (pos.min() < 0 or pos.max() >= size):
+        bad = pos.min() if pos.min() < 0 else pos.max()
+        return "position {} is out of size {}".format(bad, size)
+    count = np.bincount(pos, minlength=size)
+    if (count == 0).any():
+        return "hole in index at position {}".format(int((count == 0).argmax()))
+    if (count > 1).any():
+        return "more indexes at position {}".format(int((count > 1).argmax()))
+    return None
@@ -3,6 +3,95 @@
 # Copyright (C) 2016-2021 gf <gf@26fe.com>
 # See LICENSE file
 
+# stdlib
+from contextlib import contextmanager
+import bz2
+import gzip
+import lzma
+import mmap
+import os
+import shutil
+import tempfile
+
+# magic bytes of the compressed formats and the function opening them
+_COMPRESSIONS = [
+    (b'\x1f\x8b', gzip.open),
+    (b'BZh', bz2.open),
+    (b'\xfd7zXZ\x00', lzma.open),
+]
+
+# size in bytes of the pieces decompressed at once
+DECOMPRESS_CHUNK_SIZE = 1024 * 1024
+
+# directory of the temporary files containing decompressed files (see map_file),
+# None for the default of the tempfile module (TMPDIR), which could be in memory (tmpfs)
+DECOMPRESS_DIR = None
+
+
+def _compression(f):
+    """returns the function opening the compressed file f (gzip, bz2 or xz) or None if f is not compressed"""
+    magic = f.read(6)
+    f.seek(0)
+    for prefix, open_function in _COMPRESSIONS:
+        if magic.startswith(prefix):
+            return open_function
+    return None
+
+
+def open_file(filename):
+    """Opens a file in binary mode, gzip, bz2 and xz files are decompressed on the fly
+
+    the compression is detected by the first bytes of the file, not by its extension.
+
+    :param filename: path of the file
+    :returns: a file object
+    """
+    with open(filename, 'rb') as f:
+        open_function = _compression(f)
+    if open_function is None:
+        return open(filename, 'rb')
+    return open_function(filename)
+
+
+@contextmanager
+def map_file(filename):
+    """Memory maps a file in read only mode
+
+    the content of the file is not copied into memory, pages are loaded on demand
+    from the page cache (and shared between processes reading the same file).
+
+    Compressed files (gzip, bz2, xz) are not decoded on the fly: the parser needs random
+    access to the json (f.e. to decode only the selected cells, see :py:class:`jsonstat.streaming.DeferredArray`).
+    They are decompressed a chunk at a time into a temporary file (in ``DECOMPRESS_DIR``)
+    that is memory mapped, the whole decompressed file is written before parsing starts.
+    The temporary file has no name and it is deleted on exit, also if decompression
+    or parsing fails.
+
+    :param filename: path of the file
+    :returns: a context manager returning a mmap object (b'' for empty files)
+    """
+    with open(filename, 'rb') as f:
+        open_function = _compression(f)
+        if open_function is not None:
+            with open_function(f) as decompressed, tempfile.TemporaryFile(dir=DECOMPRESS_DIR) as tmp:
+                shutil.copyfileobj(decompressed, tmp, DECOMPRESS_CHUNK_SIZE)
+                tmp.flush()
+                with _map(tmp) as buf:
+                    yield buf
+            return
+        with _map(f) as buf:
+            yield buf
+
+
+@contextmanager
+def _map(f):
+    if os.fstat(f.fileno()).st_size == 0:
+        # an empty file cannot be mapped
+        yield b''
+        return
+    with mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as buf:
+        yield buf
+
 
 def lst2html(lst):
     html = "<table>"
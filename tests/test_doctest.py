@@ -21,6 +21,7 @@ def load_tests(loader, tests, ignore):
         tests.addTests(doctest.DocTestSuite(jsonstat.dimension))
         tests.addTests(doctest.DocTestSuite(jsonstat.dataset))
         tests.addTests(doctest.DocTestSuite(jsonstat.collection))
+        tests.addTests(doctest.DocTestSuite(jsonstat.selector))
         doc_dir = os.path.join(os.path.dirname(__file__), "..", "docs")
         tests.addTests(doctest.DocFileSuite(os.path.join(doc_dir, 'tutorial.rst'), module_relative=False))
     return tests